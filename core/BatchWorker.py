@@ -0,0 +1,32 @@
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from core.batch import BatchRunner
+
+
+class BatchWorker(QThread):
+    """BatchRunner 的 Qt 适配层：在后台线程运行批量队列，并把回调转成信号"""
+    progress_signal = pyqtSignal(int)
+    # 单个任务的状态或进度变化（core.batch.BatchJob）
+    job_signal = pyqtSignal(object)
+    finished_signal = pyqtSignal()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self.runner = BatchRunner(
+            *args,
+            on_job_progress=self.job_signal.emit,
+            on_progress=self.progress_signal.emit,
+            **kwargs
+        )
+        self.summary = None
+
+    @property
+    def jobs(self):
+        return self.runner.jobs
+
+    def run(self):
+        self.summary = self.runner.run()
+        self.finished_signal.emit()
+
+    def stop(self):
+        self.runner.stop()
@@ -0,0 +1,43 @@
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from core.multi import MultiExtractor
+
+
+class MultiWorker(QThread):
+    """MultiExtractor 的 Qt 适配层：接口与 FFmpegWorker 相同，帧数与输出目录取第一路输出"""
+    progress_signal = pyqtSignal(int)
+    finished_signal = pyqtSignal()
+    status_signal = pyqtSignal(str)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self.extractor = MultiExtractor(
+            *args,
+            on_progress=self.progress_signal.emit,
+            on_status=self.status_signal.emit,
+            **kwargs
+        )
+        self.result = None
+
+    @property
+    def video_path(self):
+        return self.extractor.video_path
+
+    @property
+    def output_dir(self):
+        return self.extractor.extractors[0].output_dir
+
+    @property
+    def extracted_frames(self):
+        return self.extractor.extractors[0].extracted_frames
+
+    @property
+    def stopped(self):
+        return self.extractor.engine.stopped
+
+    def run(self):
+        self.result = self.extractor.run()
+        self.finished_signal.emit()
+
+    def stop(self):
+        self.extractor.stop()
@@ -0,0 +1,47 @@
+import threading
+from pathlib import Path
+
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal
+
+from core.probe import probe_video, ProbeCancelled
+
+
+class ProbeSignals(QObject):
+    # (序号, VideoInfo)
+    finished_signal = pyqtSignal(int, object)
+    # (序号, 错误信息)
+    failed_signal = pyqtSignal(int, str)
+
+
+class ProbeTask(QRunnable):
+    """在 QThreadPool 中探测视频信息；cancel() 会结束正在运行的 ffprobe，结果不再回传"""
+
+    def __init__(self, path, serial):
+        super().__init__()
+        self.path = Path(path)
+        self.serial = serial
+        self.signals = ProbeSignals()
+        self._cancel = threading.Event()
+        self.setAutoDelete(True)
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def run(self):
+        try:
+            # 文件是否存在也放在后台判断，网络盘上这一步同样可能很慢
+            if not self.path.is_file():
+                raise FileNotFoundError(f"文件不存在：{self.path}")
+            info = probe_video(self.path, cancel=self._cancel)
+        except ProbeCancelled:
+            return
+        except Exception as e:
+            if not self.cancelled:
+                self.signals.failed_signal.emit(self.serial, str(e))
+            return
+        if not self.cancelled:
+            self.signals.finished_signal.emit(self.serial, info)
@@ -1,34 +1,32 @@
-import datetime
-import json
+import argparse
 import os
 import subprocess
 import sys
 from pathlib import Path
 
-from PyQt6.QtCore import Qt, QSettings
+from PyQt6.QtCore import Qt, QSettings, QThreadPool, QTimer
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QFileDialog,
-    QProgressBar, QComboBox, QSpinBox, QGroupBox, QFormLayout, QMessageBox
+    QProgressBar, QComboBox, QSpinBox, QGroupBox, QFormLayout, QMessageBox, QCheckBox, QListWidget
 )
 
+from core.BatchWorker import BatchWorker
+from core.autotune import TuneOptions
 from core.FFmpegWorker import FFmpegWorker
-from core.util import format_duration
-
-
-def detect_gpu():
-    """检测系统是否有可用 CUDA GPU"""
-    try:
-        flags = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
-        result = subprocess.run(
-            ["ffmpeg", "-hwaccels"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            creationflags=flags
-        )
-        return "cuda" in result.stdout.lower()
-    except:
-        return False
+from core.MultiWorker import MultiWorker
+from core.ProbeTask import ProbeTask
+from core.batch import collect_videos
+from core.checkpoint import find_resumable_dir
+from core.dedup import DedupOptions
+from core.extractor import OutputOptions, PerformanceOptions, SelectionOptions
+from core.layout import OutputLayout
+from core.multi import OutputSpec, parse_output_spec, unsupported_options
+from core.mosaic import TileLayout
+from core.resize import Resize
+from core.resultcache import ResultCache
+from core.scene import SceneOptions
+from core.segments import default_segment_count
+from core.util import format_duration, detect_gpu, make_output_dir
 
 
 class SingleVideoApp(QWidget):
@@ -36,13 +34,26 @@ class SingleVideoApp(QWidget):
         super().__init__()
         self.video_duration_seconds = None
         self.progress_label = None
+        self.metrics_label = None
         self.progress_bar = None
         self.stop_btn = None
         self.start_btn = None
         self.quality_input = None
+        self.dedup_check = None
+        self.resume_check = None
+        self.cache_check = None
+        self.extra_outputs_input = None
         self.quality_label = None
         self.format_box = None
+        self.size_box = None
+        self.tile_box = None
+        self.layout_box = None
         self.param_input = None
+        self.parallel_input = None
+        self.auto_tune_check = None
+        self.scene_gap_label = None
+        self.scene_min_gap_input = None
+        self.scene_max_gap_input = None
         self.mode_box = None
         self.reset_range_btn = None
         self.end_sec = None
@@ -63,17 +74,32 @@ class SingleVideoApp(QWidget):
         self.output_input = None
         self.browse_btn = None
         self.file_input = None
+        self.batch_list = None
+        self.batch_add_btn = None
+        self.batch_folder_btn = None
+        self.batch_remove_btn = None
+        self.batch_clear_btn = None
+        self.batch_start_btn = None
         self.setWindowTitle("单视频帧提取器")
         self.setGeometry(400, 150, 700, 500)
         self.settings = QSettings("MyCompany", "SingleVideoExtractor")
         self.worker = None
+        # 批量队列：待处理的视频与运行中的 BatchWorker
+        self.batch_videos = []
+        self.batch_worker = None
         self.current_video_info = None  # 🔹 缓存当前视频信息
+        self.probe_pool = QThreadPool(self)
+        self.probe_pool.setMaxThreadCount(2)
+        self.probe_task = None
+        self.probe_serial = 0
+        self.probe_silent = False
         self.setup_ui()
+        self.update_probe_controls(loading=False)
 
+        # 🔹 窗口显示之后再在后台读取上次的文件，启动速度与文件所在磁盘无关
         last_file = self.settings.value("last_file", "")
-        last_file_path = Path(last_file)
-        if last_file_path.is_file():
-            self.load_video_info(last_file_path)
+        if last_file:
+            QTimer.singleShot(0, lambda: self.load_video_info(Path(last_file), silent=True))
 
     def setup_ui(self):
         layout = QVBoxLayout(self)
@@ -176,8 +202,9 @@ class SingleVideoApp(QWidget):
         mode_layout = QHBoxLayout()
         mode_layout.setAlignment(Qt.AlignmentFlag.AlignHCenter)
         self.mode_box = QComboBox()
-        self.mode_box.addItems(["每N秒取1帧", "每N帧取1帧"])
+        self.mode_box.addItems(["每N秒取1帧", "每N帧取1帧", "仅关键帧", "场景变化"])
         self.mode_box.setFixedWidth(180)
+        self.mode_box.currentIndexChanged.connect(self.toggle_param_range)
         param_label = QLabel("参数N:")
         self.param_input = QSpinBox()
         self.param_input.setRange(1, 3600)
@@ -186,13 +213,38 @@ class SingleVideoApp(QWidget):
         mode_layout.addWidget(self.mode_box)
         mode_layout.addWidget(param_label)
         mode_layout.addWidget(self.param_input)
+        self.parallel_input = QSpinBox()
+        self.parallel_input.setRange(1, default_segment_count())
+        self.parallel_input.setValue(1)
+        self.parallel_input.setToolTip("把提取范围切成多段，由多个 ffmpeg 进程同时解码")
+        mode_layout.addWidget(QLabel("并行进程:"))
+        mode_layout.addWidget(self.parallel_input)
+        self.auto_tune_check = QCheckBox("自动调优")
+        self.auto_tune_check.setToolTip("首次处理某类视频时先做几秒校准，自动选择并行进程数与线程数，结果保存供以后使用")
+        mode_layout.addWidget(self.auto_tune_check)
         layout.addLayout(mode_layout)
 
+        # 场景变化模式：两帧之间的最小 / 最大间隔（秒），0 表示不限制
+        scene_layout = QHBoxLayout()
+        scene_layout.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+        self.scene_gap_label = QLabel("帧间隔(秒) 最小/最大:")
+        self.scene_min_gap_input = QSpinBox()
+        self.scene_min_gap_input.setRange(0, 3600)
+        self.scene_min_gap_input.setSpecialValueText("不限")
+        self.scene_max_gap_input = QSpinBox()
+        self.scene_max_gap_input.setRange(0, 3600)
+        self.scene_max_gap_input.setSpecialValueText("不限")
+        scene_layout.addWidget(self.scene_gap_label)
+        scene_layout.addWidget(self.scene_min_gap_input)
+        scene_layout.addWidget(self.scene_max_gap_input)
+        layout.addLayout(scene_layout)
+        self.toggle_param_range(0)
+
         # 图片格式
         format_layout = QHBoxLayout()
         format_layout.setAlignment(Qt.AlignmentFlag.AlignHCenter)
         self.format_box = QComboBox()
-        self.format_box.addItems(["PNG", "JPG"])
+        self.format_box.addItems(["PNG", "JPG", "WebP"])
         self.format_box.setFixedWidth(100)
         self.format_box.currentIndexChanged.connect(self.toggle_quality_input)
         self.quality_label = QLabel("压缩质量:")
@@ -206,8 +258,47 @@ class SingleVideoApp(QWidget):
         format_layout.addWidget(self.format_box)
         format_layout.addWidget(self.quality_label)
         format_layout.addWidget(self.quality_input)
+        self.size_box = QComboBox()
+        # 🔹 缩略图尺寸在解码时缩放，编码与磁盘占用随之减少
+        self.size_box.addItems(["原始尺寸", "宽 320", "宽 640", "宽 1280"])
+        self.size_box.setFixedWidth(100)
+        format_layout.addWidget(QLabel("尺寸:"))
+        format_layout.addWidget(self.size_box)
+        self.tile_box = QComboBox()
+        self.tile_box.addItems(["不拼图", "3×3", "4×4", "5×5", "6×6"])
+        self.tile_box.setToolTip("把抽样帧拼成一张大图（带时间戳），格位置与时间记录在 tiles.csv")
+        self.tile_box.setFixedWidth(90)
+        format_layout.addWidget(self.tile_box)
+        self.layout_box = QComboBox()
+        # 🔹 长视频分目录存放，每个目录最多 1000 个文件；也可按源视频时间命名
+        self.layout_box.addItems(["平铺", "每1000帧分目录", "按时间命名"])
+        self.layout_box.setToolTip("输出文件的存放方式，路径都记录在 frames.csv 中")
+        self.layout_box.setFixedWidth(130)
+        format_layout.addWidget(self.layout_box)
+        self.dedup_check = QCheckBox("去除重复帧")
+        self.dedup_check.setToolTip("丢弃与上一张已保存图片几乎相同的帧（适合录屏、监控视频）")
+        format_layout.addWidget(self.dedup_check)
+        self.resume_check = QCheckBox("断点续提")
+        self.resume_check.setToolTip("继续该视频最近一次被终止或中断的提取（参数需一致），没有时新建输出目录")
+        format_layout.addWidget(self.resume_check)
+        self.cache_check = QCheckBox("结果缓存")
+        self.cache_check.setToolTip("重复的提取直接从缓存生成输出；完成的输出以 reflink 存入缓存（文件系统不支持时不存入）")
+        format_layout.addWidget(self.cache_check)
         layout.addLayout(format_layout)
 
+        # 附加输出：与上面的主输出在同一次解码中产出（core.multi），多路之间用 ; 分隔
+        extra_layout = QHBoxLayout()
+        extra_layout.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+        self.extra_outputs_input = QLineEdit()
+        self.extra_outputs_input.setFixedWidth(480)
+        self.extra_outputs_input.setPlaceholderText("可选，如 dir=缩略图,mode=seconds,n=1,format=jpg,size=320；多路用 ; 分隔")
+        self.extra_outputs_input.setToolTip("同一次解码同时产出的其他输出，目录相对本次的输出目录；"
+                                            "格式同命令行 --out（mode / n / format / q / size / tile / shard / naming）；"
+                                            "只运行一个 ffmpeg 进程，不能与分段并行、自动调优、去重、断点续提、结果缓存同时使用")
+        extra_layout.addWidget(QLabel("➕ 附加输出:"))
+        extra_layout.addWidget(self.extra_outputs_input)
+        layout.addLayout(extra_layout)
+
         # 控制按钮
         btn_layout = QHBoxLayout()
         btn_layout.setAlignment(Qt.AlignmentFlag.AlignHCenter)
@@ -223,6 +314,30 @@ class SingleVideoApp(QWidget):
         btn_layout.addWidget(self.stop_btn)
         layout.addLayout(btn_layout)
 
+        # 批量队列：使用上面的提取参数，每个视频提取完整时长，输出到各自的新目录
+        batch_group = QGroupBox("📋 批量队列")
+        batch_layout = QVBoxLayout()
+        self.batch_list = QListWidget()
+        self.batch_list.setFixedHeight(110)
+        batch_layout.addWidget(self.batch_list)
+        batch_btn_layout = QHBoxLayout()
+        self.batch_add_btn = QPushButton("添加视频")
+        self.batch_add_btn.clicked.connect(self.add_batch_files)
+        self.batch_folder_btn = QPushButton("添加文件夹")
+        self.batch_folder_btn.clicked.connect(self.add_batch_folder)
+        self.batch_remove_btn = QPushButton("移除选中")
+        self.batch_remove_btn.clicked.connect(self.remove_batch_selected)
+        self.batch_clear_btn = QPushButton("清空")
+        self.batch_clear_btn.clicked.connect(self.clear_batch)
+        self.batch_start_btn = QPushButton("▶ 批量提取")
+        self.batch_start_btn.clicked.connect(self.start_batch)
+        for button in (self.batch_add_btn, self.batch_folder_btn, self.batch_remove_btn, self.batch_clear_btn,
+                       self.batch_start_btn):
+            batch_btn_layout.addWidget(button)
+        batch_layout.addLayout(batch_btn_layout)
+        batch_group.setLayout(batch_layout)
+        layout.addWidget(batch_group)
+
         # 进度显示
         progress_layout = QVBoxLayout()
         progress_layout.setAlignment(Qt.AlignmentFlag.AlignHCenter)
@@ -251,8 +366,13 @@ class SingleVideoApp(QWidget):
 
         self.progress_label = QLabel("准备就绪")
         self.progress_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)  # 🔹保证始终居中
+        self.metrics_label = QLabel("")
+        self.metrics_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+        self.metrics_label.setStyleSheet("color: #777777;")
+        self.metrics_label.setVisible(False)
         progress_layout.addWidget(self.progress_bar)
         progress_layout.addWidget(self.progress_label)
+        progress_layout.addWidget(self.metrics_label)
         layout.addLayout(progress_layout)
 
         self.setLayout(layout)
@@ -276,11 +396,25 @@ class SingleVideoApp(QWidget):
         self.end_min.setValue(m)
         self.end_sec.setValue(s)
 
+    def toggle_param_range(self, index):
+        # 仅关键帧 模式下 N 表示“每 N 秒至多 1 帧”，N=0 表示输出全部关键帧
+        # 场景变化 模式下 N 为场景变化阈值（百分比）
+        mode = self.mode_box.currentText()
+        is_keyframe = mode == "仅关键帧"
+        is_scene = mode == "场景变化"
+        self.param_input.setMinimum(0 if is_keyframe else 1)
+        self.param_input.setMaximum(100 if is_scene else 3600)
+        self.param_input.setSpecialValueText("全部" if is_keyframe else "")
+        self.param_input.setSuffix("%" if is_scene else "")
+        self.scene_gap_label.setVisible(is_scene)
+        self.scene_min_gap_input.setVisible(is_scene)
+        self.scene_max_gap_input.setVisible(is_scene)
+
     def toggle_quality_input(self, index):
-        is_jpg = self.format_box.currentText().lower() == "jpg"
-        self.quality_label.setVisible(is_jpg)
-        self.quality_input.setVisible(is_jpg)
-        if is_jpg: self.quality_input.setValue(85)
+        is_lossy = self.format_box.currentText().lower() in ("jpg", "webp")
+        self.quality_label.setVisible(is_lossy)
+        self.quality_input.setVisible(is_lossy)
+        if is_lossy: self.quality_input.setValue(85)
 
     def choose_file(self):
         start_dir = Path(self.file_input.text() or Path.home())
@@ -296,91 +430,100 @@ class SingleVideoApp(QWidget):
             self.settings.setValue("last_file", str(file_path))
             self.load_video_info(file_path)
 
-    def load_video_info(self, path: Path):
+    def load_video_info(self, path: Path, silent=False):
         """
-        读取视频信息并缓存，保证 total_frames 为 int
+        在后台线程池中读取视频信息；再次调用会取消上一次尚未完成的探测
+        silent=True 时读取失败不弹窗（用于启动时恢复上次的文件）
         """
-        try:
-            cmd = [
-                "ffprobe", "-v", "error",
-                "-show_entries", "format=duration:stream=width,height,avg_frame_rate,nb_frames",
-                "-of", "json",
-                str(path)
-            ]
-
-            # ✅ Windows 下禁止弹出黑框
-            create_no_window = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
-
-            proc = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                creationflags=create_no_window
-            )
-            stdout, stderr = proc.communicate()
-
-            if proc.returncode != 0:
-                raise RuntimeError(stderr)
-
-            info = json.loads(stdout)
-            duration = float(info["format"]["duration"])
-
-            streams = [s for s in info["streams"] if "width" in s]
-            if not streams:
-                raise RuntimeError("未找到视频流")
-            stream = streams[0]
-
-            width, height = stream.get("width", 0), stream.get("height", 0)
-            fps_str = stream.get("avg_frame_rate", "0/1")
-            fps = eval(fps_str) if fps_str != "0/0" else 0
-            nb_frames_raw = stream.get("nb_frames", "0")
-            try:
-                total_frames = int(nb_frames_raw)
-            except Exception:
-                total_frames = 0
-
-            self.info_name.setText(path.name)
-            self.info_type.setText(path.suffix.lower().replace(".", "").upper())
-            self.info_duration.setText(format_duration(duration))
-            self.info_resolution.setText(f"{width} x {height}")
-            self.info_fps.setText(f"{fps:.2f}" if fps else "未知")
-            self.info_frames.setText(str(total_frames))
-
-            # 缓存数据
-            self.video_duration_seconds = int(duration)
-            self.current_video_info = {
-                "duration": duration,
-                "fps": fps,
-                "total_frames": total_frames
-            }
+        if self.probe_task is not None:
+            self.probe_task.cancel()
+        self.probe_serial += 1
+        self.probe_silent = silent
+
+        self.current_video_info = None
+        self.video_duration_seconds = 0
+        self.show_video_info_placeholder("读取中...")
+        self.info_name.setText(Path(path).name)
+        self.update_probe_controls(loading=True)
+
+        self.probe_task = ProbeTask(path, self.probe_serial)
+        self.probe_task.signals.finished_signal.connect(self.on_probe_finished)
+        self.probe_task.signals.failed_signal.connect(self.on_probe_failed)
+        self.probe_pool.start(self.probe_task)
+
+    def on_probe_finished(self, serial, info):
+        if serial != self.probe_serial:
+            return  # 已被新的探测取代
+        self.probe_task = None
+        path = Path(info.path)
+        duration = info.duration
+        if duration <= 0:
+            self.on_probe_failed(serial, "无法获取视频时长")
+            return
+        width, height = info.display_size
+        fps = float(info.fps)
+        total_frames = info.nb_frames
+
+        self.info_name.setText(path.name)
+        self.info_type.setText(path.suffix.lower().replace(".", "").upper())
+        self.info_duration.setText(format_duration(duration))
+        self.info_resolution.setText(f"{width} x {height}")
+        self.info_fps.setText(f"{fps:.2f}" if fps else "未知")
+        self.info_frames.setText(str(total_frames))
+
+        # 缓存数据
+        self.video_duration_seconds = int(duration)
+        self.current_video_info = info.to_dict()
+
+        # 设置默认提取范围
+        h, rem = divmod(self.video_duration_seconds, 3600)
+        m, s = divmod(rem, 60)
+        self.start_hour.setValue(0)
+        self.start_min.setValue(0)
+        self.start_sec.setValue(0)
+        self.end_hour.setValue(h)
+        self.end_min.setValue(m)
+        self.end_sec.setValue(s)
+        self.update_probe_controls(loading=False)
 
-            # 设置默认提取范围
-            h, rem = divmod(self.video_duration_seconds, 3600)
-            m, s = divmod(rem, 60)
-            self.start_hour.setValue(0)
-            self.start_min.setValue(0)
-            self.start_sec.setValue(0)
-            self.end_hour.setValue(h)
-            self.end_min.setValue(m)
-            self.end_sec.setValue(s)
-
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"无法读取视频信息：\n{str(e)}")
-            self.info_name.setText("-")
-            self.info_type.setText("-")
-            self.info_duration.setText("-")
-            self.info_resolution.setText("-")
-            self.info_fps.setText("-")
-            self.info_frames.setText("-")
-            self.start_hour.setValue(0)
-            self.start_min.setValue(0)
-            self.start_sec.setValue(0)
-            self.end_hour.setValue(0)
-            self.end_min.setValue(0)
-            self.end_sec.setValue(0)
-            self.video_duration_seconds = 0
-            self.current_video_info = None
+    def on_probe_failed(self, serial, message):
+        if serial != self.probe_serial:
+            return
+        self.probe_task = None
+        if not self.probe_silent:
+            QMessageBox.critical(self, "错误", f"无法读取视频信息：\n{message}")
+        self.show_video_info_placeholder("-")
+        self.start_hour.setValue(0)
+        self.start_min.setValue(0)
+        self.start_sec.setValue(0)
+        self.end_hour.setValue(0)
+        self.end_min.setValue(0)
+        self.end_sec.setValue(0)
+        self.video_duration_seconds = 0
+        self.current_video_info = None
+        self.update_probe_controls(loading=False)
+
+    def show_video_info_placeholder(self, text):
+        self.info_name.setText(text)
+        self.info_type.setText(text)
+        self.info_duration.setText(text)
+        self.info_resolution.setText(text)
+        self.info_fps.setText(text)
+        self.info_frames.setText(text)
+
+    def update_probe_controls(self, loading):
+        """时间范围与开始按钮仅在视频信息就绪时可用"""
+        if self.is_busy():
+            return  # 提取期间由 toggle_ui_enabled 控制
+        ready = not loading and self.current_video_info is not None
+        for widget in (self.start_hour, self.start_min, self.start_sec,
+                       self.end_hour, self.end_min, self.end_sec, self.reset_range_btn):
+            widget.setEnabled(ready)
+        self.start_btn.setEnabled(ready)
+        if loading:
+            self.progress_label.setText("正在读取视频信息...")
+        elif self.progress_label.text() == "正在读取视频信息...":
+            self.progress_label.setText("准备就绪")
 
     def get_selected_range_seconds(self):
         """返回用户选择的起始和结束秒数，并进行合法性校验"""
@@ -406,8 +549,40 @@ class SingleVideoApp(QWidget):
 
         return start_seconds, end_seconds
 
+    def is_busy(self):
+        return bool(self.worker and self.worker.isRunning()) or bool(self.batch_worker and self.batch_worker.isRunning())
+
+    def extraction_options(self):
+        """界面上的提取参数（单个视频与批量队列共用）"""
+        fmt = self.format_box.currentText()
+        size = self.size_box.currentText()
+        grid = self.tile_box.currentText()
+        return {
+            "mode": self.mode_box.currentText(),
+            "param": self.param_input.value(),
+            "fmt": fmt,
+            "quality": self.quality_input.value() if fmt.lower() in ("jpg", "webp") else 0,
+            "selection": SelectionOptions(
+                scene=SceneOptions(self.scene_min_gap_input.value(), self.scene_max_gap_input.value()),
+                dedup=DedupOptions() if self.dedup_check.isChecked() else None,
+            ),
+            "output": OutputOptions(
+                resize=Resize(width=int(size.split()[1])) if size != "原始尺寸" else None,
+                tile=TileLayout(*map(int, grid.split("×")), timestamps=True) if grid != "不拼图" else None,
+                layout={"每1000帧分目录": OutputLayout(shard=1000),
+                        "按时间命名": OutputLayout(naming="time")}.get(self.layout_box.currentText()),
+            ),
+            "performance": PerformanceOptions(
+                use_gpu=detect_gpu(),
+                parallel=self.parallel_input.value(),
+                auto_tune=TuneOptions() if self.auto_tune_check.isChecked() else None,
+                use_index=True,
+            ),
+            "cache": ResultCache() if self.cache_check.isChecked() else None,
+        }
+
     def start_extraction(self):
-        if self.worker and self.worker.isRunning():
+        if self.is_busy():
             QMessageBox.warning(self, "提示", "正在提取，请等待完成或先终止处理")
             return
 
@@ -419,21 +594,20 @@ class SingleVideoApp(QWidget):
         if start_sec is None:
             return
 
+        try:
+            extra = [parse_output_spec(text) for text in self.extra_outputs_input.text().split(";") if text.strip()]
+        except (argparse.ArgumentTypeError, ValueError) as e:
+            QMessageBox.warning(self, "错误", f"附加输出格式有误：\n{e}")
+            return
+        options = self.extraction_options()
+        unsupported = unsupported_options(**options, resume=self.resume_check.isChecked()) if extra else []
+        if unsupported:
+            QMessageBox.warning(self, "提示", f"附加输出（单次解码多路输出）不支持{'、'.join(unsupported)}，请取消后再试")
+            return
+
         self.toggle_ui_enabled(False)
         self.stop_btn.setEnabled(True)
 
-        mode = self.mode_box.currentText()
-        param = self.param_input.value()
-        fmt = self.format_box.currentText()
-        quality = self.quality_input.value() if fmt.lower() == "jpg" else 0
-        use_gpu = detect_gpu()
-
-        base_output = Path(self.output_input.text())
-        video_name = Path(self.file_input.text()).stem
-        timestamp = datetime.datetime.now().strftime("%Y年%m月%d日%H时%M分%S秒")
-        output_dir = base_output / f"{video_name}_帧提取_{timestamp}"
-        output_dir.mkdir(parents=True, exist_ok=True)
-
         video_info = getattr(self, "current_video_info", None)
         if video_info is None or video_info.get("duration", 0) <= 0:
             video_info = {
@@ -442,18 +616,33 @@ class SingleVideoApp(QWidget):
                 "total_frames": int(self.info_frames.text()) if str(self.info_frames.text()).isdigit() else 0
             }
 
-        self.worker = FFmpegWorker(
-            video_path=str(self.file_input.text()),
-            output_dir=output_dir,
-            start_sec=start_sec,
-            end_sec=end_sec,
-            mode=mode,
-            param=param,
-            fmt=fmt,
-            quality=quality,
-            video_info=video_info,
-            use_gpu=use_gpu
-        )
+        base_output = Path(self.output_input.text())
+        if extra:
+            # 主输出写在新建的输出目录中，附加输出的相对目录位于其下
+            output_dir = make_output_dir(base_output, Path(self.file_input.text()))
+            output = options["output"]
+            main = OutputSpec(output_dir, options["mode"], options["param"], options["fmt"].lower(),
+                              options["quality"], output.resize, output.tile, output.layout)
+            for spec in extra:
+                if not spec.output_dir.is_absolute():
+                    spec.output_dir = output_dir / spec.output_dir
+            self.worker = MultiWorker(self.file_input.text(), [main, *extra], start_sec, end_sec,
+                                      video_info=video_info, use_gpu=options["performance"].use_gpu, use_index=True)
+        else:
+            self.worker = FFmpegWorker(
+                video_path=str(self.file_input.text()),
+                output_dir=base_output,
+                start_sec=start_sec,
+                end_sec=end_sec,
+                video_info=video_info,
+                resume=self.resume_check.isChecked(),
+                **options
+            )
+            # 续提只选用视频与提取参数都一致的未完成目录，否则新建
+            output_dir = find_resumable_dir(base_output, self.worker.extractor) if self.resume_check.isChecked() \
+                else None
+            self.worker.extractor.output_dir = output_dir or make_output_dir(base_output, Path(self.file_input.text()))
+            self.worker.metrics_signal.connect(self.show_metrics)
 
         self.worker.progress_signal.connect(self.progress_bar.setValue)
         self.worker.status_signal.connect(self.progress_label.setText)
@@ -462,21 +651,136 @@ class SingleVideoApp(QWidget):
         self.progress_bar.setValue(0)
         self.progress_bar.setVisible(True)
         self.progress_label.setText("正在提取...")
+        self.metrics_label.setText("")
+        self.metrics_label.setVisible(True)
         self.worker.start()
 
+    def show_metrics(self, snapshot):
+        """进度条下方显示吞吐：输出帧率、解码速度、写出速度、剩余时间"""
+        parts = [f"{snapshot.fps:.1f} 帧/秒"]
+        if snapshot.speed > 0:
+            parts.append(f"解码 {snapshot.speed:.2f}x")
+        if snapshot.bytes_per_sec > 0:
+            parts.append(f"写出 {snapshot.bytes_per_sec / (1024 * 1024):.1f} MB/s")
+        if snapshot.eta:
+            parts.append(f"剩余约 {format_duration(snapshot.eta)}")
+        self.metrics_label.setText(" · ".join(parts))
+
     def stop_extraction(self):
-        if self.worker and self.worker.isRunning():
-            self.worker.stop()
-            self.progress_label.setText("终止中...")
-            self.progress_bar.setValue(0)
-            # 提取完成后 extraction_finished 会恢复 UI
+        for worker in (self.worker, self.batch_worker):
+            if worker and worker.isRunning():
+                worker.stop()
+                self.progress_label.setText("终止中...")
+                self.progress_bar.setValue(0)
+                # 提取完成后 extraction_finished / batch_finished 会恢复 UI
+
+    def add_batch_files(self):
+        files, _ = QFileDialog.getOpenFileNames(
+            self,
+            "添加视频文件",
+            self.settings.value("last_batch_dir", str(Path.home())),
+            "视频文件 (*.mp4 *.avi *.mov *.mkv)"
+        )
+        if files:
+            self.settings.setValue("last_batch_dir", str(Path(files[0]).parent))
+            self.add_batch_videos(Path(f) for f in files)
+
+    def add_batch_folder(self):
+        dir_path = QFileDialog.getExistingDirectory(self, "添加文件夹中的视频",
+                                                    self.settings.value("last_batch_dir", str(Path.home())))
+        if dir_path:
+            self.settings.setValue("last_batch_dir", dir_path)
+            videos = collect_videos([dir_path])
+            if not videos:
+                QMessageBox.information(self, "提示", "该文件夹中没有视频文件")
+            self.add_batch_videos(videos)
+
+    def add_batch_videos(self, videos):
+        """加入队列（已在队列中的视频忽略）"""
+        queued = {str(v.resolve()) for v in self.batch_videos}
+        for video in videos:
+            if str(video.resolve()) not in queued:
+                queued.add(str(video.resolve()))
+                self.batch_videos.append(video)
+                self.batch_list.addItem(f"{video.name} — 等待中")
+
+    def remove_batch_selected(self):
+        for row in sorted((self.batch_list.row(item) for item in self.batch_list.selectedItems()), reverse=True):
+            self.batch_list.takeItem(row)
+            del self.batch_videos[row]
+
+    def clear_batch(self):
+        self.batch_list.clear()
+        self.batch_videos = []
+
+    def start_batch(self):
+        if self.is_busy():
+            QMessageBox.warning(self, "提示", "正在提取，请等待完成或先终止处理")
+            return
+        if not self.batch_videos:
+            QMessageBox.warning(self, "提示", "批量队列为空，请先添加视频")
+            return
+
+        for row, video in enumerate(self.batch_videos):
+            self.batch_list.item(row).setText(f"{video.name} — 等待中")
+        self.toggle_ui_enabled(False)
+        self.stop_btn.setEnabled(True)
+
+        self.batch_worker = BatchWorker(list(self.batch_videos), Path(self.output_input.text()),
+                                        self.extraction_options())
+        self.batch_worker.progress_signal.connect(self.progress_bar.setValue)
+        self.batch_worker.job_signal.connect(self.update_batch_item)
+        self.batch_worker.finished_signal.connect(self.batch_finished)
+
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        self.progress_label.setText(f"批量提取中...（{len(self.batch_videos)} 个视频）")
+        self.batch_worker.start()
+
+    def update_batch_item(self, job):
+        """队列中显示每个视频的状态"""
+        status = {
+            "pending": "等待中",
+            "running": f"提取中 {job.progress}%",
+            "completed": f"完成（{job.result.get('frames', 0)} 帧）",
+            "error": f"失败：{job.result.get('error', '')}",
+            "stopped": "已终止",
+            "skipped": f"跳过：{job.result.get('error', '')}",
+            "cancelled": "已取消",
+        }.get(job.status, job.status)
+        item = self.batch_list.item(job.index)
+        if item is not None:
+            item.setText(f"{job.video.name} — {status}")
+
+    def batch_finished(self):
+        self.toggle_ui_enabled(True)
+        self.stop_btn.setEnabled(False)
+
+        summary = self.batch_worker.summary or {}
+        counts = summary.get("counts", {})
+        names = {"completed": "完成", "error": "失败", "skipped": "跳过", "stopped": "已终止", "cancelled": "已取消"}
+        details = "，".join(f"{names.get(status, status)} {count}" for status, count in counts.items())
+        if summary.get("status") == "stopped":
+            self.progress_label.setText(f"批量提取已终止（{details}）")
+        else:
+            self.progress_label.setText(f"批量提取结束（{details}）")
+            self.progress_bar.setValue(100)
+            QMessageBox.information(self, "批量提取结束",
+                                    f"共 {summary.get('videos', 0)} 个视频：{details}\n"
+                                    f"提取帧数：{summary.get('frames', 0)}")
+        self.batch_worker = None
 
     def extraction_finished(self):
         self.toggle_ui_enabled(True)
         self.stop_btn.setEnabled(False)
+        self.metrics_label.setVisible(False)
 
-        if self.worker and self.worker._stop:
+        result = self.worker.result if self.worker else None
+        if self.worker and self.worker.stopped:
             self.progress_label.setText("已终止处理")
+        elif result and result["status"] == "error":
+            self.progress_label.setText("提取错误")
+            QMessageBox.critical(self, "错误", f"帧提取失败：\n{result['error']}")
         else:
             self.progress_label.setText("提取完成")
             self.progress_bar.setValue(100)
@@ -488,6 +792,8 @@ class SingleVideoApp(QWidget):
             details = f"视频文件：{video_name}\n输出目录：{output_dir}"
             if frame_count is not None:
                 details += f"\n提取帧数：{frame_count}"
+            if result and "dedup" in result:
+                details += f"\n去除重复帧：{result['dedup']['dropped']}（共抽样 {result['dedup']['sampled']} 帧）"
 
             reply = QMessageBox.question(
                 self,
@@ -527,10 +833,26 @@ class SingleVideoApp(QWidget):
         self.reset_range_btn.setEnabled(enabled)  # 重置按钮也禁用
         self.mode_box.setEnabled(enabled)
         self.param_input.setEnabled(enabled)
+        self.parallel_input.setEnabled(enabled)
+        self.auto_tune_check.setEnabled(enabled)
+        self.scene_min_gap_input.setEnabled(enabled)
+        self.scene_max_gap_input.setEnabled(enabled)
         self.format_box.setEnabled(enabled)
         self.quality_input.setEnabled(enabled)
+        self.size_box.setEnabled(enabled)
+        self.tile_box.setEnabled(enabled)
+        self.layout_box.setEnabled(enabled)
+        self.dedup_check.setEnabled(enabled)
+        self.resume_check.setEnabled(enabled)
+        self.cache_check.setEnabled(enabled)
+        self.extra_outputs_input.setEnabled(enabled)
+        for button in (self.batch_add_btn, self.batch_folder_btn, self.batch_remove_btn, self.batch_clear_btn,
+                       self.batch_start_btn):
+            button.setEnabled(enabled)
 
         # 开始按钮仅在 enabled=True 时可用
         self.start_btn.setEnabled(enabled)
+        if enabled:
+            self.update_probe_controls(loading=self.probe_task is not None)
 
         # stop_btn 不受此影响，保持单独控制
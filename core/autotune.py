@@ -0,0 +1,276 @@
+"""
+线程自动调优：在实际输入的一小段上做几次短时校准，选出 frames/s 最高的 (并行进程数, 每进程线程数)
+- 结果按 主机 + ffmpeg + 编码格式 + 分辨率档位 + 输出格式 + 可用核数 + 提取模式与限制并行的选项 保存，之后同类任务直接使用，不再校准
+- 并行进程数的候选受提取模式限制（只有可按采样点切分的模式才会多段并行）
+python -m core.autotune <视频文件> [-m seconds -n 1 -f png] [--retune]
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, asdict
+from pathlib import Path
+
+from core.segments import Segment, plan_segments
+from core.util import FFMPEG_BIN, file_cache_key, get_cache_dir
+
+PROFILE_VERSION = 3
+PROFILES_NAME = "profiles.json"
+# 校准片段时长（秒）；提取范围短于 MIN_TUNE_SECONDS 时不值得校准，使用默认值
+CALIBRATION_SECONDS = 3.0
+MIN_TUNE_SECONDS = 30.0
+# 分辨率档位（按短边）
+RESOLUTION_CLASSES = ((480, "sd"), (720, "hd"), (1080, "fhd"), (1440, "qhd"))
+
+_lock = threading.Lock()
+
+
+@dataclass
+class TuneOptions:
+    """cores：可用核数，None 为全部；retune：忽略已保存的配置重新校准"""
+    cores: int = None
+    retune: bool = False
+
+
+@dataclass
+class TuneResult:
+    parallel: int
+    threads: int
+    fps: float = 0.0  # 校准时的源视频帧/秒
+    source: str = "default"  # default | profile | calibrated
+    key: str = ""
+
+    def to_dict(self):
+        return asdict(self)
+
+
+def host_id():
+    """主机标识：主机名、架构、核数与 ffmpeg 文件，任何一项变化都视为新的主机"""
+    try:
+        ffmpeg = file_cache_key(FFMPEG_BIN)
+    except OSError:
+        ffmpeg = "none"
+    raw = f"{platform.node()}|{platform.machine()}|{os.cpu_count()}|{ffmpeg}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def resolution_class(width, height):
+    short = min(width, height)
+    if short <= 0:
+        return "unknown"
+    for limit, name in RESOLUTION_CLASSES:
+        if short <= limit:
+            return name
+    return "uhd"
+
+
+def profile_key(extractor, cores):
+    info = extractor.video_info
+    parts = [host_id(), info.get("codec", "") or "unknown",
+             resolution_class(info.get("width", 0), info.get("height", 0)), extractor.fmt, f"c{cores}",
+             extractor.mode]
+    # 🔹 去重、编码线程池 / 打包输出、拼图都把并行限制为 1，这样校准出的配置不能用于不受限制的同类任务，反之亦然
+    if extractor.dedup:
+        parts.append("dedup")
+    if extractor.use_pipeline:
+        parts.append("pipeline")
+    if extractor.tile is not None:
+        parts.append("tile")
+    if extractor.resize is not None:
+        parts.append("scaled")
+    if extractor.hwaccel:
+        parts.append(extractor.hwaccel)
+    return "/".join(parts)
+
+
+def _profiles_path():
+    return get_cache_dir("autotune") / PROFILES_NAME
+
+
+def load_profiles():
+    try:
+        data = json.loads(_profiles_path().read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data.get("profiles", {}) if data.get("version") == PROFILE_VERSION else {}
+
+
+def save_profile(key, result):
+    with _lock:
+        profiles = load_profiles()
+        profiles[key] = {"parallel": result.parallel, "threads": result.threads, "fps": result.fps,
+                         "measured": round(time.time())}
+        path = _profiles_path()
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            tmp.write_text(json.dumps({"version": PROFILE_VERSION, "profiles": profiles}, ensure_ascii=False,
+                                      indent=2), encoding="utf-8")
+            tmp.replace(path)
+        except OSError:
+            pass
+
+
+def max_parallel(extractor, cores, start, end):
+    """该任务最多能切成的段数（受模式、时长与核数限制）"""
+    if extractor.dedup or extractor.use_pipeline or extractor.tile is not None:
+        return 1
+    segments = plan_segments(start, end, extractor.mode, extractor.param,
+                             fps=extractor.video_info.get("fps", 0), count=cores)
+    return max(1, len(segments))
+
+
+def calibration_extractor(extractor, start, seconds, parallel, threads, workdir):
+    """校准用的提取器：与 extractor 的提取参数相同，只解码 [start, start + seconds]"""
+    from core.extractor import FrameExtractor, OutputOptions, PerformanceOptions, SelectionOptions
+
+    # 🔹 profile_key 中的选项（去重、拼图、编码线程池 / 打包输出、缩放）都交给校准用的提取器，测的就是键所描述的负载；
+    # 编码线程池 / 打包输出时 ffmpeg 输出原始帧，与实际提取相同
+    probe = FrameExtractor(
+        extractor.video_path, workdir, start, start + seconds, extractor.mode, extractor.param, extractor.fmt,
+        extractor.quality, video_info=extractor.video_info,
+        selection=SelectionOptions(scene=extractor.scene, dedup=extractor.dedup),
+        output=OutputOptions(container=extractor.container, resize=extractor.resize, tile=extractor.tile),
+        performance=PerformanceOptions(use_gpu=extractor.use_gpu, parallel=parallel, threads=threads,
+                                       encoders=extractor.encoders)
+    )
+    probe._capabilities = extractor.capabilities
+    probe.keyframe_index = extractor.keyframe_index
+    return probe
+
+
+def measure(extractor, start, seconds, parallel, threads, workdir):
+    """同时运行 parallel 个进程（每个 threads 线程）解码同一片段，返回总的源视频帧/秒；失败或被终止时返回 None"""
+    probe = calibration_extractor(extractor, start, seconds, parallel, threads, workdir)
+    commands = []
+    for k in range(parallel):
+        probe.output_dir = Path(workdir) / f"{parallel}x{threads}_{k}"
+        probe.output_dir.mkdir(parents=True, exist_ok=True)
+        commands.append((probe.build_command(Segment(0, start, seconds, 1), raw=probe.use_pipeline),
+                         probe.output_dir))
+
+    creation_flags = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+    started = time.perf_counter()
+    procs = []
+    with extractor._lock:
+        if extractor.stopped:
+            return None
+        for cmd, cwd in commands:
+            proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                    stdin=subprocess.DEVNULL, cwd=cwd, creationflags=creation_flags, shell=False)
+            procs.append(proc)
+            extractor.procs.append(proc)  # 终止提取时一并结束
+    for proc in procs:
+        proc.wait()
+    wall = time.perf_counter() - started
+    with extractor._lock:
+        for proc in procs:
+            extractor.procs.remove(proc)
+    if extractor.stopped or wall <= 0 or any(proc.returncode != 0 for proc in procs):
+        return None
+    fps = extractor.video_info.get("fps", 0) or 25.0
+    return parallel * seconds * fps / wall
+
+
+def candidates(cores, limit):
+    """先按 并行数 翻倍（每进程均分核数）粗选，再由 calibrate 对最优并行数细调线程数"""
+    result = []
+    parallel = 1
+    while parallel <= min(cores, limit):
+        result.append((parallel, max(1, cores // parallel)))
+        parallel *= 2
+    return result
+
+
+def calibrate(extractor, cores, start, end, on_status=None):
+    """在 [start, end] 中间截取一段做校准，返回 TuneResult；校准全部失败时返回 None"""
+    seconds = min(CALIBRATION_SECONDS, end - start)
+    slice_start = start + (end - start - seconds) / 2
+    limit = max_parallel(extractor, cores, start, end)
+    workdir = Path(tempfile.mkdtemp(prefix="vfc_tune_"))
+    try:
+        results = {}
+
+        def run(parallel, threads):
+            if (parallel, threads) in results:
+                return
+            if on_status is not None:
+                on_status(f"自动调优：{parallel} 个进程 × {threads} 线程...")
+            fps = measure(extractor, slice_start, seconds, parallel, threads, workdir)
+            if fps is not None:
+                results[(parallel, threads)] = fps
+
+        options = candidates(cores, limit)
+        measure(extractor, slice_start, seconds, *options[0], workdir)  # 预热：读入文件缓存，不计入结果
+        for parallel, threads in options:
+            run(parallel, threads)
+        if results:
+            best_parallel, best_threads = max(results, key=results.get)
+            # 细调：同样的并行数下试一半与加倍的线程数（超额订阅对某些解码器反而更快）
+            for threads in (max(1, best_threads // 2), best_threads * 2):
+                run(best_parallel, threads)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    if not results or extractor.stopped:
+        return None
+    (parallel, threads), fps = max(results.items(), key=lambda item: item[1])
+    return TuneResult(parallel, threads, round(fps, 1), "calibrated")
+
+
+def autotune(extractor, start, end, cores=None, refresh=False, on_status=None):
+    """
+    为提取器选择并设置 parallel 与 threads：已保存的配置 -> 校准 -> 默认值（不修改）
+    时间点列表只用逐点 seek 引擎（不按 parallel 分段），不调优
+    返回 TuneResult
+    """
+    cores = max(1, cores or os.cpu_count() or 1)
+    if extractor.targets is not None:
+        return TuneResult(extractor.parallel, extractor.threads or 0, source="default")
+    key = profile_key(extractor, cores)
+    result = None
+    profile = None if refresh else load_profiles().get(key)
+    if profile is not None:
+        result = TuneResult(profile["parallel"], profile["threads"], profile.get("fps", 0.0), "profile", key)
+    elif end - start >= MIN_TUNE_SECONDS:
+        result = calibrate(extractor, cores, start, end, on_status)
+        if result is not None:
+            result.key = key
+            save_profile(key, result)
+    if result is None:
+        return TuneResult(extractor.parallel, extractor.threads or 0, source="default", key=key)
+    extractor.parallel = max(1, min(result.parallel, max_parallel(extractor, cores, start, end)))
+    extractor.threads = result.threads
+    return result
+
+
+def main(argv=None):
+    from core.cli import parse_mode
+    from core.extractor import FrameExtractor
+    from core.probe import probe_video
+
+    parser = argparse.ArgumentParser(prog="python -m core.autotune", description="校准并保存线程配置")
+    parser.add_argument("video", type=Path, help="视频文件")
+    parser.add_argument("-m", "--mode", type=parse_mode, default="每N秒取1帧", help="提取模式")
+    parser.add_argument("-n", "--param", type=int, default=1, help="参数 N")
+    parser.add_argument("-f", "--format", default="png", type=str.lower, help="图片格式")
+    parser.add_argument("--cores", type=int, default=None, help="可用核数，默认全部")
+    parser.add_argument("--retune", action="store_true", help="忽略已保存的配置重新校准")
+    args = parser.parse_args(argv)
+
+    info = probe_video(args.video)
+    extractor = FrameExtractor(args.video, args.video.parent, 0, info.duration, args.mode, args.param, args.format,
+                               85, video_info=info)
+    result = autotune(extractor, 0, info.duration, args.cores, args.retune,
+                      on_status=lambda s: print(s, file=sys.stderr, flush=True))
+    print(json.dumps(result.to_dict(), ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,312 @@
+"""
+批量提取：python -m core.batch <文件夹 | 通配符 | 列表文件 ...> [选项]
+多个视频排队，由有上限的工作池并发调度，总 ffmpeg 进程数按 CPU 核数与可用内存确定
+"""
+import argparse
+import copy
+import glob
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+
+from core.cli import add_extraction_arguments, extraction_options, validate_range
+from core.extractor import FrameExtractor, PerformanceOptions
+from core.probe import probe_video
+from core.util import make_output_dir, missing_ffmpeg_message
+
+VIDEO_EXTENSIONS = {".mp4", ".avi", ".mov", ".mkv"}
+# 估算的单个 ffmpeg 进程内存占用（MB），用于按内存限制并发数
+MEMORY_PER_PROCESS_MB = 512
+
+
+def collect_videos(sources, recursive=False):
+    """
+    展开输入源：
+    - 文件夹：其中的视频文件（recursive=True 时包括子目录）
+    - 通配符：如 /data/*.mp4
+    - 列表文件（.txt / .lst）：每行一个视频路径，# 开头为注释
+    - 其他：视为单个视频文件
+    结果去重并保持顺序
+    """
+    videos = []
+    for source in sources:
+        path = Path(source)
+        if path.is_dir():
+            pattern = "**/*" if recursive else "*"
+            videos += sorted(p for p in path.glob(pattern) if p.suffix.lower() in VIDEO_EXTENSIONS and p.is_file())
+        elif path.is_file() and path.suffix.lower() in (".txt", ".lst"):
+            for line in path.read_text(encoding="utf-8").splitlines():
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    videos.append(Path(line))
+        elif glob.has_magic(str(source)):
+            videos += sorted(Path(p) for p in glob.glob(str(source), recursive=True) if Path(p).is_file())
+        else:
+            videos.append(path)
+
+    seen, unique = set(), []
+    for video in videos:
+        key = str(video.resolve())
+        if key not in seen:
+            seen.add(key)
+            unique.append(video)
+    return unique
+
+
+def available_memory_mb():
+    """可用物理内存（MB），无法获取时返回 None"""
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // (1024 * 1024)
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def default_max_processes():
+    """并发 ffmpeg 进程上限：不超过 CPU 核数，也不超过 可用内存 / 单进程估算内存"""
+    limit = os.cpu_count() or 1
+    memory = available_memory_mb()
+    if memory is not None:
+        limit = min(limit, max(1, memory // MEMORY_PER_PROCESS_MB))
+    return max(1, limit)
+
+
+@dataclass
+class BatchJob:
+    index: int
+    video: Path
+    status: str = "pending"  # pending | running | completed | error | stopped | skipped | cancelled（终止时尚未开始）
+    attempts: int = 0
+    progress: int = 0
+    duration: float = 0.0
+    result: dict = field(default_factory=dict)
+
+
+class BatchRunner:
+    """
+    批量任务调度：
+    - 同时运行的视频数 = max_processes // 每个视频的并行进程数（至少 1）
+    - 失败的任务最多重试 retries 次，每次使用全新的输出目录
+    - 每次提取使用 options 的深拷贝，缓存、缩放、拼图等参数对象不在任务之间共用
+    - 终止时正在运行的任务为 stopped，尚未开始的任务为 cancelled
+    - 回调：on_job_progress(job)、on_progress(总体百分比)、on_job_done(job)
+    """
+
+    def __init__(self, videos, output_base, options, start_sec=0.0, end_sec=None, max_processes=None, retries=1,
+                 on_job_progress=None, on_progress=None, on_job_done=None):
+        self.jobs = [BatchJob(i, Path(v)) for i, v in enumerate(videos)]
+        self.output_base = Path(output_base) if output_base else None
+        self.options = dict(options)
+        self.start_sec = start_sec
+        self.end_sec = end_sec
+        self.max_processes = max_processes or default_max_processes()
+        self.retries = max(0, retries)
+        self.on_job_progress = on_job_progress
+        self.on_progress = on_progress
+        self.on_job_done = on_job_done
+        self._stop = False
+        self._lock = threading.Lock()
+        self._extractors = {}
+
+        # 每个视频的并行进程数不超过总上限；同时运行的视频数由剩余额度决定
+        performance = self.options.get("performance") or PerformanceOptions()
+        parallel = max(1, min(performance.parallel, self.max_processes))
+        performance = replace(performance, parallel=parallel)
+        self.workers = max(1, self.max_processes // parallel)
+        if performance.auto_tune is not None:
+            # 自动调优时每个视频按分到的核数校准，同类视频共用保存的配置
+            performance.auto_tune = replace(performance.auto_tune, cores=max(1, (os.cpu_count() or 1) // self.workers))
+        elif not performance.threads and self.workers * parallel > 1:
+            # 多个视频同时提取时按进程总数均分 CPU，避免每个 ffmpeg 都按全部核数开线程
+            performance.threads = max(1, (os.cpu_count() or 1) // (self.workers * parallel))
+        self.options["performance"] = performance
+
+    def overall_progress(self):
+        """按视频时长加权的总体进度（时长未知的视频按平均时长计）"""
+        known = [j.duration for j in self.jobs if j.duration > 0]
+        default = sum(known) / len(known) if known else 1.0
+        total = done = 0.0
+        for job in self.jobs:
+            weight = job.duration if job.duration > 0 else default
+            total += weight
+            done += weight * (100 if job.status in ("completed", "error", "skipped") else job.progress) / 100
+        return int(done / total * 100) if total else 100
+
+    def _report(self, job):
+        if self.on_job_progress is not None:
+            self.on_job_progress(job)
+        if self.on_progress is not None:
+            self.on_progress(self.overall_progress())
+
+    def _cancel(self, job):
+        job.status, job.result = "cancelled", {"status": "cancelled", "video": str(job.video)}
+        self._report(job)
+        if self.on_job_done is not None:
+            self.on_job_done(job)
+        return job
+
+    def _run_job(self, job):
+        if self._stop:
+            return self._cancel(job)
+
+        job.status = "running"
+        info, error = None, None
+        if not job.video.is_file():
+            error = "视频文件不存在"
+        else:
+            try:
+                info = probe_video(job.video)
+            except Exception as e:
+                error = f"无法读取视频信息：{e}"
+        if info is not None:
+            job.duration = info.duration
+            end = job.duration if self.end_sec is None else min(self.end_sec, job.duration)
+            error = validate_range(job.duration, self.start_sec, end, self.options["mode"], self.options["param"])
+        if error:
+            job.status, job.result = "skipped", {"status": "skipped", "video": str(job.video), "error": error}
+            self._report(job)
+            return job
+
+        output_dir = None
+        while job.attempts <= self.retries and not self._stop:
+            job.attempts += 1
+            job.progress = 0
+            if output_dir is not None:
+                shutil.rmtree(output_dir, ignore_errors=True)  # 重试前清掉上次的残留输出
+            output_dir = make_output_dir(self.output_base or job.video.parent, job.video)
+
+            def on_progress(progress, job=job):
+                job.progress = progress
+                self._report(job)
+
+            extractor = FrameExtractor(
+                video_path=job.video,
+                output_dir=output_dir,
+                start_sec=self.start_sec,
+                end_sec=end,
+                video_info=info,
+                on_progress=on_progress,
+                **copy.deepcopy(self.options)
+            )
+            with self._lock:
+                self._extractors[job.index] = extractor
+            job.result = extractor.run()
+            with self._lock:
+                self._extractors.pop(job.index, None)
+
+            job.status = job.result["status"]
+            if job.status != "error":
+                break
+
+        if job.attempts == 0:
+            return self._cancel(job)  # 探测期间被终止
+        job.result["attempts"] = job.attempts
+        self._report(job)
+        if self.on_job_done is not None:
+            self.on_job_done(job)
+        return job
+
+    def run(self):
+        """阻塞执行全部任务，返回汇总报告"""
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            list(pool.map(self._run_job, self.jobs))
+        return self.summary(time.monotonic() - started)
+
+    def stop(self):
+        self._stop = True
+        with self._lock:
+            extractors = list(self._extractors.values())
+        for extractor in extractors:
+            extractor.stop()
+
+    def summary(self, elapsed=0.0):
+        counts = {}
+        for job in self.jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "status": "stopped" if self._stop else ("completed" if counts.get("error", 0) == 0 else "error"),
+            "videos": len(self.jobs),
+            "counts": counts,
+            "frames": sum(job.result.get("frames", 0) or 0 for job in self.jobs),
+            "retried": sum(1 for job in self.jobs if job.attempts > 1),
+            "max_processes": self.max_processes,
+            "workers": self.workers,
+            "elapsed": round(elapsed, 3),
+            "jobs": [job.result or {"status": job.status, "video": str(job.video)} for job in self.jobs],
+        }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m core.batch", description="批量视频帧提取")
+    parser.add_argument("sources", nargs="+", help="视频文件、文件夹、通配符（如 'data/*.mp4'）或列表文件（.txt）")
+    parser.add_argument("-o", "--output", type=Path, help="输出路径，默认各视频所在目录")
+    parser.add_argument("-r", "--recursive", action="store_true", help="文件夹递归查找视频")
+    parser.add_argument("-P", "--max-processes", type=int, default=None,
+                        help="同时运行的 ffmpeg 进程总数上限，默认按 CPU 核数与可用内存计算")
+    parser.add_argument("--retries", type=int, default=1, help="失败任务的重试次数")
+    parser.add_argument("--report", type=Path, help="把汇总报告另存为 JSON 文件")
+    add_extraction_arguments(parser)
+    # 批量处理时默认每个视频单进程，靠多视频并发占满 CPU
+    parser.set_defaults(parallel=1)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    missing = missing_ffmpeg_message()
+    if missing:
+        print(json.dumps({"status": "error", "error": missing}, ensure_ascii=False))
+        return 2
+
+    videos = collect_videos(args.sources, recursive=args.recursive)
+    if not videos:
+        print(json.dumps({"status": "error", "error": "没有找到视频文件"}, ensure_ascii=False))
+        return 2
+
+    def on_progress(progress):
+        if args.progress:
+            print(json.dumps({"progress": progress}), file=sys.stderr, flush=True)
+
+    def on_job_done(job):
+        if args.progress:
+            print(json.dumps({"video": str(job.video), "status": job.status, "attempts": job.attempts},
+                             ensure_ascii=False), file=sys.stderr, flush=True)
+
+    runner = BatchRunner(
+        videos,
+        args.output,
+        extraction_options(args),
+        start_sec=args.start,
+        end_sec=args.end,
+        max_processes=args.max_processes,
+        retries=args.retries,
+        on_progress=on_progress,
+        on_job_done=on_job_done,
+    )
+
+    # 调度放在子线程，主线程负责响应 Ctrl+C
+    summary = {}
+    thread = threading.Thread(target=lambda: summary.update(runner.run()), daemon=True)
+    thread.start()
+    try:
+        while thread.is_alive():
+            thread.join(0.2)
+    except KeyboardInterrupt:
+        runner.stop()
+        thread.join()
+
+    text = json.dumps(summary, ensure_ascii=False, indent=args.indent)
+    if args.report:
+        args.report.write_text(text, encoding="utf-8")
+    print(text)
+    return {"completed": 0, "stopped": 130}.get(summary.get("status"), 1)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,375 @@
+"""
+性能基准：用 ffmpeg 的 lavfi 测试源在本地生成确定性的合成视频，按矩阵跑提取并输出 JSON
+python -m core.bench [--quick] [-k 过滤] [--repeat N] [-o 结果.json] [--baseline 基准.json] [--threshold 0.1]
+
+引擎对比（comparisons）：长视频稀疏采样分别用 逐点 seek 与 连续解码 跑同一任务，报告耗时比与两者帧清单是否一致
+
+每个用例在独立的子进程中运行，CPU 时间与峰值内存只统计该用例（Windows 下无 resource 模块，这两项为 null）
+与基准比较时，frames/s 下降或 耗时 / CPU / 内存 上升超过阈值即视为退化，退出码为 1
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, asdict
+from pathlib import Path
+
+from core.util import FFMPEG_BIN, get_cache_dir
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BENCH_VERSION = 1
+
+# 编码器名 -> ffmpeg 编码参数；testsrc2 画面带运动与计数器，编码结果可复现
+CODECS = {
+    "h264": ["-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p"],
+    "hevc": ["-c:v", "libx265", "-preset", "veryfast", "-pix_fmt", "yuv420p", "-x265-params", "log-level=error"],
+    "mpeg4": ["-c:v", "mpeg4", "-q:v", "4", "-pix_fmt", "yuv420p"],
+}
+
+
+@dataclass
+class VideoSpec:
+    width: int
+    height: int
+    codec: str = "h264"
+    gop: int = 250
+    duration: int = 30
+    fps: int = 25
+
+    @property
+    def name(self):
+        return f"{self.width}x{self.height}_{self.codec}_g{self.gop}_{self.duration}s"
+
+
+@dataclass
+class CaseSpec:
+    mode: str
+    param: int
+    fmt: str = "png"
+    quality: int = 0
+    parallel: int = 1
+    engine: str = "auto"
+    encoders: int = 0
+    width: int = 0  # 缩放输出的宽度，0 为原始分辨率
+
+    @property
+    def name(self):
+        name = f"{self.mode}{self.param}_{self.fmt}"
+        if self.quality:
+            name += f"q{self.quality}"
+        name += f"_j{self.parallel}_{self.engine}"
+        if self.encoders:
+            name += f"_e{self.encoders}"
+        if self.width:
+            name += f"_w{self.width}"
+        return name
+
+
+QUICK_VIDEOS = [
+    VideoSpec(640, 360, "h264", gop=50, duration=10),
+]
+FULL_VIDEOS = [
+    VideoSpec(640, 360, "h264", gop=50, duration=30),
+    VideoSpec(1280, 720, "h264", gop=250, duration=30),
+    VideoSpec(1920, 1080, "h264", gop=250, duration=60),
+    VideoSpec(1920, 1080, "h264", gop=12, duration=60),
+    VideoSpec(1920, 1080, "hevc", gop=250, duration=30),
+    VideoSpec(1280, 720, "mpeg4", gop=12, duration=30),
+]
+QUICK_CASES = [
+    CaseSpec("每N秒取1帧", 1),
+    CaseSpec("每N帧取1帧", 10, "jpg", 85),
+]
+FULL_CASES = [
+    CaseSpec("每N秒取1帧", 1),
+    CaseSpec("每N秒取1帧", 1, "jpg", 85),
+    CaseSpec("每N秒取1帧", 1, parallel=4),
+    CaseSpec("每N秒取1帧", 10, engine="seek", parallel=4),
+    CaseSpec("每N帧取1帧", 5, "jpg", 85),
+    CaseSpec("每N帧取1帧", 5, "jpg", 85, width=320),
+    CaseSpec("每N帧取1帧", 1, "png", encoders=4),
+    CaseSpec("每N帧取1帧", 1, "webp", 80, encoders=4),
+    CaseSpec("仅关键帧", 0, "jpg", 85),
+    CaseSpec("场景变化", 30, "jpg", 85),
+]
+
+# 引擎对比：长视频上的稀疏采样，同一用例分别以 seek 与 continuous 引擎运行
+QUICK_COMPARISONS = [
+    (VideoSpec(640, 360, "h264", gop=50, duration=120), CaseSpec("每N秒取1帧", 20, "jpg", 85)),
+]
+FULL_COMPARISONS = [
+    (VideoSpec(1280, 720, "h264", gop=250, duration=1200), CaseSpec("每N秒取1帧", 60, "jpg", 85)),
+    (VideoSpec(1920, 1080, "h264", gop=50, duration=600), CaseSpec("每N秒取1帧", 30, "jpg", 85)),
+]
+
+# 指标 -> 越大越好(True) / 越小越好(False)
+METRICS = {
+    "fps": True,
+    "wall": False,
+    "cpu": False,
+    "peak_rss_mb": False,
+}
+
+
+def generate_video(spec: VideoSpec, cache=True) -> Path:
+    """生成（或复用缓存的）合成视频"""
+    path = get_cache_dir("bench") / f"{spec.name}.mp4"
+    if cache and path.is_file():
+        return path
+    tmp = path.with_suffix(".tmp.mp4")
+    cmd = [
+        str(FFMPEG_BIN), "-hide_banner", "-loglevel", "error", "-y",
+        "-f", "lavfi", "-i", f"testsrc2=size={spec.width}x{spec.height}:rate={spec.fps}:duration={spec.duration}",
+        *CODECS[spec.codec],
+        "-g", str(spec.gop), "-keyint_min", str(spec.gop), "-sc_threshold", "0",
+        "-bitexact", "-threads", "1",  # 单线程 + bitexact，同一 ffmpeg 版本生成的文件逐字节一致
+        str(tmp)
+    ]
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, errors="ignore")
+    if result.returncode != 0:
+        tmp.unlink(missing_ok=True)
+        raise RuntimeError(result.stderr.strip() or f"无法生成测试视频：{spec.name}")
+    tmp.replace(path)
+    return path
+
+
+def directory_bytes(path: Path) -> int:
+    total = 0
+    for entry in os.scandir(path):
+        if entry.is_file(follow_symlinks=False):
+            total += entry.stat().st_size
+        elif entry.is_dir(follow_symlinks=False):
+            total += directory_bytes(Path(entry.path))
+    return total
+
+
+def manifest_digest(output_dir: Path):
+    """帧清单中 (输出序号, 源视频帧号, 时间) 的摘要，用于比较不同引擎取到的帧是否相同；没有清单时为 None"""
+    from core.manifest import FrameManifest
+
+    try:
+        rows = FrameManifest.load(output_dir).rows
+    except (OSError, ValueError, KeyError):
+        return None
+    text = "\n".join(f"{number},{index},{pts:.6f}" for number, index, pts, _, _ in rows)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def compare_engines(video: Path, case: CaseSpec, repeat=1) -> dict:
+    """同一稀疏用例分别以 seek 与 continuous 引擎运行，返回两者的测量值、耗时比与帧清单是否一致"""
+    runs = {}
+    for engine in ("seek", "continuous"):
+        spec = CaseSpec(**{**asdict(case), "engine": engine})
+        runs[engine] = aggregate([run_case_isolated(video, spec) for _ in range(max(1, repeat))])
+    seek, continuous = runs["seek"], runs["continuous"]
+    ok = seek.get("status") == continuous.get("status") == "completed"
+    return {
+        "status": "completed" if ok else "error",
+        "seek": seek,
+        "continuous": continuous,
+        # 连续解码耗时 / seek 耗时，即 seek 引擎的加速比
+        "speedup": round(continuous["wall"] / seek["wall"], 2) if ok and seek["wall"] else None,
+        "identical": ok and seek.get("manifest") is not None and seek.get("manifest") == continuous.get("manifest"),
+    }
+
+
+def run_case(video: Path, case: CaseSpec) -> dict:
+    """在当前进程中跑一个用例（由子进程调用），返回原始测量值"""
+    from core.extractor import FrameExtractor, OutputOptions, PerformanceOptions
+    from core.probe import probe_video
+    from core.resize import Resize
+
+    info = probe_video(video)
+    output_dir = Path(tempfile.mkdtemp(prefix="vfc_bench_"))
+    try:
+        extractor = FrameExtractor(
+            video_path=video,
+            output_dir=output_dir,
+            start_sec=0,
+            end_sec=info.duration,
+            mode=case.mode,
+            param=case.param,
+            fmt=case.fmt,
+            quality=case.quality,
+            video_info=info,
+            output=OutputOptions(resize=Resize(case.width) if case.width else None),
+            performance=PerformanceOptions(parallel=case.parallel, engine=case.engine, encoders=case.encoders,
+                                           use_index=True),
+        )
+        cpu_before = os.times()
+        started = time.perf_counter()
+        result = extractor.run()
+        wall = time.perf_counter() - started
+        cpu_after = os.times()
+        bytes_written = directory_bytes(output_dir)
+        digest = manifest_digest(output_dir)
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    measured = {
+        "status": result["status"],
+        "error": result["error"],
+        "engine": result["engine"],
+        "frames": result["frames"],
+        "wall": round(wall, 4),
+        "fps": round(result["frames"] / wall, 2) if wall > 0 else 0.0,
+        "bytes": bytes_written,
+        "manifest": digest,
+        # os.times 的 children_* 包含已结束的 ffmpeg 子进程
+        "cpu": round(sum(cpu_after[:4]) - sum(cpu_before[:4]), 3),
+        "peak_rss_mb": None,
+    }
+    if resource is not None:
+        # ru_maxrss：Linux 为 KB，macOS 为字节；子进程中取 ffmpeg 与 Python 自身的较大值
+        scale = 1 / (1024 * 1024) if sys.platform == "darwin" else 1 / 1024
+        peak = max(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+                   resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+        measured["peak_rss_mb"] = round(peak * scale, 1)
+    return measured
+
+
+def run_case_isolated(video: Path, case: CaseSpec) -> dict:
+    """在新的 Python 进程中跑一个用例，使 CPU 与峰值内存统计互不干扰"""
+    cmd = [sys.executable, "-m", "core.bench", "--run-case", json.dumps({"video": str(video), "case": asdict(case)})]
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding="utf-8",
+                            errors="ignore", cwd=Path(__file__).parent.parent)
+    if result.returncode != 0:
+        return {"status": "error", "error": result.stderr.strip()[-500:]}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def aggregate(runs):
+    """多次重复取中位数（frames / bytes 取第一次）"""
+    ok = [r for r in runs if r.get("status") == "completed"]
+    if not ok:
+        return runs[-1]
+    merged = dict(ok[0])
+    for key in ("wall", "fps", "cpu", "peak_rss_mb"):
+        values = [r[key] for r in ok if r.get(key) is not None]
+        merged[key] = round(statistics.median(values), 4) if values else None
+    merged["repeat"] = len(ok)
+    return merged
+
+
+def compare(results, baseline, threshold):
+    """返回退化列表：[{case, metric, baseline, current, change}, ...]"""
+    regressions = []
+    previous = {c["id"]: c for c in baseline.get("cases", [])}
+    for case in results["cases"]:
+        base = previous.get(case["id"])
+        if base is None or case.get("status") != "completed" or base.get("status") != "completed":
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old, new = base.get(metric), case.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (higher_is_better and change < -threshold) or (not higher_is_better and change > threshold):
+                regressions.append({"case": case["id"], "metric": metric, "baseline": old, "current": new,
+                                    "change": round(change, 4)})
+    return regressions
+
+
+def environment():
+    try:
+        version = subprocess.run([str(FFMPEG_BIN), "-version"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                 text=True, errors="ignore").stdout.splitlines()[0]
+    except (OSError, IndexError):
+        version = ""
+    return {
+        "ffmpeg": version,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m core.bench", description="帧提取性能基准")
+    parser.add_argument("--quick", action="store_true", help="只跑小矩阵（冒烟测试）")
+    parser.add_argument("-k", "--filter", action="append", default=[], help="只跑 id 中包含该字符串的用例，可重复")
+    parser.add_argument("--repeat", type=int, default=1, help="每个用例重复次数，结果取中位数")
+    parser.add_argument("-o", "--output", type=Path, help="把结果另存为 JSON 文件（可作为之后的基准）")
+    parser.add_argument("--baseline", type=Path, help="与该基准结果比较，有指标退化时退出码为 1")
+    parser.add_argument("--threshold", type=float, default=0.10, help="退化阈值（相对变化），默认 0.10")
+    parser.add_argument("--regenerate", action="store_true", help="重新生成测试视频而不使用缓存")
+    parser.add_argument("--indent", type=int, default=2, help="结果 JSON 的缩进")
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.run_case:
+        spec = json.loads(args.run_case)
+        print(json.dumps(run_case(Path(spec["video"]), CaseSpec(**spec["case"])), ensure_ascii=False))
+        return 0
+
+    videos = QUICK_VIDEOS if args.quick else FULL_VIDEOS
+    cases = QUICK_CASES if args.quick else FULL_CASES
+    results = {"version": BENCH_VERSION, "environment": environment(), "cases": [], "comparisons": []}
+
+    for video_spec in videos:
+        selected = [c for c in cases
+                    if not args.filter or any(f in f"{video_spec.name}/{c.name}" for f in args.filter)]
+        if not selected:
+            continue
+        try:
+            video = generate_video(video_spec, cache=not args.regenerate)
+        except (RuntimeError, OSError) as e:
+            for case in selected:
+                results["cases"].append({"id": f"{video_spec.name}/{case.name}", "status": "skipped",
+                                         "error": str(e)[-500:]})
+            continue
+        for case in selected:
+            case_id = f"{video_spec.name}/{case.name}"
+            print(f"[bench] {case_id}", file=sys.stderr, flush=True)
+            measured = aggregate([run_case_isolated(video, case) for _ in range(max(1, args.repeat))])
+            results["cases"].append({"id": case_id, "video": asdict(video_spec), "case": asdict(case), **measured})
+
+    for video_spec, case in QUICK_COMPARISONS if args.quick else FULL_COMPARISONS:
+        case_id = f"{video_spec.name}/{case.name}"
+        if args.filter and not any(f in case_id for f in args.filter):
+            continue
+        try:
+            video = generate_video(video_spec, cache=not args.regenerate)
+        except (RuntimeError, OSError) as e:
+            results["comparisons"].append({"id": case_id, "status": "skipped", "error": str(e)[-500:]})
+            continue
+        print(f"[bench] {case_id} seek vs continuous", file=sys.stderr, flush=True)
+        results["comparisons"].append({"id": case_id, "video": asdict(video_spec), "case": asdict(case),
+                                       **compare_engines(video, case, args.repeat)})
+
+    exit_code = 0
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        results["regressions"] = compare(results, baseline, args.threshold)
+        results["threshold"] = args.threshold
+        if results["regressions"]:
+            exit_code = 1
+    if any(c.get("status") == "error" for c in results["cases"]):
+        exit_code = 1
+    if any(c.get("status") == "error" or c.get("identical") is False for c in results["comparisons"]):
+        exit_code = 1  # 两种引擎取到的帧不同也视为失败
+
+    text = json.dumps(results, ensure_ascii=False, indent=args.indent)
+    if args.output:
+        args.output.write_text(text, encoding="utf-8")
+    print(text)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
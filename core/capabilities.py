@@ -0,0 +1,220 @@
+"""
+ffmpeg 能力表：版本、硬件加速、解码器、编码器、滤镜与命令行选项，按 ffmpeg 可执行文件探测一次并缓存到磁盘
+- 硬件加速除了要在 -hwaccels 中列出，还要能在本机实际初始化设备才算可用（纯 CPU 的 Linux 上为空）
+- 提取引擎据此选择解码方式（硬件加速 / 更快的软件解码器 / 解码与滤镜线程数）与图片编码器
+python -m core.capabilities [--refresh]
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+
+from core.util import FFMPEG_BIN, get_cache_dir, file_cache_key
+
+CAPABILITIES_VERSION = 2
+# 可用时优先使用的硬件加速（按优先级）
+HWACCEL_PREFERENCE = ("cuda", "videotoolbox", "qsv", "d3d11va", "vaapi")
+# 比默认解码器更快的软件解码器（源编码 -> 候选，按优先级）
+PREFERRED_DECODERS = {"av1": ("libdav1d",)}
+# 图片格式 -> 编码器（按优先级）
+IMAGE_ENCODERS = {"png": ("png",), "jpg": ("mjpeg",), "webp": ("libwebp",)}
+# 需要知道支持哪些选项的滤镜（不同 ffmpeg 版本的选项不同）
+PROBED_FILTERS = ("showinfo",)
+
+_CODEC_LINE = re.compile(r"^\s*[VASD][.A-Z]{5}\s+([\w-]+)\s")
+_FILTER_LINE = re.compile(r"^\s*[.A-Z|]{2,3}\s+([\w-]+)\s+\S*->\S*")
+_OPTION_LINE = re.compile(r"^-(\w+)")
+_FILTER_OPTION_LINE = re.compile(r"^\s+(\w+)\s+<\w+>")
+
+
+@dataclass
+class FFmpegCapabilities:
+    binary: str = ""
+    version: str = ""
+    hwaccels: list = field(default_factory=list)  # 编译支持的硬件加速
+    usable_hwaccels: list = field(default_factory=list)  # 本机能初始化设备的硬件加速
+    decoders: list = field(default_factory=list)
+    encoders: list = field(default_factory=list)
+    filters: list = field(default_factory=list)
+    options: list = field(default_factory=list)  # 全局 / 高级命令行选项名
+    filter_options: dict = field(default_factory=dict)  # 滤镜名 -> 选项名（仅 PROBED_FILTERS）
+
+    def has_decoder(self, name):
+        return name in self.decoders
+
+    def has_encoder(self, name):
+        return name in self.encoders
+
+    def has_filter(self, name):
+        return name in self.filters
+
+    def has_filter_option(self, name, option):
+        return option in self.filter_options.get(name, ())
+
+    def best_hwaccel(self):
+        for name in HWACCEL_PREFERENCE:
+            if name in self.usable_hwaccels:
+                return name
+        return None
+
+    def decoder_for(self, codec):
+        """codec 有更快的软件解码器时返回其名字，否则 None（使用 ffmpeg 默认解码器）"""
+        for name in PREFERRED_DECODERS.get(codec, ()):
+            if name in self.decoders:
+                return name
+        return None
+
+    def encoder_for(self, fmt):
+        """图片格式对应的可用编码器，不支持时返回 None；能力表为空（探测失败）时按默认编码器处理"""
+        candidates = IMAGE_ENCODERS.get(fmt, ())
+        if not self.encoders:
+            return candidates[0] if candidates else None
+        for name in candidates:
+            if name in self.encoders:
+                return name
+        return None
+
+    def thread_args(self, processes=1, threads=None):
+        """
+        (输入参数, 全局参数)：解码线程与滤镜线程
+        threads 未指定时：单个进程交给 ffmpeg 自动选择；多个进程同时运行时按 CPU 核数均分，避免线程过度订阅
+        """
+        if not threads:
+            if processes <= 1:
+                return [], []
+            threads = max(1, (os.cpu_count() or 1) // processes)
+        global_args = []
+        for option in ("filter_threads", "filter_complex_threads"):
+            if option in self.options:
+                global_args += [f"-{option}", str(threads)]
+        return ["-threads", str(threads)], global_args
+
+    def to_dict(self):
+        return asdict(self)
+
+
+def _run(args, timeout=30):
+    creation_flags = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+    try:
+        result = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, stdin=subprocess.DEVNULL,
+                                text=True, encoding="utf-8", errors="ignore", timeout=timeout,
+                                creationflags=creation_flags)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return result
+
+
+def _names(text, pattern):
+    names = []
+    for line in (text or "").splitlines():
+        match = pattern.match(line)
+        if match:
+            names.append(match.group(1))
+    return names
+
+
+def hwaccel_usable(ffmpeg, name):
+    """实际初始化一次硬件设备并处理一帧，确认驱动与设备存在"""
+    result = _run([str(ffmpeg), "-hide_banner", "-loglevel", "error", "-init_hw_device", name,
+                   "-f", "lavfi", "-i", "nullsrc=s=64x64:d=0.1", "-frames:v", "1", "-f", "null", "-"], timeout=15)
+    return result is not None and result.returncode == 0
+
+
+def probe_capabilities(ffmpeg=FFMPEG_BIN):
+    """执行 ffmpeg 探测能力表；可执行文件不可用时返回空表"""
+    caps = FFmpegCapabilities(binary=str(ffmpeg))
+    version = _run([str(ffmpeg), "-hide_banner", "-version"])
+    if version is None or version.returncode != 0:
+        return caps
+    first = version.stdout.split("\n", 1)[0].split()
+    caps.version = first[2] if len(first) > 2 else ""
+
+    hwaccels = _run([str(ffmpeg), "-hide_banner", "-hwaccels"])
+    if hwaccels is not None:
+        caps.hwaccels = [line.strip() for line in hwaccels.stdout.splitlines()[1:] if line.strip()]
+    for attr, option, pattern in (("decoders", "-decoders", _CODEC_LINE), ("encoders", "-encoders", _CODEC_LINE),
+                                  ("filters", "-filters", _FILTER_LINE), ("options", "-h", _OPTION_LINE)):
+        args = [str(ffmpeg), "-hide_banner", option] + (["long"] if option == "-h" else [])
+        result = _run(args)
+        if result is not None:
+            setattr(caps, attr, _names(result.stdout, pattern))
+    for name in PROBED_FILTERS:
+        result = _run([str(ffmpeg), "-hide_banner", "-h", f"filter={name}"])
+        if result is not None:
+            caps.filter_options[name] = _names(result.stdout, _FILTER_OPTION_LINE)
+    caps.usable_hwaccels = [name for name in HWACCEL_PREFERENCE
+                            if name in caps.hwaccels and hwaccel_usable(ffmpeg, name)]
+    return caps
+
+
+_memory_cache = {}
+_memory_lock = threading.Lock()
+
+
+def get_capabilities(ffmpeg=FFMPEG_BIN, refresh=False):
+    """
+    能力表：内存缓存 -> 磁盘缓存 -> 探测
+    磁盘缓存按 ffmpeg 可执行文件的 路径 + 大小 + 修改时间 区分，替换 ffmpeg 后自动重新探测
+    """
+    ffmpeg = Path(ffmpeg)
+    try:
+        key = file_cache_key(ffmpeg)
+    except OSError:
+        return FFmpegCapabilities(binary=str(ffmpeg))  # 不缓存，ffmpeg 放好后下次重新探测
+
+    with _memory_lock:
+        if not refresh and key in _memory_cache:
+            return _memory_cache[key]
+
+        cache_file = None
+        caps = None
+        try:
+            cache_file = get_cache_dir("capabilities") / f"{key}.json"
+            if not refresh and cache_file.is_file():
+                data = json.loads(cache_file.read_text(encoding="utf-8"))
+                if data.pop("cache_version", None) == CAPABILITIES_VERSION:
+                    caps = FFmpegCapabilities(**data)
+        except (OSError, ValueError, TypeError):
+            caps = None
+
+        if caps is None:
+            caps = probe_capabilities(ffmpeg)
+            if cache_file is not None and caps.version:
+                try:
+                    tmp = cache_file.with_suffix(".tmp")
+                    tmp.write_text(json.dumps({"cache_version": CAPABILITIES_VERSION, **caps.to_dict()}),
+                                   encoding="utf-8")
+                    tmp.replace(cache_file)
+                except OSError:
+                    pass
+        _memory_cache[key] = caps
+        return caps
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m core.capabilities", description="查看（并缓存）ffmpeg 能力表")
+    parser.add_argument("--refresh", action="store_true", help="忽略缓存重新探测")
+    parser.add_argument("--full", action="store_true", help="列出全部解码器、编码器、滤镜与选项")
+    args = parser.parse_args(argv)
+
+    caps = get_capabilities(refresh=args.refresh)
+    data = caps.to_dict()
+    if not args.full:
+        for key in ("decoders", "encoders", "filters", "options"):
+            data[key] = len(data[key])
+    data["selected"] = {
+        "hwaccel": caps.best_hwaccel(),
+        "encoders": {fmt: caps.encoder_for(fmt) for fmt in IMAGE_ENCODERS},
+        "decoders": {codec: caps.decoder_for(codec) for codec in PREFERRED_DECODERS},
+    }
+    print(json.dumps(data, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""
+断点续提：输出目录中的 checkpoint.json 记录提取参数与状态，帧清单（frames.csv）记录已完整写出的帧
+续提时校验最后几帧，删除不完整的文件，从最后一个有效帧重新开始（覆盖写该帧，保证滤镜状态与编号连续）
+"""
+import hashlib
+import json
+import math
+from pathlib import Path
+
+from core.dedup import DedupOptions
+from core.manifest import FrameManifest, MANIFEST_NAME, TIME_EPS
+from core.util import file_cache_key
+
+CHECKPOINT_NAME = "checkpoint.json"
+CHECKPOINT_VERSION = 1
+# 续提时逐个校验文件完整性的末尾帧数（更早的帧只检查清单是否连续）
+VALIDATE_TAIL_FRAMES = 8
+
+# 影响输出内容的参数；续提时必须与检查点一致
+_PARAM_KEYS = ("mode", "param", "fmt", "quality", "start_sec", "end_sec", "container")
+
+
+def checkpoint_params(extractor):
+    params = {key: getattr(extractor, key) for key in _PARAM_KEYS}
+    params["scene_min_gap"], params["scene_max_gap"] = extractor.scene.min_gap, extractor.scene.max_gap
+    dedup = extractor.dedup or DedupOptions()
+    params.update(dedup=extractor.dedup is not None, dedup_hi=dedup.hi, dedup_lo=dedup.lo, dedup_frac=dedup.frac)
+    if extractor.resize is not None:
+        params["resize"] = extractor.resize.to_dict()
+    if extractor.tile is not None:
+        params["tile"] = extractor.tile.to_dict()
+    if not extractor.layout.default:
+        params["layout"] = extractor.layout.to_dict()
+    if extractor.target_requests() is not None:
+        raw = json.dumps([extractor.targets.times, extractor.targets.frames])
+        params["targets"] = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+    params["video"] = file_cache_key(extractor.video_path)
+    return params
+
+
+def read_checkpoint(output_dir):
+    try:
+        data = json.loads((Path(output_dir) / CHECKPOINT_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return data if data.get("version") == CHECKPOINT_VERSION else None
+
+
+def write_checkpoint(output_dir, params, status, frames=0):
+    path = Path(output_dir) / CHECKPOINT_NAME
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"version": CHECKPOINT_VERSION, "status": status, "frames": frames, "params": params},
+                              ensure_ascii=False, indent=2), encoding="utf-8")
+    tmp.replace(path)
+
+
+def is_complete_image(path, fmt, size):
+    """文件大小与清单一致，且结尾是完整的图片（PNG 的 IEND、JPG 的 EOI、WebP 的 RIFF 长度）"""
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, 2)
+            if f.tell() != size or size < 12:
+                return False
+            if fmt == "png":
+                f.seek(-12, 2)
+                return f.read(12)[4:8] == b"IEND"
+            if fmt == "jpg":
+                f.seek(-2, 2)
+                return f.read(2) == b"\xff\xd9"
+            if fmt == "webp":
+                f.seek(0)
+                header = f.read(12)
+                return header[:4] == b"RIFF" and int.from_bytes(header[4:8], "little") + 8 == size
+    except OSError:
+        return False
+    return True
+
+
+def valid_prefix(output_dir, rows, fmt):
+    """清单中从第一帧起编号连续、且末尾若干帧文件完整的最长前缀"""
+    rows = sorted(rows, key=lambda r: r[0])
+    count = 0
+    for count, row in enumerate(rows):
+        if row[0] != (rows[0][0] + count):
+            break
+    else:
+        count = len(rows)
+    rows = rows[:count]
+
+    while rows:
+        tail = rows[-VALIDATE_TAIL_FRAMES:]
+        bad = [i for i, row in enumerate(tail) if not is_complete_image(Path(output_dir) / row[3], fmt, row[4])]
+        if not bad:
+            break
+        rows = rows[:len(rows) - len(tail) + bad[0]]
+    return rows
+
+
+def plan_resume(extractor):
+    """
+    根据检查点计算续提位置，返回 (已保留的清单行, 起始时间, 起始输出序号)；无可续提内容时返回 None
+    最后一个有效帧会被重新提取覆盖，因此保留的行不含该帧
+    参数与检查点不一致时抛出 ValueError
+    """
+    output_dir = extractor.output_dir
+    checkpoint = read_checkpoint(output_dir)
+    if checkpoint is None:
+        return None
+    if checkpoint["params"] != checkpoint_params(extractor):
+        raise ValueError("输出目录中的检查点与当前视频或提取参数不一致，无法续提")
+    if extractor.container != "files" or extractor.tile is not None:
+        return None  # 打包输出与拼图的索引只在结束时写完，从头重新生成
+
+    try:
+        rows = FrameManifest.load(output_dir / MANIFEST_NAME).rows
+    except (OSError, ValueError, KeyError):
+        return None
+    rows = valid_prefix(output_dir, rows, extractor.fmt)
+    if not rows or rows[0][0] != 1:
+        return None
+
+    number, _, pts, _, _ = rows[-1]
+    # 删除最后一个有效帧之后按顺序残留的文件（中断时可能只写了一半，尚未移动到布局中的最终位置）
+    n = number + 1
+    while True:
+        path = Path(output_dir) / extractor.layout.staged_name(n, extractor.fmt)
+        if not path.exists():
+            break
+        path.unlink()
+        n += 1
+
+    fps = extractor.video_info.get("fps", 0)
+    if extractor.mode == "每N秒取1帧":
+        # 该帧是其 N 秒区间内的第一帧：从区间的网格点继续，分段边界也因此仍落在网格上
+        slot = math.floor((pts - extractor.start_sec + TIME_EPS) / extractor.param)
+        start = extractor.start_sec + max(0, slot) * extractor.param
+    else:
+        start = max(extractor.start_sec, pts - 0.25 / fps if fps > 0 else pts - 1e-3)
+    return rows[:-1], start, number
+
+
+def find_resumable_dir(base_output, extractor):
+    """
+    在 base_output 下查找 extractor 可以续提的最近一次未完成的输出目录：检查点未完成且视频与提取参数一致
+    没有时返回 None（调用方新建输出目录）
+    """
+    base_output = Path(base_output)
+    if not base_output.is_dir():
+        return None
+    candidates = sorted(base_output.glob(f"{extractor.video_path.stem}_帧提取_*"),
+                        key=lambda p: p.stat().st_mtime, reverse=True)
+    params = None
+    for candidate in candidates:
+        checkpoint = read_checkpoint(candidate)
+        if checkpoint is None or checkpoint.get("status") == "completed":
+            continue
+        if params is None:
+            params = checkpoint_params(extractor)
+        if checkpoint.get("params") == params:
+            return candidate
+    return None
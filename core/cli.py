@@ -0,0 +1,281 @@
+"""
+命令行入口（不依赖 PyQt6）：python -m core <视频文件> [选项]
+提取结果以 JSON 输出到 stdout，--progress 时进度以 JSON 行输出到 stderr
+"""
+import argparse
+import json
+import sys
+import threading
+from pathlib import Path
+
+from core.autotune import TuneOptions
+from core.checkpoint import find_resumable_dir
+from core.containers import CONTAINERS
+from core.dedup import DedupOptions
+from core.encode import IMAGE_FORMATS
+from core.extractor import FrameExtractor, OutputOptions, PerformanceOptions, SelectionOptions
+from core.segments import default_segment_count
+from core.probe import probe_video
+from core.layout import NAMINGS, OutputLayout, shard_size
+from core.metrics import MetricsOptions
+from core.mosaic import TileLayout, parse_grid
+from core.scene import SceneOptions
+from core.targets import TargetList, read_target_file
+from core.resize import FITS, SCALERS, Resize, parse_size
+from core.resultcache import DEFAULT_LIMIT_MB, ResultCache
+from core.util import detect_gpu, make_output_dir, missing_ffmpeg_message
+
+MODES = {
+    "seconds": "每N秒取1帧",
+    "frames": "每N帧取1帧",
+    "keyframes": "仅关键帧",
+    "scene": "场景变化",
+    "list": "时间点列表",
+}
+
+
+def parse_time(value: str) -> float:
+    """支持 秒数 或 [时:]分:秒"""
+    try:
+        parts = [float(p) for p in value.split(":")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的时间：{value}")
+    if len(parts) > 3 or any(p < 0 for p in parts):
+        raise argparse.ArgumentTypeError(f"无效的时间：{value}")
+    seconds = 0.0
+    for p in parts:
+        seconds = seconds * 60 + p
+    return seconds
+
+
+def parse_mode(value: str) -> str:
+    if value in MODES.values():
+        return value
+    try:
+        return MODES[value]
+    except KeyError:
+        raise argparse.ArgumentTypeError(f"未知的提取模式：{value}（可选 {', '.join(MODES)}）")
+
+
+def target_list(frames=False):
+    """argparse 类型：读取时间点 / 帧号列表文件"""
+    def parse(value):
+        try:
+            return read_target_file(value, frames)
+        except (OSError, ValueError) as e:
+            raise argparse.ArgumentTypeError(str(e))
+    return parse
+
+
+def add_extraction_arguments(parser):
+    """单视频与批量命令共用的提取参数"""
+    parser.add_argument("--start", type=parse_time, default=0.0, help="起始时间（秒 或 时:分:秒），默认 0")
+    parser.add_argument("--end", type=parse_time, default=None, help="结束时间（秒 或 时:分:秒），默认视频结尾")
+    parser.add_argument("-m", "--mode", type=parse_mode, default="每N秒取1帧",
+                        help="提取模式：seconds（每N秒取1帧）、frames（每N帧取1帧）、keyframes（仅关键帧）、"
+                             "scene（场景变化）、list（时间点列表，配合 --targets / --target-frames）")
+    parser.add_argument("-n", "--param", type=int, default=1,
+                        help="参数 N（仅关键帧模式下 0 表示全部关键帧；场景变化模式下为阈值百分比 1-100）")
+    parser.add_argument("--targets", type=target_list(), default=None,
+                        help="时间点列表文件（每行一个 秒 或 时:分:秒），按列表取帧，对应关系写入 targets.csv")
+    parser.add_argument("--target-frames", type=target_list(frames=True), default=None,
+                        help="帧号列表文件（每行一个帧号），按列表取帧")
+    parser.add_argument("--min-gap", type=float, default=0.0, help="场景变化模式：两帧之间的最小间隔（秒）")
+    parser.add_argument("--max-gap", type=float, default=0.0, help="场景变化模式：两帧之间的最大间隔（秒），0 表示不限制")
+    parser.add_argument("-f", "--format", choices=IMAGE_FORMATS, default="png", type=str.lower, help="图片格式")
+    parser.add_argument("-q", "--quality", type=int, default=85, help="JPG / WebP 压缩质量 1-100")
+    parser.add_argument("-j", "--parallel", type=int, default=1,
+                        help=f"每个视频的并行 ffmpeg 进程数，默认 1（串行）；本机建议不超过 {default_segment_count()}")
+    parser.add_argument("--engine", choices=["auto", "continuous", "seek"], default="auto",
+                        help="解码引擎：auto 按代价估算选择，continuous 连续解码，seek 逐点 seek")
+    parser.add_argument("--dedup", action="store_true", help="丢弃与上一保留帧近似相同的帧（mpdecimate）")
+    parser.add_argument("--dedup-hi", type=int, default=768, help="去重：8x8 块差异高阈值，超过即视为不同")
+    parser.add_argument("--dedup-lo", type=int, default=320, help="去重：8x8 块差异低阈值")
+    parser.add_argument("--dedup-frac", type=float, default=0.33, help="去重：差异超过低阈值的块占比上限")
+    parser.add_argument("--encoders", type=int, default=0,
+                        help="图片编码线程数：0 由 ffmpeg 直接写图片；>0 时 ffmpeg 只解码，由线程池并行编码（需要 Pillow）")
+    parser.add_argument("--container", choices=CONTAINERS, default="files",
+                        help="输出容器：files 每帧一个文件；zip / tar 打包为带偏移索引的单个归档；"
+                             "npy 写成可内存映射的 rgb24 帧张量（忽略图片格式）")
+    parser.add_argument("--size", type=parse_size, default=None,
+                        help="输出尺寸：320（宽 320，高按比例）、x240、640x360；默认原始分辨率")
+    parser.add_argument("--fit", choices=FITS, default="fit",
+                        help="同时给出宽高时的适配方式：fit 保持比例缩放到框内，crop 铺满后居中裁剪，stretch 拉伸")
+    parser.add_argument("--scaler", choices=SCALERS, default="bicubic", help="缩放算法")
+    parser.add_argument("--tile", type=parse_grid, default=None,
+                        help="拼图输出：把抽样帧拼成 列x行 的大图（如 4x4），格位置与时间写入 tiles.csv")
+    parser.add_argument("--tile-timestamps", action="store_true", help="拼图：在每格左下角叠加源视频时间")
+    parser.add_argument("--tile-padding", type=int, default=0, help="拼图：格间距与外边距（像素）")
+    parser.add_argument("--shard", type=shard_size, default=0,
+                        help="输出分目录：每 K 帧一个子目录（如 1000 时 00012/frame_0012345.png），默认 0 不分目录")
+    parser.add_argument("--naming", choices=NAMINGS, default="number",
+                        help="输出文件命名：number 按输出序号（默认），time 按源视频时间（如 t00083.250.png）")
+    parser.add_argument("--gpu", action="store_true",
+                        help="本机有可用的硬件解码（CUDA / VideoToolbox / QSV / D3D11VA / VAAPI）时使用")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="每个 ffmpeg 进程的解码 / 滤镜线程数，默认按同时运行的进程数自动分配")
+    parser.add_argument("--auto-tune", action="store_true",
+                        help="自动调优：在输入的一小段上校准并行进程数与线程数，结果按主机与视频类型保存，之后直接使用")
+    parser.add_argument("--retune", action="store_true", help="自动调优时忽略已保存的配置重新校准")
+    parser.add_argument("--cache", action="store_true",
+                        help="使用结果缓存：命中时从缓存生成输出，完成后以 reflink 存入缓存（文件系统不支持 reflink 时不存入）")
+    parser.add_argument("--cache-limit", type=float, default=None,
+                        help=f"结果缓存的容量上限（MB），超出时淘汰最久未使用的结果，默认 {DEFAULT_LIMIT_MB}")
+    parser.add_argument("--no-index", action="store_true", help="不使用关键帧索引")
+    parser.add_argument("--progress", action="store_true", help="在 stderr 输出 JSON 行格式的进度")
+    parser.add_argument("--indent", type=int, default=None, help="结果 JSON 的缩进")
+
+
+def extraction_options(args):
+    """把命令行参数转换为 FrameExtractor 的关键字参数（不含视频、输出目录与时间范围）"""
+    return {
+        "mode": args.mode,
+        "param": args.param,
+        "fmt": args.format,
+        "quality": args.quality if args.format != "png" else 0,
+        "selection": SelectionOptions(
+            scene=SceneOptions(args.min_gap, args.max_gap),
+            dedup=DedupOptions(args.dedup_hi, args.dedup_lo, args.dedup_frac) if args.dedup else None,
+            targets=TargetList(args.targets, args.target_frames)
+            if args.targets is not None or args.target_frames is not None else None,
+        ),
+        "output": OutputOptions(
+            container=args.container,
+            resize=Resize(*args.size, fit=args.fit, scaler=args.scaler) if args.size else None,
+            tile=TileLayout(*args.tile, timestamps=args.tile_timestamps, padding=args.tile_padding,
+                            margin=args.tile_padding) if args.tile else None,
+            layout=OutputLayout(shard=args.shard, naming=args.naming),
+        ),
+        "performance": PerformanceOptions(
+            use_gpu=args.gpu and detect_gpu(),
+            parallel=args.parallel,
+            threads=args.threads,
+            engine=args.engine,
+            encoders=args.encoders,
+            use_index=not args.no_index,
+            auto_tune=TuneOptions(retune=args.retune) if args.auto_tune or args.retune else None,
+        ),
+        "cache": ResultCache(limit_mb=args.cache_limit) if args.cache else None,
+    }
+
+
+def validate_range(duration, start, end, mode, param):
+    """校验提取范围与参数，返回错误信息或 None"""
+    if duration <= 0:
+        return "视频时长信息无效"
+    if start >= end:
+        return "起始时间必须小于结束时间"
+    if end > duration + 1:
+        return "结束时间不能超过视频总时长"
+    if param < (0 if mode == "仅关键帧" else 1) or (mode == "场景变化" and param > 100):
+        return "参数 N 无效"
+    return None
+
+
+def output_spec(value):
+    """argparse 类型：一路输出描述（见 core.multi.parse_output_spec）"""
+    from core.multi import parse_output_spec
+    return parse_output_spec(value)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m core", description="单视频帧提取（命令行版）")
+    parser.add_argument("video", type=Path, help="视频文件")
+    parser.add_argument("-o", "--output", type=Path,
+                        help="输出路径，默认视频所在目录；会在其中创建 <视频文件名>_帧提取_<日期时间> 文件夹")
+    parser.add_argument("--no-subdir", action="store_true", help="直接输出到 --output，不创建带时间戳的子目录")
+    parser.add_argument("--metrics-log", type=Path, help="把运行时指标快照逐行写入该 JSON 行文件")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="在 127.0.0.1 的该端口提供 Prometheus 文本格式的指标（GET /metrics）")
+    parser.add_argument("--resume", action="store_true",
+                        help="断点续提：继续该视频最近一次未完成的输出目录（--no-subdir 时为 --output 本身），没有则新建")
+    parser.add_argument("--out", dest="outputs", type=output_spec, action="append", default=None,
+                        help="一次解码、多路输出（可重复，格式同 python -m core.multi 的 --out，相对目录位于 --output 下）；"
+                             "给出时只使用 --start / --end / --gpu / --no-index 与各路描述中的参数，"
+                             "同时给出 --parallel / --auto-tune / --dedup / --cache 等不支持的选项时报错")
+    add_extraction_arguments(parser)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    missing = missing_ffmpeg_message()
+    if missing:
+        print(json.dumps({"status": "error", "error": missing}, ensure_ascii=False))
+        return 2
+
+    if not args.video.is_file():
+        print(json.dumps({"status": "error", "error": f"视频文件不存在：{args.video}"}, ensure_ascii=False))
+        return 2
+
+    if args.outputs:
+        from core.multi import unsupported_options
+        unsupported = unsupported_options(**extraction_options(args), resume=args.resume)
+        if unsupported:
+            error = f"--out（单次解码多路输出）不支持{'、'.join(unsupported)}"
+            print(json.dumps({"status": "error", "error": error}, ensure_ascii=False))
+            return 2
+
+    try:
+        info = probe_video(args.video)
+    except Exception as e:
+        print(json.dumps({"status": "error", "error": f"无法读取视频信息：{e}"}, ensure_ascii=False))
+        return 2
+    duration = info.duration
+    end = duration if args.end is None else args.end
+    if args.outputs:
+        from core.multi import run_outputs
+        for spec in args.outputs:
+            if args.output and not spec.output_dir.is_absolute():
+                spec.output_dir = args.output / spec.output_dir
+        return run_outputs(args.video, args.outputs, args.start, min(end, duration), info, use_gpu=args.gpu,
+                           use_index=not args.no_index, progress=args.progress, indent=args.indent)
+    error = validate_range(duration, args.start, end, args.mode, args.param)
+    if args.mode == "时间点列表" and args.targets is None and args.target_frames is None:
+        error = "时间点列表模式需要 --targets 或 --target-frames"
+    if error:
+        print(json.dumps({"status": "error", "error": error}, ensure_ascii=False))
+        return 2
+
+    base_output = args.output or args.video.parent
+
+    def on_progress(progress):
+        if args.progress:
+            print(json.dumps({"progress": progress}), file=sys.stderr, flush=True)
+
+    def on_status(status):
+        if args.progress:
+            print(json.dumps({"status": status}, ensure_ascii=False), file=sys.stderr, flush=True)
+
+    extractor = FrameExtractor(
+        video_path=args.video,
+        output_dir=base_output,
+        start_sec=args.start,
+        end_sec=min(end, duration),
+        video_info=info,
+        on_progress=on_progress,
+        on_status=on_status,
+        resume=args.resume,
+        metrics_options=MetricsOptions(log=args.metrics_log, port=args.metrics_port),
+        **extraction_options(args)
+    )
+    if args.no_subdir:
+        base_output.mkdir(parents=True, exist_ok=True)
+    else:
+        # 续提只选用视频与提取参数都一致的未完成目录，否则新建
+        extractor.output_dir = (args.resume and find_resumable_dir(base_output, extractor)) \
+                               or make_output_dir(base_output, args.video)
+
+    # 提取放在子线程，主线程负责响应 Ctrl+C
+    result = {}
+    runner = threading.Thread(target=lambda: result.update(extractor.run()), daemon=True)
+    runner.start()
+    try:
+        while runner.is_alive():
+            runner.join(0.2)
+    except KeyboardInterrupt:
+        extractor.stop()
+        runner.join()
+
+    print(json.dumps(result, ensure_ascii=False, indent=args.indent))
+    return {"completed": 0, "stopped": 130}.get(result.get("status"), 1)
@@ -0,0 +1,241 @@
+"""
+打包输出：把成千上万张小图片写进单个文件，避免网络盘上的元数据开销
+- zip / tar：流式写入已编码的图片，旁边的 <文件>.index.json 记录每帧的数据偏移与长度
+- npy：rgb24 原始帧直接追加成 (帧数, 高, 宽, 3) 的 uint8 张量，可用 numpy 内存映射，<文件>.json 记录元数据
+读取时按帧号 O(1) 定位，无需解包：
+
+    from core.containers import open_frames
+    frames = open_frames("输出目录/frames.zip")
+    png_bytes = frames[123]
+"""
+import io
+import json
+import tarfile
+import time
+import zipfile
+from pathlib import Path
+
+from core.layout import OutputLayout
+
+CONTAINERS = ("files", "zip", "tar", "npy")
+INDEX_VERSION = 1
+
+# npy 头部固定长度（含魔数），预留足够位数以便结束时原地改写帧数
+NPY_HEADER_SIZE = 128
+
+
+def container_path(output_dir, container):
+    return Path(output_dir) / f"frames.{container}"
+
+
+def index_path(path):
+    path = Path(path)
+    return path.with_name(path.name + (".json" if path.suffix == ".npy" else ".index.json"))
+
+
+class FileSink:
+    """默认输出：每帧一个文件，写入顺序无关；直接写到布局中的子目录（见 OutputLayout.sink_path）"""
+    ordered = False
+    raw = False
+
+    def __init__(self, output_dir, fmt, layout=None):
+        self.output_dir = Path(output_dir)
+        self.fmt = fmt
+        self.layout = layout or OutputLayout()
+        self.path = self.output_dir
+        self._dirs = {self.output_dir}
+
+    def entry_name(self, number):
+        return self.layout.sink_path(number, self.fmt)
+
+    def add(self, number, data):
+        path = self.output_dir / self.entry_name(number)
+        if path.parent not in self._dirs:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._dirs.add(path.parent)
+        path.write_bytes(data)
+
+    def close(self):
+        pass
+
+
+class ArchiveSink:
+    """zip（不压缩）或 tar 归档，帧必须按序号顺序写入"""
+    ordered = True
+    raw = False
+
+    def __init__(self, output_dir, fmt, container="zip", layout=None):
+        self.fmt = fmt
+        self.container = container
+        self.layout = layout or OutputLayout()  # 归档内的文件名与每帧一个文件时相同
+        self.path = container_path(output_dir, container)
+        self.entries = []
+        if container == "zip":
+            # 图片本身已压缩，STORED 使数据在归档内连续、可直接按偏移读取
+            self._archive = zipfile.ZipFile(self.path, "w", compression=zipfile.ZIP_STORED, allowZip64=True)
+        else:
+            self._archive = tarfile.open(self.path, "w", format=tarfile.PAX_FORMAT)
+
+    def entry_name(self, number):
+        """帧清单中的路径：归档文件名#归档内文件名"""
+        return f"{self.path.name}#{self.layout.staged_name(number, self.fmt)}"
+
+    def add(self, number, data):
+        name = self.layout.staged_name(number, self.fmt)
+        if self.container == "zip":
+            info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            self._archive.writestr(info, data)
+            offset = self._archive.fp.tell() - info.compress_size
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            self._archive.addfile(info, io.BytesIO(data))
+            # addfile 写完后 offset 位于按 512 字节补齐的数据末尾
+            offset = self._archive.offset - -(-len(data) // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+        self.entries.append((number, offset, len(data), name))
+
+    def close(self):
+        self._archive.close()
+        first = self.entries[0][0] if self.entries else 1
+        index = {
+            "version": INDEX_VERSION,
+            "container": self.container,
+            "format": self.fmt,
+            "start_number": first,
+            "frames": [[offset, size] for _, offset, size, _ in self.entries],
+            "names": [name for *_, name in self.entries],
+        }
+        index_path(self.path).write_text(json.dumps(index, separators=(",", ":")), encoding="utf-8")
+
+
+class TensorSink:
+    """rgb24 原始帧追加写入 .npy，结束时改写头部中的帧数"""
+    ordered = True
+    raw = True
+
+    def __init__(self, output_dir, width, height):
+        self.path = container_path(output_dir, "npy")
+        self.width = width
+        self.height = height
+        self.count = 0
+        self.start_number = None
+        self._file = open(self.path, "wb")
+        self._file.write(self._header())
+
+    def _header(self):
+        header = (f"{{'descr': '|u1', 'fortran_order': False, "
+                  f"'shape': ({self.count}, {self.height}, {self.width}, 3), }}")
+        prefix = b"\x93NUMPY\x01\x00"
+        length = NPY_HEADER_SIZE - len(prefix) - 2
+        return prefix + length.to_bytes(2, "little") + header.ljust(length - 1).encode("latin1") + b"\n"
+
+    def entry_name(self, number):
+        """帧清单中的路径：张量文件名#第几帧（从 0 开始）"""
+        return f"{self.path.name}#{number - (self.start_number or number)}"
+
+    def add(self, number, data):
+        if self.start_number is None:
+            self.start_number = number
+        self._file.write(data)
+        self.count += 1
+
+    def close(self):
+        self._file.seek(0)
+        self._file.write(self._header())
+        self._file.close()
+        meta = {
+            "version": INDEX_VERSION,
+            "container": "npy",
+            "pix_fmt": "rgb24",
+            "width": self.width,
+            "height": self.height,
+            "channels": 3,
+            "frames": self.count,
+            "start_number": self.start_number or 1,
+            "header_size": NPY_HEADER_SIZE,
+        }
+        index_path(self.path).write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
+
+def open_sink(container, output_dir, fmt, width, height, layout=None):
+    """layout：文件名的编号宽度（core.layout.OutputLayout），每帧一个文件与 zip / tar 归档共用"""
+    if container == "files":
+        return FileSink(output_dir, fmt, layout)
+    if container in ("zip", "tar"):
+        return ArchiveSink(output_dir, fmt, container, layout)
+    if container == "npy":
+        return TensorSink(output_dir, width, height)
+    raise ValueError(f"未知的输出容器：{container}（可选 {', '.join(CONTAINERS)}）")
+
+
+class ArchiveReader:
+    """按帧号读取 zip / tar 中的图片字节"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        index = json.loads(index_path(self.path).read_text(encoding="utf-8"))
+        self.format = index["format"]
+        self.start_number = index["start_number"]
+        self.frames = index["frames"]
+        self._file = open(self.path, "rb")
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __getitem__(self, number):
+        i = number - self.start_number
+        if not 0 <= i < len(self.frames):
+            raise IndexError(f"帧号超出范围：{number}")
+        offset, size = self.frames[i]
+        self._file.seek(offset)
+        return self._file.read(size)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TensorReader:
+    """以内存映射方式打开 .npy，按帧号返回 (高, 宽, 3) 数组（需要 numpy）"""
+
+    def __init__(self, path):
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError("读取 .npy 帧张量需要 numpy：pip install numpy")
+        self.path = Path(path)
+        meta = json.loads(index_path(self.path).read_text(encoding="utf-8"))
+        self.start_number = meta["start_number"]
+        self.array = numpy.load(self.path, mmap_mode="r")
+
+    def __len__(self):
+        return len(self.array)
+
+    def __getitem__(self, number):
+        i = number - self.start_number
+        if not 0 <= i < len(self.array):
+            raise IndexError(f"帧号超出范围：{number}")
+        return self.array[i]
+
+    def close(self):
+        self.array = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_frames(path):
+    """打开 frames.zip / frames.tar / frames.npy，返回可按帧号索引的读取器"""
+    path = Path(path)
+    if path.suffix == ".npy":
+        return TensorReader(path)
+    return ArchiveReader(path)
@@ -0,0 +1,17 @@
+"""
+近似重复帧过滤：mpdecimate 丢弃与上一保留帧近似相同的帧（比较 8x8 块的差异），录屏、监控视频可大幅减少输出
+"""
+from dataclasses import dataclass, asdict
+
+
+@dataclass
+class DedupOptions:
+    hi: int = 768  # 任一 8x8 块差异超过该值即视为不同的帧
+    lo: int = 320  # 块差异低阈值
+    frac: float = 0.33  # 差异超过低阈值的块占比上限
+
+    def filter(self):
+        return f"mpdecimate=hi={self.hi}:lo={self.lo}:frac={self.frac}"
+
+    def to_dict(self):
+        return asdict(self)
@@ -0,0 +1,163 @@
+"""
+图片编码：ffmpeg 输出参数与 Python 编码线程池共用同一套 质量(1-100) -> 编码参数 的映射
+线程池编码需要 Pillow（可选依赖，仅 encoders > 0 或打包为 zip / tar 时使用）
+"""
+import io
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+IMAGE_FORMATS = ("png", "jpg", "webp")
+
+
+def quality_args(fmt, quality):
+    """ffmpeg 图片输出的质量参数"""
+    if fmt == "jpg":
+        # mjpeg 的 qscale 为 1（最好）- 31（最差）
+        q = max(1, min(31, int(31 * (100 - quality) / 100)))
+        return ["-q:v", str(q)]
+    if fmt == "webp":
+        return ["-quality", str(max(1, min(100, quality)))]
+    return []
+
+
+def pillow_options(fmt, quality):
+    """Pillow 的保存参数，与 quality_args 对应"""
+    if fmt == "jpg":
+        # 与 qscale 的换算保持一致：先映射到 1-31 再折回 Pillow 的 1-95
+        q = max(1, min(31, int(31 * (100 - quality) / 100)))
+        return {"format": "JPEG", "quality": max(1, min(95, round(100 - (q - 1) * 100 / 31)))}
+    if fmt == "webp":
+        return {"format": "WEBP", "quality": max(1, min(100, quality)), "method": 4}
+    return {"format": "PNG", "compress_level": 6}
+
+
+def default_encoder_count():
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+class EncodePipeline:
+    """
+    解码与编码解耦：调用方从 ffmpeg 读取 rgb24 原始帧，编码线程池并行编码后交给输出容器（core.containers）
+    - 预分配 buffers 个帧缓冲区循环使用，池满时读取方阻塞（背压），内存占用固定
+    - 文件名由帧序号决定（frame_%05d），与完成顺序无关；需要顺序写入的容器按帧号排队写出
+    - 原始帧容器（npy）不经过编码，直接在读取线程中写入
+    """
+
+    def __init__(self, sink, fmt, quality, width, height, workers=None, buffers=None, start_number=1):
+        self._image = None
+        if not sink.raw:
+            try:
+                from PIL import Image
+            except ImportError:
+                raise ImportError("多线程编码需要 Pillow：pip install pillow")
+            self._image = Image
+        self.sink = sink
+        self.fmt = fmt
+        self.options = pillow_options(fmt, quality)
+        self.width = width
+        self.height = height
+        self.frame_bytes = width * height * 3
+        self.workers = max(1, workers or default_encoder_count())
+        self.start_number = start_number
+        self.written = 0
+        self.bytes_written = 0
+        self.sizes = {}  # 帧号 -> 写出的字节数（用于帧清单）
+        self.error = None
+        self._lock = threading.Lock()
+        self._pending = {}  # 顺序写入时已编码、等待前面帧的 {帧号: (数据, 缓冲区)}
+        self._next = start_number
+        self._free = queue.Queue()
+        for _ in range(max(self.workers + 1, buffers or self.workers * 2)):
+            self._free.put(bytearray(self.frame_bytes))
+
+    def _write(self, number, data):
+        self.sink.add(number, data)
+        self.written += 1
+        self.bytes_written += len(data)
+        self.sizes[number] = len(data)
+
+    def _encode(self, number, buffer):
+        try:
+            if self.error is not None:
+                raise RuntimeError("已中止")
+            image = self._image.frombuffer("RGB", (self.width, self.height), buffer, "raw", "RGB", 0, 1)
+            output = io.BytesIO()
+            image.save(output, **self.options)
+            data = output.getvalue()
+        except Exception as e:
+            self._free.put(buffer)
+            self._abort(e)
+            return
+
+        if not self.sink.ordered:
+            try:
+                self._write_unordered(number, data)
+            finally:
+                self._free.put(buffer)
+            return
+
+        # 🔹 顺序容器：缓冲区直到该帧真正写出后才归还，等待中的帧数因此不超过缓冲区个数
+        with self._lock:
+            self._pending[number] = (data, buffer)
+            try:
+                while self._next in self._pending and self.error is None:
+                    data, done = self._pending.pop(self._next)
+                    self._write(self._next, data)
+                    self._free.put(done)
+                    self._next += 1
+            except Exception as e:
+                self.error = e
+            if self.error is not None:
+                self._release_pending()
+
+    def _abort(self, error):
+        with self._lock:
+            if self.error is None:
+                self.error = error
+            self._release_pending()
+
+    def _release_pending(self):
+        """出错后不再写入：归还等待中的缓冲区，避免读取方一直阻塞"""
+        for _, buffer in self._pending.values():
+            self._free.put(buffer)
+        self._pending.clear()
+
+    def _write_unordered(self, number, data):
+        try:
+            self.sink.add(number, data)
+        except Exception as e:
+            self.error = e
+            return
+        with self._lock:
+            self.written += 1
+            self.bytes_written += len(data)
+            self.sizes[number] = len(data)
+
+    def run(self, stream, stopped=lambda: False):
+        """从二进制流逐帧读取并分发给编码线程，阻塞直到全部写完；返回写出的帧数"""
+        number = self.start_number
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while not stopped() and self.error is None:
+                buffer = self._free.get()  # 🔹 没有空闲缓冲区时在此等待编码线程
+                view = memoryview(buffer)
+                filled = 0
+                while filled < self.frame_bytes:
+                    n = stream.readinto(view[filled:])
+                    if not n:
+                        break
+                    filled += n
+                if filled < self.frame_bytes:
+                    self._free.put(buffer)
+                    break
+                if self.sink.raw:
+                    self._write(number, buffer)
+                    self._free.put(buffer)
+                else:
+                    pool.submit(self._encode, number, buffer)
+                number += 1
+        self.sink.close()
+        if self.error is not None:
+            raise RuntimeError(f"图片编码失败：{self.error}")
+        return self.written
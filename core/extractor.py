@@ -0,0 +1,1117 @@
+import bisect
+import importlib.util
+import math
+import os
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from core.autotune import autotune, TuneOptions
+from core.capabilities import IMAGE_ENCODERS, get_capabilities
+from core.checkpoint import checkpoint_params, plan_resume, read_checkpoint, write_checkpoint
+from core.containers import open_sink
+from core.dedup import DedupOptions
+from core.encode import EncodePipeline, default_encoder_count, quality_args
+from core.keyframes import load_keyframe_index
+from core.layout import OutputLayout
+from core.metrics import MetricsLog, MetricsOptions, MetricsServer, RuntimeMetrics
+from core.mosaic import TILES_NAME, TileLayout, write_tile_index
+from core.manifest import (FrameManifest, ManifestWriter, MANIFEST_NAME, SourceFrames, TIME_EPS, parse_showinfo,
+                           parse_showinfo_config, showinfo_filter)
+from core.probe import probe_video, VideoInfo
+from core.resize import Resize
+from core.scene import (merge_score_logs, scene_router, score_log_filter, threshold_from_param, SceneOptions,
+                        SCENE_LOG_NAME, SCENE_LOG_PARTS)
+from core.seek import choose_engine, plan_seek_windows, sample_times, window_select, WINDOWS_PER_PROCESS
+from core.segments import plan_segments
+from core.targets import TARGETS_NAME, TargetList, frames_to_times, snap_targets, write_target_index
+from core.util import FFMPEG_BIN
+
+
+# 输出帧的时间戳与扫描位置无关的模式：进度由额外的 null 输出反映扫描位置
+SCAN_MODES = ("仅关键帧", "场景变化")
+TARGET_MODE = "时间点列表"
+
+
+@dataclass
+class SelectionOptions:
+    """
+    取哪些帧（mode 与 param 之外）：scene 为场景变化模式的帧间隔，dedup 为近似重复帧过滤（None 为不过滤），
+    targets 为时间点列表（给出时忽略 mode）
+    """
+    scene: SceneOptions = field(default_factory=SceneOptions)
+    dedup: DedupOptions = None
+    targets: TargetList = None
+
+
+@dataclass
+class OutputOptions:
+    """
+    写成什么：container 为输出容器（files 每帧一个文件；zip / tar / npy 打包为单个文件，见 core.containers），
+    resize 为输出尺寸（None 为原始分辨率），tile 为拼图（None 为每帧一张图），layout 为输出目录布局（None 为平铺）
+    """
+    container: str = "files"
+    resize: Resize = None
+    tile: TileLayout = None
+    layout: OutputLayout = None
+
+
+@dataclass
+class PerformanceOptions:
+    """
+    怎么跑（不影响输出内容）：use_gpu 硬件解码，parallel 分段并行进程数，threads 每进程线程数（None 自动分配），
+    engine 为 auto / continuous / seek，encoders 为编码线程数（0 由 ffmpeg 直接写图片），use_index 使用关键帧索引，
+    auto_tune 为自动调优（None 为不调优）
+    """
+    use_gpu: bool = False
+    parallel: int = 1
+    threads: int = None
+    engine: str = "auto"
+    encoders: int = 0
+    use_index: bool = False
+    auto_tune: TuneOptions = None
+
+
+@dataclass
+class Tap:
+    """
+    一路输出的 showinfo：起始输出序号、滤镜时间零点在源视频中的时间（即 seek 位置，秒）、最多输出帧数
+    source 为同一进程中源帧计数 showinfo 的实例名（None 时按时间换算帧号），consumer 为本路在其中的序号
+    """
+    start_number: int
+    origin: float
+    limit: int = None
+    source: str = None
+    consumer: int = 0
+
+
+@dataclass
+class Job:
+    """
+    一个 ffmpeg 进程：命令行、覆盖的时长、预期输出帧数（0 表示未知）
+    outputs：输出 showinfo 实例名 -> Tap；sources：源帧 showinfo 实例名 -> SourceFrames，用于生成帧清单
+    """
+    cmd: list
+    duration: float
+    frames: int = 0
+    cwd: Path = None
+    outputs: dict = field(default_factory=dict)
+    sources: dict = field(default_factory=dict)
+    time_bases: dict = field(default_factory=dict)
+
+    def feed(self, line, index_at):
+        """
+        处理一行 ffmpeg 日志中的 showinfo 输出：记录各实例的时间基准与源帧
+        输出帧返回 (实例名, 输出序号, 源视频帧号, 源视频时间)，其余返回 None；index_at(t) 在没有源帧计数时估算帧号
+        """
+        config = parse_showinfo_config(line)
+        if config is not None:
+            self.time_bases[config[0]] = config[1]
+            return None
+        frame = parse_showinfo(line)
+        if frame is None:
+            return None
+        # 整数 pts 乘时间基准是精确时间（pts_time 只有 6 位有效数字）；源帧与输出帧按同一个 pts 对应
+        time_base = self.time_bases.get(frame.name)
+        t = float(frame.pts * time_base) if frame.pts is not None and time_base is not None else frame.time
+        key = frame.pts if frame.pts is not None else frame.time
+        source = self.sources.get(frame.name)
+        if source is not None:
+            source.add(key, t)
+            return None
+        tap = self.outputs.get(frame.name)
+        if tap is None or (tap.limit is not None and frame.n >= tap.limit):
+            return None
+        pts = tap.origin + t
+        index = self.sources[tap.source].index(key, tap.consumer) if tap.source in self.sources else None
+        return frame.name, tap.start_number + frame.n, index_at(pts) if index is None else index, pts
+
+
+class FrameExtractor:
+    """
+    帧提取引擎（不依赖 Qt），GUI 与命令行共用
+    进度与状态通过回调报告：on_progress(int 百分比)、on_status(str)
+    run() 在调用线程中阻塞执行，返回可直接序列化为 JSON 的结果字典
+    """
+
+    def __init__(self, video_path, output_dir, start_sec, end_sec, mode, param, fmt, quality, video_info=None,
+                 selection=None, output=None, performance=None, resume=False, cache=None, metrics_options=None,
+                 on_progress=None, on_status=None, on_metrics=None):
+        """selection / output / performance 分别为 SelectionOptions / OutputOptions / PerformanceOptions，None 为默认值"""
+        selection = selection or SelectionOptions()
+        output = output or OutputOptions()
+        performance = performance or PerformanceOptions()
+        self.video_path = Path(video_path)
+        self.output_dir = Path(output_dir)
+        self.start_sec = start_sec
+        self.end_sec = end_sec
+        # 时间点列表模式（core.targets.TargetList）：给出时忽略 mode
+        self.targets = selection.targets
+        self.target_mapping = None
+        self.target_windows = 0
+        self.mode = TARGET_MODE if self.targets is not None else mode
+        self.param = param
+        self.fmt = fmt.lower()
+        self.quality = quality
+        self.use_gpu = performance.use_gpu
+        # 每个 ffmpeg 进程的解码 / 滤镜线程数，None 时按同时运行的进程数自动分配
+        self.threads = performance.threads
+        self._capabilities = None
+        # 自动调优（core.autotune.TuneOptions）：按已保存的配置或现场校准选择 parallel 与 threads；None 为不调优
+        self.auto_tune = performance.auto_tune
+        self.tuning = None
+        self.parallel = max(1, int(performance.parallel))
+        self.use_index = performance.use_index
+        self.keyframe_index = None
+        self.engine = performance.engine  # "auto" | "continuous" | "seek"
+        self.engine_used = None
+        # 场景变化模式的帧间隔（core.scene.SceneOptions）
+        self.scene = selection.scene or SceneOptions()
+        # 近似重复帧过滤（core.dedup.DedupOptions），None 为不过滤
+        self.dedup = selection.dedup
+        # 编码线程数：0 表示由 ffmpeg 直接写图片；>0 时 ffmpeg 只解码，图片由线程池编码
+        self.encoders = max(0, int(performance.encoders))
+        # 输出容器：files 每帧一个文件；zip / tar / npy 打包为单个文件（见 core.containers）
+        self.container = output.container
+        self.container_path = None
+        self.manifest = None
+        # 输出尺寸（core.resize.Resize），None 为原始分辨率
+        self.resize = output.resize
+        # 拼图输出（core.mosaic.TileLayout）：抽样帧在滤镜中拼成 列×行 的大图，None 为每帧一张图
+        self.tile = output.tile
+        # 输出目录布局（core.layout.OutputLayout）：编号宽度、分子目录、按时间命名；宽度在取得视频信息后确定
+        self.layout = output.layout
+        self._layout_dirs = set()
+        # 按时间命名时本次已占用的最终路径 -> 输出序号（取整到同一毫秒的帧不互相覆盖）
+        self._final_paths = {}
+        # 断点续提：输出目录中有检查点时从最后一个有效帧继续；number_offset 为已保留的帧数
+        self.resume = resume
+        self.resumed_from = None
+        self.number_offset = 0
+        # 结果缓存（core.resultcache.ResultCache）：命中时直接复制已有的输出，完成后把输出存入缓存；None 为不使用
+        self.cache = cache
+        self.cache_hit = None
+        self.sampled_frames = 0
+        self.on_progress = on_progress
+        self.on_status = on_status
+        # 运行时指标（core.metrics.MetricsOptions）：进度与快照按固定间隔发出，而不是每行 ffmpeg 输出都发
+        self.on_metrics = on_metrics
+        self.metrics_options = metrics_options or MetricsOptions()
+        self.metrics = None
+        self.metrics_server = None
+        self._progress = 0
+        self._emitted_progress = None
+        self._pipeline = None
+        self._stop = False
+        self.procs = []
+        self.failed_jobs = []
+        self._lock = threading.Lock()
+
+        # 帧数统计
+        self.extracted_frames = 0
+
+        # 🔹 使用传入的 video_info，只有在不合法时才获取
+        if isinstance(video_info, VideoInfo):
+            video_info = video_info.to_dict()
+        if video_info is None or video_info.get("duration", 0) <= 0:
+            try:
+                video_info = probe_video(self.video_path).to_dict()
+            except Exception:
+                video_info = {"duration": 0, "fps": 0, "total_frames": 0}
+        self.video_info = video_info
+        full_duration = self.video_info.get("duration", 0)
+        self.duration = (min(full_duration,
+                             self.end_sec) - self.start_sec) if self.end_sec > 0 else full_duration - self.start_sec
+        if self.duration <= 0:
+            self.duration = full_duration
+        self.layout = (self.layout or OutputLayout()).fitted(self.planned_outputs(), self.start_sec + self.duration)
+        # 未能移动到布局位置的文件数（仍以 ffmpeg 写出的文件名记入帧清单）与最后一个错误
+        self.layout_failures = 0
+        self.layout_error = None
+
+    def planned_outputs(self):
+        """本次提取范围内输出帧数的上限，决定文件名编号宽度"""
+        fps = self.video_info.get("fps", 0) or 0
+        frames = math.ceil(self.duration * fps) if fps > 0 else self.video_info.get("total_frames", 0) or 0
+        if self.mode == TARGET_MODE:
+            count = len(self.target_requests())
+        elif self.mode == "每N秒取1帧":
+            count = math.ceil(self.duration / self.param)
+        elif self.mode == "每N帧取1帧":
+            count = math.ceil(frames / self.param)
+        else:
+            count = frames  # 仅关键帧、场景变化：至多每帧输出一张
+        if self.tile is not None:
+            count = math.ceil(count / self.tile.per_sheet)
+        return count
+
+    @property
+    def use_pipeline(self):
+        """是否由 Python 端编码 / 写出（编码线程池或打包输出）；拼图输出总由 ffmpeg 直接写图片"""
+        return (self.encoders > 0 or self.container != "files") and self.tile is None
+
+    @property
+    def capabilities(self):
+        """内置 ffmpeg 的能力表（磁盘缓存，首次使用时读取）"""
+        if self._capabilities is None:
+            self._capabilities = get_capabilities()
+        return self._capabilities
+
+    @property
+    def hwaccel(self):
+        """use_gpu 时本机实际可用的硬件加速，没有时为 None（软件解码）"""
+        return self.capabilities.best_hwaccel() if self.use_gpu else None
+
+    def decode_args(self):
+        """解码相关的输入参数：硬件加速，或更快的软件解码器；同时运行多个进程时限定解码线程数"""
+        args = []
+        hwaccel = self.hwaccel
+        if hwaccel:
+            args += ["-hwaccel", hwaccel]
+        else:
+            decoder = self.capabilities.decoder_for(self.video_info.get("codec", ""))
+            if decoder:
+                args += ["-c:v", decoder]
+        return args + self.capabilities.thread_args(self.parallel, self.threads)[0]
+
+    def global_args(self):
+        """放在命令最前面的全局参数（滤镜线程数）"""
+        return ["-hide_banner", *self.capabilities.thread_args(self.parallel, self.threads)[1]]
+
+    def encode_args(self):
+        """图片输出的编码器与质量参数"""
+        encoder = self.capabilities.encoder_for(self.fmt)
+        return (["-c:v", encoder] if encoder else []) + quality_args(self.fmt, self.quality)
+
+    def check_encoder(self):
+        """
+        当前 ffmpeg 不支持输出格式的编码器时（如缺少 libwebp），改由 Pillow 线程池编码；
+        Pillow 也不可用或拼图输出时报错
+        """
+        if self.use_pipeline or self.capabilities.encoder_for(self.fmt):
+            return
+        if self.tile is None and importlib.util.find_spec("PIL") is not None:
+            self.encoders = default_encoder_count()
+            return
+        raise RuntimeError(f"当前 ffmpeg 不支持 {self.fmt.upper()} 编码（缺少 "
+                           f"{'/'.join(IMAGE_ENCODERS.get(self.fmt, ()))}），请安装 pillow 或改用其他格式")
+
+    @property
+    def stopped(self):
+        return self._stop
+
+    def emit_progress(self, progress):
+        if self.on_progress is not None:
+            self.on_progress(progress)
+
+    def publish(self, log=None):
+        """发出最新进度（有变化时）与指标快照；由定时线程调用"""
+        with self._lock:
+            progress = self._progress
+        if progress != self._emitted_progress:
+            self._emitted_progress = progress
+            self.emit_progress(progress)
+        if self.metrics is None or (self.on_metrics is None and log is None and self.metrics_server is None):
+            return
+        written = self.manifest.bytes if self.manifest is not None else 0
+        if self._pipeline is not None:
+            written = self._pipeline.bytes_written
+        snapshot = self.metrics.snapshot(progress, self.extracted_frames, written, list(self.procs))
+        if self.on_metrics is not None:
+            self.on_metrics(snapshot)
+        if log is not None:
+            log.write(snapshot)
+        if self.metrics_server is not None:
+            self.metrics_server.update(snapshot)
+
+    def emit_status(self, status):
+        if self.on_status is not None:
+            self.on_status(status)
+
+    def sample_chain(self, seek=None):
+        """
+        抽样滤镜链，返回 (滤镜列表, 是否需要按输出序号重排时间戳)
+        seek 为滤镜时间零点在源视频中的时间（默认为提取起点）
+        """
+        if self.mode == TARGET_MODE:
+            raise ValueError("时间点列表模式只能用逐点 seek 引擎提取")
+        if self.mode == "每N秒取1帧":
+            # 🔹 采样网格以提取起点为原点，每个 N 秒区间取第一帧（pts >= 网格点），输出的是源帧本身的 pts；
+            # 分段并行、断点续提与逐点 seek 引擎按同一规则取帧，结果逐帧一致
+            origin = self.start_sec - (self.start_sec if seek is None else seek) - TIME_EPS
+            slot = f"floor((t{-origin:+.6f})/{self.param})"
+            previous = f"floor((prev_selected_t{-origin:+.6f})/{self.param})"
+            return [f"select='isnan(prev_selected_t)+gte({slot}\\,{previous}+1)'"], True
+        if self.mode == "仅关键帧":
+            # 解码器只输出关键帧；N>0 时再稀疏为每 N 秒至多 1 帧
+            if self.param > 0:
+                return [f"select='isnan(prev_selected_t)+gte(t-prev_selected_t\\,{self.param})'"], True
+            return [], True
+        if self.mode == "场景变化":
+            return [], True  # 选帧在 build_scene_router 的两路 select 中完成
+        return [f"select='not(mod(n\\,{self.param}))'"], True
+
+    def build_filter(self, extra=(), seek=None):
+        """完整的输出滤镜：抽样 -> 缩放 -> 去重 -> extra -> 拼图 -> 时间戳重排；seek 见 sample_chain"""
+        chain, renumber = self.sample_chain(seek)
+        if self.resize is not None:
+            # 🔹 缩放放在抽样之后，只处理被选中的帧；去重也因此在小图上比较
+            chain += self.resize.filters(*self.source_size())
+        if self.dedup is not None:
+            # 🔹 showinfo 统计抽样帧数，mpdecimate 丢弃与上一保留帧近似相同的帧
+            chain += ["showinfo" + ("" if self.showinfo_checksum else "=checksum=0"), self.dedup.filter()]
+        chain += list(extra)
+        if self.tile is not None:
+            chain += self.tile.filters(self.start_sec if seek is None else seek)
+            renumber = True  # 拼图的时间戳间隔不均匀，按输出序号重排，避免图片序列输出时重复或丢帧
+        if renumber:
+            chain.append("setpts=N/FRAME_RATE/TB")
+        return ",".join(chain) or "null"
+
+    def build_scene_router(self, log=True):
+        """
+        场景变化模式：返回 (路由, 保留分支前缀, 其余分支)；路由为两路输出的 select，每帧只计算一次场景分数
+        log 为 True 时两路各自把分数写入 SCENE_LOG_PARTS，结束后由 merge_score_logs 合并
+        """
+        router = scene_router(threshold_from_param(self.param), self.scene.min_gap, self.scene.max_gap)
+        if not log:
+            return router, "", "null"
+        kept, rest = SCENE_LOG_PARTS
+        return router, score_log_filter(kept) + ",", score_log_filter(rest)
+
+    def lowres_factor(self):
+        """缩放输出时可用的低分辨率解码因子（GPU 解码与场景变化模式不使用，后者保证分数与原分辨率一致）"""
+        if self.resize is None or self.hwaccel or self.mode == "场景变化":
+            return 0
+        info = self.video_info
+        return self.resize.lowres(info.get("codec", ""), info.get("width", 0), info.get("height", 0))
+
+    @property
+    def showinfo_checksum(self):
+        """ffmpeg 的 showinfo 不能关闭逐帧校验和时为 True（旧版本）"""
+        return not self.capabilities.has_filter_option("showinfo", "checksum")
+
+    def tap(self, name="kept"):
+        """记录输出帧时间的 showinfo"""
+        return showinfo_filter(name, self.showinfo_checksum)
+
+    def frame_rate(self):
+        """平均帧率：优先取视频信息，没有时按关键帧索引换算，都没有时为 0"""
+        fps = self.video_info.get("fps", 0) or 0
+        if fps <= 0 and self.keyframe_index is not None and self.keyframe_index.duration > 0:
+            fps = self.keyframe_index.frame_count / self.keyframe_index.duration
+        return fps
+
+    def first_frame_index(self, seek):
+        """
+        seek 位置之后第一帧在源视频中的帧号：有关键帧索引时 seek 落在关键帧上，帧号精确；
+        否则从头解码时为 0，其余按平均帧率换算，帧率未知时为 None
+        """
+        if self.keyframe_index is not None:
+            number = self.keyframe_index.keyframe_number(seek)
+            if number is not None:
+                return number
+        if seek <= TIME_EPS:
+            return 0
+        fps = self.frame_rate()
+        return math.ceil(seek * fps - TIME_EPS) if fps > 0 else None
+
+    def frame_index_at(self, t):
+        """没有源帧计数时的帧号：关键帧按索引查，否则按平均帧率换算"""
+        if self.keyframe_index is not None:
+            number = self.keyframe_index.keyframe_number(t)
+            if number is not None:
+                return number
+        fps = self.frame_rate()
+        return int(round(t * fps)) if fps > 0 else 0
+
+    def source_tap(self, seek, keyframes_only=None, consumers=1):
+        """
+        放在滤镜最前面（裁剪与抽样之前）的源帧计数，返回 (滤镜前缀, {实例名: SourceFrames})
+        只解码关键帧（帧号由关键帧索引给出）或帧号无法确定时不需要
+        """
+        if self.mode == "仅关键帧" if keyframes_only is None else keyframes_only:
+            return "", {}
+        first = self.first_frame_index(seek)
+        if first is None:
+            return "", {}
+        return self.tap("src") + ",", {"src": SourceFrames(first, consumers)}
+
+    def source_size(self):
+        """滤镜输入的 (宽, 高)，即自动旋转后的显示分辨率：取视频信息，没有时探测"""
+        width, height = self.video_info.get("width", 0), self.video_info.get("height", 0)
+        if width > 0 and height > 0:
+            return width, height
+        return probe_video(self.video_path).display_size
+
+    def frame_size(self):
+        """输出帧的 (宽, 高)：与缩放滤镜中的尺寸出自同一算法"""
+        width, height = self.source_size()
+        if self.resize is not None:
+            return self.resize.output_size(width, height)
+        return width, height
+
+    def raw_filters(self):
+        """
+        原始帧输出的最后一步：把帧固定为 frame_size，管道读取方按同一尺寸切分
+        （尺寸已相同时 scale 直接传递帧，不做计算）
+        """
+        width, height = self.frame_size()
+        return [f"scale={width}:{height}"]
+
+    def build_input(self, segment, keyframes_only=None, lowres=None):
+        """
+        输入部分的参数（seek、时长、解码选项）、需要放在滤镜最前面的裁剪前缀，以及滤镜时间零点在源视频中的时间
+        keyframes_only：是否只解码关键帧，lowres：低分辨率解码因子，默认都由本提取器的设置决定
+        """
+        input_options = self.decode_args()
+        lowres = self.lowres_factor() if lowres is None else lowres
+        if lowres:
+            # 🔹 解码器直接输出 1/2^lowres 分辨率，省去大部分解码与缩放的计算量
+            input_options += ["-lowres", str(lowres)]
+        if self.mode == "仅关键帧" if keyframes_only is None else keyframes_only:
+            # 🔹 跳过非关键帧的解码，速度接近纯解复用
+            input_options += ["-skip_frame", "nokey"]
+
+        seek, duration, prefix = segment.start, segment.duration, ""
+        # 🔹 有关键帧索引时直接 seek 到关键帧，再在滤镜里裁掉关键帧到起点之间的帧（与精确 seek 结果一致）
+        # 裁剪后不重置时间戳：滤镜中的时间仍以关键帧为零点，showinfo 得到的就是源帧的 pts
+        if self.keyframe_index is not None:
+            keyframe = self.keyframe_index.keyframe_before(segment.start)
+            seek, duration = keyframe, duration + segment.start - keyframe
+            input_options += ["-noaccurate_seek"]
+            prefix = f"trim=start={max(0.0, segment.start - keyframe - TIME_EPS):.6f},"
+
+        return [
+            *input_options,
+            "-ss", str(seek),
+            "-t", str(duration),
+            "-i", str(self.video_path),
+        ], prefix, seek
+
+    def build_job(self, segment, raw=False):
+        """一个分段的 ffmpeg 任务；raw=True 时输出 rgb24 原始帧到 stdout（交给编码线程池），-progress 改走 stderr"""
+        output_pattern = str(self.output_dir / self.layout.pattern(self.fmt))
+        input_args, prefix, seek = self.build_input(segment)
+        source, sources = self.source_tap(seek)
+        extra = [*self.raw_filters(), self.tap()] if raw else [self.tap()]
+        cmd = [str(FFMPEG_BIN), *self.global_args(), *input_args]
+        if self.mode == "场景变化":
+            # 🔹 select 按场景分数直接分成两路：[keep] 写图片，其余帧记录分数后送到 null 输出
+            router, kept, rest = self.build_scene_router()
+            graph = (f"[0:v]{source}{prefix}{router}[keep][rest];[rest]{rest}[scan];"
+                     f"[keep]{kept}{self.build_filter(extra, seek)}[out]")
+            cmd += ["-filter_complex", graph, "-map", "[out]"]
+        elif self.mode in SCAN_MODES:
+            # 🔹 拆成两路：[keep] 写图片，[scan] 送到 null 输出，-progress 的 out_time 因此反映扫描位置
+            graph = (f"[0:v]{source}{prefix}null,split[scan][keep];"
+                     f"[keep]{self.build_filter(extra, seek)}[out]")
+            cmd += ["-filter_complex", graph, "-map", "[out]"]
+        else:
+            cmd += ["-vf", source + prefix + self.build_filter(extra, seek)]
+
+        # 非末段精确限制帧数，段与段之间编号连续
+        if segment.max_frames is not None:
+            cmd += ["-frames:v", str(segment.max_frames)]
+        if raw:
+            cmd += ["-f", "rawvideo", "-pix_fmt", "rgb24", "pipe:1"]
+        else:
+            cmd += self.encode_args()
+            cmd += ["-start_number", str(segment.start_number), output_pattern]
+        if self.mode in SCAN_MODES:
+            cmd += ["-map", "[scan]", "-f", "null", "-"]
+        cmd += ["-progress", "pipe:2" if raw else "pipe:1", "-nostats"]
+        tap = Tap(segment.start_number, seek, segment.max_frames, "src" if sources else None)
+        return Job(cmd, segment.duration, segment.max_frames or 0, cwd=self.output_dir, outputs={"kept": tap},
+                   sources=sources)
+
+    def build_command(self, segment, raw=False):
+        return self.build_job(segment, raw).cmd
+
+    def run(self):
+        started = time.monotonic()
+        error = None
+        self.metrics = RuntimeMetrics()
+        log = MetricsLog(self.metrics_options.log) if self.metrics_options.log else None
+        ticking = threading.Event()
+
+        def tick():
+            while not ticking.wait(self.metrics_options.interval):
+                self.publish(log)
+
+        try:
+            if self.metrics_options.port is not None:
+                self.metrics_server = MetricsServer(self.metrics_options.port)
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            params = checkpoint_params(self)
+            range_start, kept_rows = self.start_sec, []
+            if self.resume:
+                checkpoint = read_checkpoint(self.output_dir)
+                if checkpoint is not None and checkpoint["status"] == "completed" \
+                        and checkpoint["params"] == params:
+                    self.extracted_frames = checkpoint.get("frames", 0)
+                    self._progress = 100
+                    self.emit_status("提取完成（此前已完成）")
+                    return self.result(None, time.monotonic() - started)
+                plan = plan_resume(self)
+                if plan is not None:
+                    kept_rows, range_start, next_number = plan
+                    if self.layout.naming == "time":
+                        self._final_paths.update((row[3], row[0]) for row in kept_rows)
+                    self.number_offset = next_number - 1
+                    self.resumed_from = range_start
+                    self.duration = max(1e-3, self.duration - (range_start - self.start_sec))
+                    self.emit_status(f"从 {range_start:.2f} 秒继续提取（已有 {self.number_offset} 帧）")
+            if self.cache is not None and self.resumed_from is None and self.serve_from_cache(params):
+                return self.result(None, time.monotonic() - started)
+            self.check_encoder()
+            self.manifest = ManifestWriter(self.output_dir / MANIFEST_NAME, kept_rows)
+            write_checkpoint(self.output_dir, params, "running")
+
+            if self.use_index:
+                self.emit_status("读取关键帧索引...")
+                try:
+                    self.keyframe_index = load_keyframe_index(self.video_path)
+                except Exception:
+                    self.keyframe_index = None  # 索引失败不影响提取，退回普通 seek
+
+            if self.auto_tune is not None and self.mode != TARGET_MODE:
+                self.emit_status("自动调优...")
+                self.tuning = autotune(self, range_start, self.end_sec, self.auto_tune.cores, self.auto_tune.retune,
+                                       on_status=self.emit_status)
+
+            # 计算 total_frames
+            if self.mode == "每N秒取1帧":
+                total_frames = max(1, int(self.duration / self.param))
+            elif self.mode == "仅关键帧":
+                total_frames = max(1, self.count_keyframes(range_start))
+            elif self.mode in ("场景变化", TARGET_MODE):
+                total_frames = 0  # 场景变化事先未知，进度按扫描位置计算；时间点列表由 seek 计划决定
+            else:  # 每N帧取1帧
+                fps = self.video_info.get("fps", 0)
+                if self.keyframe_index is not None:
+                    total_frames_raw = self.keyframe_index.frames_between(range_start, self.end_sec)
+                    total_frames = max(1, -(-total_frames_raw // self.param))
+                elif fps > 0:
+                    total_frames_raw = int((self.end_sec - range_start) * fps)
+                    total_frames = max(1, total_frames_raw // self.param)
+                else:
+                    total_frames = 1
+
+            # 去重需要与整个范围内的上一保留帧比较、编码线程池只接一路解码，都只能单进程连续解码
+            serial = self.dedup is not None or self.use_pipeline or self.tile is not None
+            engine, windows = ("continuous" if serial else self.engine), None
+            if self.mode == TARGET_MODE:
+                # 只检查用户选择的选项；编码线程池（包括缺少编码器时自动启用的 Pillow）由 seek 任务拼接后输出原始帧
+                if self.dedup is not None or self.tile is not None or self.container != "files":
+                    raise ValueError("时间点列表模式不支持去重、拼图与打包输出")
+                engine, windows = "seek", self.plan_target_windows(range_start)
+            elif engine != "continuous":
+                fps = self.frame_rate()
+                engine, windows = choose_engine(range_start, self.end_sec, self.mode, self.param, fps,
+                                                self.keyframe_index, self.parallel, self.start_sec)
+                if self.engine == "seek" and windows is None and fps > 0:
+                    # 指定 seek 引擎时不再估算代价；帧率未知时无法定位采样点，仍用连续解码
+                    windows = plan_seek_windows(
+                        sample_times(range_start, self.end_sec, self.mode, self.param, fps, self.start_sec),
+                        self.keyframe_index, fps)
+                    engine = "seek" if windows else "continuous"
+            self.engine_used = engine
+            if self.tile is not None:
+                total_frames = max(1, -(-total_frames // self.tile.per_sheet))  # frame= 统计的是拼图张数
+                (self.output_dir / TILES_NAME).unlink(missing_ok=True)
+
+            if engine == "seek":
+                for w in windows:
+                    w.start_number += self.number_offset
+                jobs = self.build_seek_jobs(windows, raw=self.use_pipeline)
+                total_frames = sum(job.frames for job in jobs)
+                self.emit_status(f"提取中...（逐点 seek，{len(windows)} 个窗口）")
+            else:
+                segments = plan_segments(range_start, self.end_sec, self.mode, self.param,
+                                         fps=self.video_info.get("fps", 0),
+                                         count=1 if serial else self.parallel)
+                for seg in segments:
+                    seg.start_number += self.number_offset
+                jobs = [self.build_job(seg, raw=self.use_pipeline) for seg in segments]
+                if self.container != "files":
+                    self.emit_status(f"提取中...（写入 frames.{self.container}）")
+                elif self.encoders > 0:
+                    self.emit_status(f"提取中...（{self.encoders} 个编码线程）")
+                elif len(segments) > 1:
+                    self.emit_status(f"提取中...（{len(segments)} 段并行）")
+                else:
+                    self.emit_status("提取中...")
+
+            threading.Thread(target=tick, daemon=True).start()
+
+            # 每个任务的进度：已处理的秒数、已输出的帧数
+            job_time = [0.0] * len(jobs)
+            job_frames = [0] * len(jobs)
+            by_time = engine == "continuous" and self.mode in ("每N秒取1帧", *SCAN_MODES)
+
+            def report():
+                with self._lock:
+                    if by_time:
+                        progress = min(int(sum(job_time) / self.duration * 100), 100)
+                        if self.mode == "每N秒取1帧" and len(jobs) == 1 and self.dedup is None:
+                            written = min(total_frames, int(job_time[0] / self.param))
+                        else:
+                            written = sum(job_frames)
+                        self.extracted_frames = self.number_offset + written
+                    else:
+                        written = sum(job_frames)
+                        self.extracted_frames = self.number_offset + written
+                        done = self.sampled_frames if self.dedup is not None else written
+                        progress = min(int(done / total_frames * 100), 100)
+                    self._progress = progress
+
+            # 每个任务由 showinfo 得到的 (输出序号, 源视频帧号, 源视频时间)；job_flushed 为已写入帧清单的个数
+            job_pts = [[] for _ in jobs]
+            job_flushed = [0] * len(jobs)
+
+            def flush_manifest(i, upto=None):
+                """把任务 i 中输出序号小于 upto（已由 ffmpeg 完整写出）的帧写入帧清单，供断点续提使用"""
+                pending = job_pts[i][job_flushed[i]:]
+                if upto is not None:
+                    pending = [f for f in pending if f[0] < upto]
+                job_flushed[i] += len(pending)
+                self.write_manifest(pending)
+
+            def on_line(i, line):
+                self.metrics.update(i, line)
+                frame = jobs[i].feed(line, self.frame_index_at) if line.startswith("[") else None
+                if frame is not None:
+                    job_pts[i].append(frame[1:])
+
+                elif self.dedup is not None and line.startswith("[Parsed_showinfo") and "] n:" in line:
+                    with self._lock:
+                        self.sampled_frames += 1
+                    if not by_time:
+                        report()
+
+                elif line.startswith("out_time_ms="):
+                    try:
+                        job_time[i] = min(int(line[len("out_time_ms="):]) / 1e6, jobs[i].duration)
+                    except ValueError:
+                        return
+                    if by_time:
+                        report()
+
+                elif line.startswith("frame="):
+                    try:
+                        frames = int(line[len("frame="):])
+                    except ValueError:
+                        return
+                    kept_before = job_frames[i]
+                    job_frames[i] = min(frames, jobs[i].frames) if jobs[i].frames else frames
+                    if "kept" in jobs[i].outputs and not self.use_pipeline and self.tile is None:
+                        flush_manifest(i, jobs[i].outputs["kept"].start_number + job_frames[i])
+                    if not by_time:
+                        report()
+                    elif self.mode == "场景变化" and job_frames[i] != kept_before:
+                        self.emit_status(f"场景检测中...已保留 {sum(job_frames)} 帧")
+
+            def on_done(i):
+                if engine == "seek":
+                    job_frames[i] = jobs[i].frames
+                    report()
+                flush_manifest(i)
+
+            if self.use_pipeline:
+                # 编码线程池只接一路原始帧：逐个运行任务（seek 任务的各窗口已在进程内按序拼接）
+                for i, job in enumerate(jobs):
+                    if self._stop:
+                        break
+                    start_number = min(tap.start_number for tap in job.outputs.values())
+                    sizes, names = self.run_pipeline(job, on_line, start_number, index=i)
+                    if engine == "seek" and not self._stop:
+                        job_frames[i] = job.frames
+                        report()
+                    self.write_manifest(job_pts[i], sizes, names)
+            else:
+                self.run_jobs(jobs, on_line, on_done)
+
+            if self.mode == "场景变化":
+                # 两路分数日志合并为相对提取起点的 scene_scores.txt；续提时保留续提点之前的记录，新记录接在其后
+                merge_score_logs(self.output_dir, jobs[0].outputs["kept"].origin - self.start_sec,
+                                 None if self.resumed_from is None else self.resumed_from - self.start_sec)
+
+            if self._stop:
+                self._terminate_all()
+                write_checkpoint(self.output_dir, params, "stopped", self.manifest.rows)
+                self.emit_status("已终止处理")
+            elif self.failed_jobs:
+                error = f"ffmpeg 异常退出（{len(self.failed_jobs)}/{len(jobs)} 个进程）"
+                write_checkpoint(self.output_dir, params, "error", self.manifest.rows)
+                self.emit_status(f"提取错误: {error}")
+            else:
+                with self._lock:
+                    self._progress = 100
+                if self.mode == TARGET_MODE:
+                    write_target_index(self.output_dir / TARGETS_NAME, self.target_requests(), self.target_mapping,
+                                       FrameManifest.load(self.manifest.path).rows)
+                done = "提取完成"
+                if self.layout_failures:
+                    done += f"（{self.layout_failures} 个文件未能移动到布局位置，保留在原处：{self.layout_error}）"
+                self.emit_status(done)
+                if self.tile is not None:
+                    self.extracted_frames = sum(len(pts) for pts in job_pts)
+                # 保底统计帧数：以帧清单为准，不再扫描输出目录
+                if self.extracted_frames <= 0:
+                    self.extracted_frames = self.manifest.rows
+                write_checkpoint(self.output_dir, params, "completed", self.extracted_frames)
+                if self.cache is not None and not self.layout_failures:
+                    self.manifest.close()
+                    self.emit_status("提取完成，写入结果缓存...")
+                    self.cache.store(self, self.extracted_frames)
+                    self.emit_status(done)
+
+        except Exception as e:
+            self._terminate_all()
+            error = str(e)
+            self.emit_status(f"提取错误: {e}")
+        finally:
+            ticking.set()
+            self.publish(log)  # 最终快照
+            if self.manifest is not None:
+                self.manifest.close()
+            if log is not None:
+                log.close()
+            if self.metrics_server is not None:
+                self.metrics_server.close()
+                self.metrics_server = None
+
+        return self.result(error, time.monotonic() - started)
+
+    def serve_from_cache(self, params):
+        """结果缓存命中时把输出复制到输出目录并返回 True；未命中或复制失败时返回 False，照常提取"""
+        try:
+            hit = self.cache.lookup(self)
+            if hit is None:
+                return False
+            self.emit_status("从结果缓存复制...")
+            self.extracted_frames = self.cache.serve(hit, self)
+        except (OSError, ValueError, KeyError):
+            return False
+        self.cache_hit = hit
+        self.engine_used = "cache"
+        write_checkpoint(self.output_dir, params, "completed", self.extracted_frames)
+        with self._lock:
+            self._progress = 100
+        self.emit_status("提取完成（结果缓存）")
+        return True
+
+    def write_manifest(self, frames, sizes=None, names=None):
+        """
+        把一个任务的 (输出序号, 源视频帧号, 源视频时间) 写入帧清单
+        sizes / names：Python 端写出时由编码管线提供；否则按 ffmpeg 写出的文件名读取文件大小
+        布局需要分目录或按时间命名时，文件在此移动到最终位置（此时帧已完整写出、时间已知）
+        拼图输出时 frames 为各格的帧，格的位置写入 tiles.csv，帧清单每行对应一张拼图
+        """
+        if self.tile is not None:
+            frames = self.write_tiles(frames)
+        rows = []
+        for number, index, pts in sorted(frames):
+            if sizes is not None:
+                if number not in sizes:
+                    continue
+                path, size = names(number), sizes[number]
+            else:
+                path = self.layout.staged_name(number, self.fmt)
+                try:
+                    size = (self.output_dir / path).stat().st_size
+                except OSError:
+                    continue
+            if not self.layout.direct and self.container == "files":
+                final = self.final_path(number, pts)
+                try:
+                    if final != path:  # 编码线程池已按编号直接写到最终位置时不需要移动
+                        self.place_file(path, final)
+                    path = final
+                except OSError as e:
+                    # 🔹 移动失败时文件仍在 ffmpeg 写出的位置：按该路径记入清单，不丢失这一帧
+                    self.layout_failures += 1
+                    self.layout_error = f"{path} -> {final}: {e}"
+            rows.append((number, index, pts, path, size))
+        self.manifest.write_rows(rows)
+
+    def final_path(self, number, pts):
+        """第 number 帧在布局中的最终路径；按时间命名时与其他帧重名则加上输出序号"""
+        path = self.layout.path(number, pts, self.fmt)
+        if self.layout.naming != "time":
+            return path
+        with self._lock:
+            if self._final_paths.setdefault(path, number) != number:
+                path = self.layout.disambiguated(path, number)
+                self._final_paths[path] = number
+        return path
+
+    def place_file(self, staged, final):
+        """把 ffmpeg 写出的文件移动到布局中的最终位置（同一文件系统内的改名，与文件大小无关）"""
+        target = self.output_dir / final
+        if target.parent not in self._layout_dirs:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            self._layout_dirs.add(target.parent)
+        os.replace(self.output_dir / staged, target)
+
+    def target_requests(self):
+        return self.targets.requests if self.targets is not None else None
+
+    def plan_target_windows(self, range_start):
+        """
+        时间点列表模式的 seek 窗口：目标对齐到帧、去重排序后合并，同一 GOP 内的目标共用一次 seek 与解码
+        续提时只包含 range_start 之后的目标
+        """
+        fps = self.frame_rate()
+        targets = self.targets
+        requests = targets.times if targets.times is not None else frames_to_times(targets.frames, fps)
+        times, self.target_mapping = snap_targets(requests, fps, self.start_sec, self.end_sec)
+        windows = plan_seek_windows(times[bisect.bisect_left(times, range_start):], self.keyframe_index, fps)
+        self.target_windows = len(windows)
+        return windows
+
+    def write_tiles(self, frames):
+        """把各格写入 tiles.csv，返回每张拼图的 (拼图序号, 第一格的帧号, 第一格的时间)"""
+        rows, sheets = [], {}
+        for number, index, pts in sorted(frames):
+            sheet, row, column = self.tile.position(number)
+            sheets.setdefault(sheet, (index, pts))
+            path = self.final_path(sheet, sheets[sheet][1]) if self.container == "files" \
+                else self.layout.staged_name(sheet, self.fmt)
+            rows.append((sheet, path, row, column, number, index, pts))
+        write_tile_index(self.output_dir / TILES_NAME, rows)
+        return [(sheet, *first) for sheet, first in sheets.items()]
+
+    def result(self, error=None, elapsed=0.0):
+        """提取结果（可直接 json.dumps）"""
+        if self._stop:
+            status = "stopped"
+        elif error:
+            status = "error"
+        else:
+            status = "completed"
+        result = {
+            "status": status,
+            "error": error,
+            "video": str(self.video_path),
+            "output_dir": str(self.output_dir),
+            "mode": self.mode,
+            "param": self.param,
+            "format": self.fmt,
+            "quality": self.quality,
+            "start_sec": self.start_sec,
+            "end_sec": self.end_sec,
+            "resumed_from": self.resumed_from,
+            "engine": self.engine_used,
+            "parallel": self.parallel,
+            "frames": self.extracted_frames,
+            "elapsed": round(elapsed, 3),
+        }
+        if self.resize is not None:
+            result["resize"] = self.resize.to_dict()
+        if not self.layout.default:
+            result["layout"] = self.layout.to_dict()
+        if self.tuning is not None:
+            result["tuning"] = self.tuning.to_dict()
+        if self.mode == TARGET_MODE:
+            result["targets"] = {
+                "requested": len(self.target_requests()),
+                "windows": self.target_windows,
+                "index": str(self.output_dir / TARGETS_NAME),
+            }
+        if self.tile is not None:
+            result["tile"] = {**self.tile.to_dict(), "sheets": self.manifest.rows if self.manifest else 0,
+                              "index": str(self.output_dir / TILES_NAME)}
+        if self.dedup is not None:
+            result["dedup"] = {
+                "sampled": self.sampled_frames,
+                "written": self.extracted_frames,
+                "dropped": max(0, self.sampled_frames - self.extracted_frames),
+            }
+        if self.cache_hit is not None:
+            result["cache"] = {"entry": str(self.cache_hit.entry), "exact": self.cache_hit.exact}
+            result["manifest"] = str(self.output_dir / MANIFEST_NAME)
+        if self.manifest is not None:
+            result["manifest"] = str(self.manifest.path)
+        if self.container_path is not None:
+            result["container"] = str(self.container_path)
+        if self.mode == "场景变化":
+            result["score_log"] = str(self.output_dir / SCENE_LOG_NAME)
+        if self.layout_failures:
+            result["layout_failures"] = {"files": self.layout_failures, "last_error": self.layout_error}
+        return result
+
+    def count_keyframes(self, start=None):
+        """预估关键帧模式的输出帧数：有索引时按同样的稀疏规则模拟，否则按 N 秒或 2 秒一个关键帧估算"""
+        start = self.start_sec if start is None else start
+        if self.keyframe_index is None:
+            return int(self.duration / max(self.param, 2))
+        count, last = 0, None
+        for t in self.keyframe_index.keyframes:
+            if t < start or t >= self.end_sec:
+                continue
+            if last is None or self.param <= 0 or t - last >= self.param:
+                count, last = count + 1, t
+        return count
+
+    def build_seek_jobs(self, windows, raw=False):
+        """
+        逐点 seek 引擎：每个窗口一路输入（快速 seek 到窗口起点），多个窗口合并到同一进程
+        raw=True 时各窗口按顺序拼接为一路 rgb24 原始帧输出到 stdout（交给编码线程池），-progress 改走 stderr
+        """
+        fps = self.frame_rate()
+        if fps <= 0:
+            raise ValueError("视频帧率未知，无法使用逐点 seek 引擎")
+        output_pattern = str(self.output_dir / self.layout.pattern(self.fmt))
+        lowres = self.lowres_factor()
+        scale = "".join("," + f for f in self.resize.filters(*self.source_size())) if self.resize is not None else ""
+        if raw:
+            scale += "".join("," + f for f in self.raw_filters())
+
+        def seek_point(w):
+            # 有关键帧索引时快速 seek 到关键帧（源帧号因此精确），否则精确 seek 到窗口起点前一帧
+            if self.keyframe_index is not None:
+                return self.keyframe_index.keyframe_before(w.start)
+            return max(0.0, w.start - 1 / fps)
+
+        jobs = []
+        for i in range(0, len(windows), WINDOWS_PER_PROCESS):
+            batch = windows[i:i + WINDOWS_PER_PROCESS]
+            seeks = [seek_point(w) for w in batch]
+            cmd = [str(FFMPEG_BIN), *self.global_args()]
+            for w, seek in zip(batch, seeks):
+                cmd += self.decode_args()
+                if lowres:
+                    cmd += ["-lowres", str(lowres)]
+                if self.keyframe_index is not None:
+                    cmd += ["-noaccurate_seek"]
+                cmd += ["-ss", f"{seek:.6f}", "-t", f"{w.end - seek + 2 / fps:.6f}", "-i", str(self.video_path)]
+            outputs, sources, graph = {}, {}, []
+            for n, (w, seek) in enumerate(zip(batch, seeks)):
+                name, source = f"w{n}", f"s{n}"
+                first = self.first_frame_index(seek)
+                if first is not None:
+                    sources[source] = SourceFrames(first)
+                outputs[name] = Tap(w.start_number, seek, len(w.targets), source if first is not None else None)
+                chain = (f"{self.tap(source) + ',' if first is not None else ''}"
+                         f"{window_select(w, seek, fps, self.mode)}{scale},{self.tap(name)}")
+                if raw:
+                    graph.append(f"[{n}:v:0]{chain},trim=end_frame={len(w.targets)}[v{n}]")
+                    continue
+                cmd += ["-map", f"{n}:v:0", "-vf", chain]
+                cmd += self.encode_args()
+                cmd += ["-frames:v", str(len(w.targets)), "-start_number", str(w.start_number), output_pattern]
+            if raw:
+                labels = "".join(f"[v{n}]" for n in range(len(batch)))
+                graph.append(f"{labels}concat=n={len(batch)}:v=1:a=0,setpts=N/FRAME_RATE/TB[out]")
+                cmd += ["-filter_complex", ";".join(graph), "-map", "[out]",
+                        "-f", "rawvideo", "-pix_fmt", "rgb24", "pipe:1"]
+            cmd += ["-progress", "pipe:2" if raw else "pipe:1", "-nostats"]
+            jobs.append(Job(cmd, sum(w.end - w.start for w in batch), sum(len(w.targets) for w in batch),
+                            outputs=outputs, sources=sources))
+        return jobs
+
+    def run_jobs(self, jobs, on_line, on_done):
+        """最多同时运行 self.parallel 个 ffmpeg 进程，逐行回调 -progress 输出"""
+        # ✅ Windows 下禁止弹出黑框
+        creation_flags = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+        pending = list(enumerate(jobs))
+
+        def worker():
+            while not self._stop:
+                with self._lock:
+                    if not pending or self._stop:
+                        return
+                    i, job = pending.pop(0)
+                    proc = subprocess.Popen(
+                        job.cmd,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.STDOUT,
+                        text=True,
+                        encoding="utf-8",
+                        errors="ignore",
+                        bufsize=1,
+                        universal_newlines=True,
+                        creationflags=creation_flags,
+                        cwd=job.cwd,
+                        shell=False
+                    )
+                    self.procs.append(proc)
+
+                for line in iter(proc.stdout.readline, ''):
+                    if self._stop:
+                        break
+                    on_line(i, line.strip())
+                proc.wait()
+                if not self._stop:
+                    if proc.returncode != 0:
+                        self.failed_jobs.append(i)
+                    on_done(i)
+
+        runners = [threading.Thread(target=worker, daemon=True) for _ in range(min(self.parallel, len(jobs)))]
+        for runner in runners:
+            runner.start()
+        for runner in runners:
+            runner.join()
+
+    def run_pipeline(self, job, on_line, start_number=1, index=0):
+        """单个 ffmpeg 解码出原始帧，编码线程池写入输出容器；-progress 与日志从 stderr 逐行回调（任务序号为 index）"""
+        width, height = self.frame_size()
+        sink = open_sink(self.container, self.output_dir, self.fmt, width, height, layout=self.layout)
+        if self.container != "files":
+            self.container_path = sink.path
+        pipeline = EncodePipeline(sink, self.fmt, self.quality, width, height, workers=self.encoders or None,
+                                  start_number=start_number)
+        self._pipeline = pipeline
+
+        creation_flags = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+        with self._lock:
+            if self._stop:
+                sink.close()
+                return {}, sink.entry_name
+            proc = subprocess.Popen(
+                job.cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                stdin=subprocess.DEVNULL,
+                creationflags=creation_flags,
+                cwd=job.cwd,
+                shell=False
+            )
+            self.procs.append(proc)
+
+        def read_log():
+            for line in iter(proc.stderr.readline, b""):
+                if self._stop:
+                    break
+                on_line(index, line.decode("utf-8", errors="ignore").strip())
+
+        log_reader = threading.Thread(target=read_log, daemon=True)
+        log_reader.start()
+        try:
+            pipeline.run(proc.stdout, stopped=lambda: self._stop)
+        finally:
+            if proc.poll() is None and (self._stop or pipeline.error is not None):
+                proc.terminate()
+            proc.wait()
+            log_reader.join()
+        with self._lock:
+            self.extracted_frames = max(self.extracted_frames, start_number - 1 + pipeline.written)
+        if not self._stop and proc.returncode != 0:
+            self.failed_jobs.append(index)
+        return pipeline.sizes, sink.entry_name
+
+    def _terminate_all(self):
+        with self._lock:
+            for proc in self.procs:
+                if proc.poll() is None:
+                    proc.terminate()
+
+    def stop(self):
+        self._stop = True
+        self._terminate_all()
+        self.emit_status("已终止处理")
@@ -0,0 +1,183 @@
+import bisect
+import itertools
+import json
+import subprocess
+import sys
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+
+from core.util import FFPROBE_BIN, get_cache_dir, file_cache_key
+
+INDEX_VERSION = 2
+
+
+@dataclass
+class KeyframeIndex:
+    """视频关键帧索引：关键帧时间戳、每个 GOP 的帧数、总帧数"""
+    keyframes: list = field(default_factory=list)  # 关键帧 pts（秒），升序
+    gop_frames: list = field(default_factory=list)  # 第 i 个关键帧开始的 GOP 包含的帧数
+    frame_count: int = 0
+    duration: float = 0.0
+
+    @property
+    def gop_length(self) -> float:
+        """平均 GOP 长度（帧）"""
+        return self.frame_count / len(self.keyframes) if self.keyframes else 0.0
+
+    @property
+    def gop_seconds(self) -> float:
+        """平均 GOP 时长（秒）"""
+        return self.duration / len(self.keyframes) if self.keyframes else 0.0
+
+    @property
+    def max_gop_seconds(self) -> float:
+        if len(self.keyframes) < 2:
+            return self.duration
+        gaps = [b - a for a, b in zip(self.keyframes, self.keyframes[1:])]
+        return max(max(gaps), self.duration - self.keyframes[-1])
+
+    def keyframe_before(self, t: float) -> float:
+        """返回 <= t 的最后一个关键帧时间；t 在首个关键帧之前时返回 0"""
+        i = bisect.bisect_right(self.keyframes, t + 1e-6) - 1
+        return self.keyframes[i] if i >= 0 else 0.0
+
+    def keyframe_number(self, t: float):
+        """时间 t 处的关键帧在源视频中的帧号（按显示顺序，从 0 开始）；t 不是关键帧时返回 None"""
+        i = bisect.bisect_right(self.keyframes, t + 1e-3) - 1
+        if i < 0 or abs(self.keyframes[i] - t) > 1e-3:
+            return None
+        starts = self.__dict__.get("_starts")
+        if starts is None:
+            # 第一个关键帧之前的帧（不属于任何 GOP）排在最前面
+            leading = max(0, self.frame_count - sum(self.gop_frames))
+            starts = self.__dict__["_starts"] = list(itertools.accumulate(self.gop_frames, initial=leading))
+        return starts[i]
+
+    def gops_between(self, start: float, end: float) -> int:
+        """[start, end] 范围内需要解码的 GOP 个数"""
+        if not self.keyframes:
+            return 0
+        first = max(0, bisect.bisect_right(self.keyframes, start + 1e-6) - 1)
+        last = max(first, bisect.bisect_left(self.keyframes, end) - 1)
+        return last - first + 1
+
+    def frames_between(self, start: float, end: float) -> int:
+        """估算 [start, end] 内的帧数（按 GOP 粒度累加后按时间比例修正首尾）"""
+        if not self.keyframes or end <= start:
+            return 0
+        total = 0
+        for i, kf in enumerate(self.keyframes):
+            gop_end = self.keyframes[i + 1] if i + 1 < len(self.keyframes) else self.duration
+            if gop_end <= start or kf >= end or gop_end <= kf:
+                continue
+            overlap = min(end, gop_end) - max(start, kf)
+            total += self.gop_frames[i] * overlap / (gop_end - kf)
+        return int(round(total))
+
+
+def _index_path(video_path: Path) -> Path:
+    return get_cache_dir("keyframes") / f"{file_cache_key(video_path)}.json"
+
+
+def build_keyframe_index(video_path: Path) -> KeyframeIndex:
+    """
+    用 ffprobe 读取视频流的全部数据包（只解复用、不解码）建立索引
+    时间以容器的 start_time 为零点：ffmpeg 的 -ss 也是相对 start_time 的，视频流晚于音频开始时两者一致
+    """
+    cmd = [
+        str(FFPROBE_BIN), "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,dts_time,flags:format=start_time",
+        "-of", "csv=p=0",
+        str(video_path)
+    ]
+    # Windows 下禁止弹出黑框
+    creation_flags = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        encoding="utf-8",
+        errors="ignore",
+        creationflags=creation_flags,
+        shell=False
+    )
+
+    keyframes = []
+    packet_times = []
+    start_time = None
+    for line in proc.stdout:
+        parts = line.strip().split(",")
+        if len(parts) == 1:
+            # format 段只有 start_time 一列
+            try:
+                start_time = float(parts[0])
+            except ValueError:
+                pass
+            continue
+        if len(parts) < 3:
+            continue
+        pts, dts, flags = parts[0], parts[1], parts[2]
+        try:
+            t = float(pts if pts not in ("", "N/A") else dts)
+        except ValueError:
+            continue
+        packet_times.append(t)
+        if "K" in flags:
+            keyframes.append(t)
+    proc.wait()
+    if proc.returncode != 0 or not packet_times:
+        raise RuntimeError("无法读取视频数据包")
+
+    # 时间戳换算为相对容器 start_time 的时间（与 ffmpeg -ss 的语义一致）；容器没有 start_time 时退回最早的数据包
+    origin = start_time if start_time is not None else min(packet_times)
+    keyframes = sorted(t - origin for t in keyframes)
+    packet_times = sorted(t - origin for t in packet_times)
+    gop_frames = []
+    for i, kf in enumerate(keyframes):
+        lo = bisect.bisect_left(packet_times, kf)
+        hi = bisect.bisect_left(packet_times, keyframes[i + 1]) if i + 1 < len(keyframes) else len(packet_times)
+        gop_frames.append(hi - lo)
+
+    # 最后一帧的结束时间按平均帧间隔补齐
+    frame_step = (packet_times[-1] - packet_times[0]) / max(1, len(packet_times) - 1)
+    return KeyframeIndex(
+        keyframes=keyframes,
+        gop_frames=gop_frames,
+        frame_count=len(packet_times),
+        duration=packet_times[-1] + frame_step,
+    )
+
+
+def load_keyframe_index(video_path: Path, build=True):
+    """
+    读取磁盘缓存的关键帧索引（按 路径 + 大小 + 修改时间 失效），没有缓存时按需建立
+    build=False 时只查缓存，未命中返回 None
+    """
+    video_path = Path(video_path)
+    try:
+        cache_file = _index_path(video_path)
+    except OSError:
+        return None
+
+    if cache_file.is_file():
+        try:
+            data = json.loads(cache_file.read_text(encoding="utf-8"))
+            if data.pop("version", None) == INDEX_VERSION:
+                return KeyframeIndex(**data)
+        except (ValueError, TypeError):
+            pass
+
+    if not build:
+        return None
+
+    index = build_keyframe_index(video_path)
+    try:
+        tmp = cache_file.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"version": INDEX_VERSION, **asdict(index)}), encoding="utf-8")
+        tmp.replace(cache_file)
+    except OSError:
+        pass
+    return index
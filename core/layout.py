@@ -0,0 +1,95 @@
+"""
+输出目录布局：文件名编号宽度、按帧数分子目录、按时间命名
+- 编号宽度按本次计划输出的帧数（上限）确定（至少 5 位），超过 99,999 帧时文件名仍按字典序排列；不超过时与原来的 frame_%05d 相同
+- 分目录：第 n 帧放在 n // K 号子目录中（如 K=1000 时 00012/frame_0012345.png），每个目录最多 K 个文件
+- 按时间命名：t<秒>.<毫秒>（如 t00083.250.png），秒数按提取范围的结束时间定宽
+ffmpeg 先按编号写到输出目录根部（frame_%0Nd），每帧写完并记入帧清单时随即移动到最终位置；编码线程池直接写到最终子目录，
+按时间命名时在该目录内改名。时间取整到同一毫秒的两帧，后一帧的文件名加上输出序号，同一次提取的布局完全确定
+"""
+import argparse
+from dataclasses import dataclass, replace
+
+NAMINGS = ("number", "time")
+MIN_DIGITS = 5
+
+
+@dataclass
+class OutputLayout:
+    shard: int = 0  # 每个子目录的帧数，0 为不分目录
+    naming: str = "number"  # number：按输出序号；time：按源视频时间
+    digits: int = MIN_DIGITS  # 输出序号位数
+    dir_digits: int = MIN_DIGITS  # 子目录编号位数
+    time_digits: int = MIN_DIGITS  # 时间命名中整数秒的位数
+
+    def __post_init__(self):
+        if self.shard < 0:
+            raise ValueError(f"每个子目录的帧数无效：{self.shard}")
+        if self.naming not in NAMINGS:
+            raise ValueError(f"未知的命名方式：{self.naming}（可选 {', '.join(NAMINGS)}）")
+
+    def fitted(self, count, end_time=0.0):
+        """按计划输出的帧数（上限）与最大的源视频时间确定各部分的宽度，返回新的布局"""
+        count = max(1, int(count))
+        digits = max(MIN_DIGITS, len(str(count)))
+        dir_digits = max(MIN_DIGITS, len(str(count // self.shard))) if self.shard else MIN_DIGITS
+        time_digits = max(MIN_DIGITS, len(str(int(end_time))))
+        return replace(self, digits=digits, dir_digits=dir_digits, time_digits=time_digits)
+
+    @property
+    def direct(self):
+        """ffmpeg 写出的文件名就是最终文件名（不需要移动）"""
+        return self.shard == 0 and self.naming == "number"
+
+    @property
+    def default(self):
+        """与原来的 frame_%05d 平铺布局相同"""
+        return self.direct and self.digits == MIN_DIGITS
+
+    def staged_name(self, number, fmt):
+        """ffmpeg 按编号写出的文件名"""
+        return f"frame_{number:0{self.digits}d}.{fmt}"
+
+    def pattern(self, fmt):
+        """ffmpeg image2 的文件名模板"""
+        return f"frame_%0{self.digits}d.{fmt}"
+
+    def path(self, number, pts, fmt):
+        """第 number 帧（源视频时间 pts）相对输出目录的最终路径"""
+        if self.naming == "time":
+            millis = int(round(pts * 1000))
+            name = f"t{millis // 1000:0{self.time_digits}d}.{millis % 1000:03d}.{fmt}"
+        else:
+            name = self.staged_name(number, fmt)
+        if self.shard:
+            return f"{number // self.shard:0{self.dir_digits}d}/{name}"
+        return name
+
+    def sink_path(self, number, fmt):
+        """
+        只知道输出序号时（编码线程池写出）的路径：按编号命名时就是最终路径；
+        按时间命名时是最终子目录中的编号文件名，记入帧清单（时间已知）时在同一目录内改名
+        """
+        if self.naming == "number":
+            return self.path(number, 0.0, fmt)
+        name = self.staged_name(number, fmt)
+        if self.shard:
+            return f"{number // self.shard:0{self.dir_digits}d}/{name}"
+        return name
+
+    def disambiguated(self, path, number):
+        """两帧的时间取整到同一毫秒、得到同一文件名时，在扩展名前加输出序号"""
+        stem, _, ext = path.rpartition(".")
+        return f"{stem}_{number:0{self.digits}d}.{ext}"
+
+    def to_dict(self):
+        return {"shard": self.shard, "naming": self.naming, "digits": self.digits}
+
+
+def shard_size(value: str):
+    try:
+        size = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无法解析每个子目录的帧数：{value}")
+    if size < 0:
+        raise argparse.ArgumentTypeError(f"每个子目录的帧数无效：{value}")
+    return size
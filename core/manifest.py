@@ -0,0 +1,189 @@
+"""
+帧清单：每次提取在输出目录写出 frames.csv，记录每张输出图片对应的源视频帧
+列：number（输出序号）, index（源视频帧号）, pts（源视频中的时间，秒）, path（相对输出目录）, bytes（字节数）
+时间来自 ffmpeg showinfo 的逐帧 pts（按滤镜的时间基准换算），帧号来自滤镜最前面另一个 showinfo 对源帧的逐帧计数，
+而不是按模式与参数反推
+python -m core.manifest <frames.csv> [-t 秒 ...] [-n 帧号 ...]
+"""
+import argparse
+import bisect
+import csv
+import json
+import re
+import sys
+import threading
+from collections import namedtuple
+from fractions import Fraction
+from pathlib import Path
+
+MANIFEST_NAME = "frames.csv"
+COLUMNS = ("number", "index", "pts", "path", "bytes")
+
+# showinfo 日志行形如 "[<实例名> @ 0x...] n:   3 pts:  38400 pts_time:1.2"，初始化时输出 "config in time_base: 1/12800"
+# 带名字的实例（showinfo@kept）在不同 ffmpeg 版本中显示为 "kept" 或 "showinfo@kept"，统一取 @ 之后的部分
+_SHOWINFO_LINE = re.compile(
+    r"^\[([\w@]+) @ [^\]]*\] n:\s*(\d+)(?:\s+pts:\s*(-?\d+))?.*?pts_time:\s*(-?[\d.]+(?:e[+-]?\d+)?)")
+_SHOWINFO_CONFIG = re.compile(r"^\[([\w@]+) @ [^\]]*\] config in time_base:\s*(\d+)/(\d+)")
+# 时间比较的容差（秒），远小于一帧
+TIME_EPS = 1e-4
+
+# 一行 showinfo：实例名、该实例的帧序号、pts_time（6 位有效数字）、整数 pts（没有时为 None）
+ShowinfoFrame = namedtuple("ShowinfoFrame", "name n time pts")
+
+
+def showinfo_filter(name="kept", checksum=True):
+    """checksum=False 时不计算每帧的校验和（需要 ffmpeg 支持 showinfo 的 checksum 选项）"""
+    return f"showinfo@{name}" + ("" if checksum else "=checksum=0")
+
+
+def parse_showinfo(line):
+    """解析带名字的 showinfo 日志行，返回 ShowinfoFrame 或 None"""
+    match = _SHOWINFO_LINE.match(line)
+    if match is None:
+        return None
+    pts = match.group(3)
+    return ShowinfoFrame(match.group(1).split("@")[-1], int(match.group(2)), float(match.group(4)),
+                         int(pts) if pts is not None else None)
+
+
+def parse_showinfo_config(line):
+    """解析 showinfo 的输入时间基准，返回 (名字, Fraction) 或 None"""
+    match = _SHOWINFO_CONFIG.match(line)
+    if match is None or int(match.group(3)) == 0:
+        return None
+    return match.group(1).split("@")[-1], Fraction(int(match.group(2)), int(match.group(3)))
+
+
+class SourceFrames:
+    """
+    源帧编号：滤镜最前面的 showinfo 逐帧记录 pts，输出帧按相同的 pts 查到它是 seek 之后的第几帧
+    first_index 为 seek 位置第一帧在源视频中的帧号；seek 位置之前的帧（时间为负）不计数
+    多路输出（consumers 路）各自向后查找，所有输出都查过的帧即丢弃，内存只与相邻两个输出帧的间隔有关
+    """
+
+    def __init__(self, first_index, consumers=1):
+        self.first_index = first_index
+        self._keys = []
+        self._dropped = 0
+        self._cursors = [0] * consumers
+
+    def add(self, key, time):
+        if time >= -TIME_EPS:
+            self._keys.append(key)
+
+    def index(self, key, consumer=0):
+        """pts 为 key 的帧在源视频中的帧号，没有记录时返回 None"""
+        i = self._cursors[consumer] - self._dropped
+        while i < len(self._keys) and self._keys[i] < key:
+            i += 1
+        if i == len(self._keys) or self._keys[i] != key:
+            return None
+        position = self._dropped + i
+        self._cursors[consumer] = position + 1
+        done = min(self._cursors) - self._dropped
+        if done > 1024 and done * 2 > len(self._keys):
+            del self._keys[:done]
+            self._dropped += done
+        return self.first_index + position
+
+
+class ManifestWriter:
+    """流式写出 CSV，可在多个线程中调用 write_rows；rows 为续提时保留的已有行"""
+
+    def __init__(self, path, rows=()):
+        self.path = Path(path)
+        self.rows = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+        self._file = open(self.path, "w", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(COLUMNS)
+        if rows:
+            self.write_rows(rows)
+
+    def write_rows(self, rows):
+        """rows: [(number, index, pts, path, bytes), ...]"""
+        with self._lock:
+            for number, index, pts, path, size in rows:
+                self._writer.writerow((number, index, f"{pts:.6f}", path, size))
+                self.rows += 1
+                self.bytes += size
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+class FrameManifest:
+    """
+    读取 frames.csv 作为索引：
+    - by_number(n)：按输出序号取行，序号连续时 O(1)
+    - frame_at(t)：离时间 t 最近的输出帧（二分查找）
+    """
+
+    def __init__(self, rows):
+        self.rows = sorted(rows, key=lambda r: r[0])
+        self.numbers = [r[0] for r in self.rows]
+        self._by_time = sorted(self.rows, key=lambda r: r[2])
+        self._times = [r[2] for r in self._by_time]
+        first = self.numbers[0] if self.numbers else 1
+        self._contiguous = self.numbers == list(range(first, first + len(self.numbers)))
+        self._first = first
+
+    @classmethod
+    def load(cls, path):
+        path = Path(path)
+        if path.is_dir():
+            path = path / MANIFEST_NAME
+        rows = []
+        with open(path, encoding="utf-8", newline="") as f:
+            for record in csv.DictReader(f):
+                rows.append((int(record["number"]), int(record["index"]), float(record["pts"]),
+                             record["path"], int(record["bytes"] or 0)))
+        return cls(rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def by_number(self, number):
+        if self._contiguous:
+            i = number - self._first
+            if 0 <= i < len(self.rows):
+                return self.rows[i]
+            return None
+        i = bisect.bisect_left(self.numbers, number)
+        return self.rows[i] if i < len(self.numbers) and self.numbers[i] == number else None
+
+    def frame_at(self, t):
+        if not self._times:
+            return None
+        i = bisect.bisect_left(self._times, t)
+        if i == len(self._times) or (i > 0 and t - self._times[i - 1] <= self._times[i] - t):
+            i -= 1
+        return self._by_time[i]
+
+
+def row_dict(row):
+    return dict(zip(COLUMNS, row)) if row is not None else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m core.manifest", description="按时间或帧号查询帧清单")
+    parser.add_argument("manifest", type=Path, help=f"帧清单（{MANIFEST_NAME}）或其所在的输出目录")
+    parser.add_argument("-t", "--time", type=float, action="append", default=[], help="查询离该时间（秒）最近的帧")
+    parser.add_argument("-n", "--number", type=int, action="append", default=[], help="查询该输出序号的帧")
+    args = parser.parse_args(argv)
+
+    manifest = FrameManifest.load(args.manifest)
+    print(json.dumps({
+        "frames": len(manifest),
+        "times": [row_dict(manifest.frame_at(t)) for t in args.time],
+        "numbers": [row_dict(manifest.by_number(n)) for n in args.number],
+    }, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
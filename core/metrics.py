@@ -0,0 +1,204 @@
+"""
+运行时指标：汇总 ffmpeg -progress 的各字段与 Python 端的写出字节、进程 CPU / 内存，按固定频率生成快照
+- 快照通过回调交给 GUI / 命令行，可写成 JSON 行日志
+- 可选地在本机端口提供 Prometheus 文本格式（GET /metrics）
+进程 CPU / 内存优先用 psutil（可选依赖），否则在 Linux 上读 /proc，其他平台为 null
+"""
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# -progress 中需要保留的字段
+PROGRESS_KEYS = ("frame", "fps", "bitrate", "total_size", "out_time_ms", "dup_frames", "drop_frames", "speed")
+
+
+@dataclass
+class MetricsOptions:
+    """指标输出：快照间隔（秒）、JSON 行日志路径、Prometheus 端口（127.0.0.1）；后两者为 None 时不输出"""
+    interval: float = 0.25
+    log: Path = None
+    port: int = None
+
+
+@dataclass
+class MetricsSnapshot:
+    elapsed: float = 0.0  # 秒
+    progress: int = 0  # 百分比
+    frames: int = 0  # 已写出帧数
+    fps: float = 0.0  # 各 ffmpeg 进程输出帧率之和
+    speed: float = 0.0  # 各 ffmpeg 进程解码速度（相对实时）之和
+    bitrate_kbps: float = 0.0
+    total_size: int = 0  # ffmpeg 报告的输出字节（图片序列时通常未知）
+    out_time: float = 0.0  # 各进程已处理的媒体时长之和（秒）
+    dup_frames: int = 0
+    drop_frames: int = 0
+    eta: float = None  # 预计剩余秒数
+    bytes_written: int = 0  # 已写出的图片字节（帧清单 / 编码管线统计）
+    bytes_per_sec: float = 0.0
+    processes: int = 0  # 运行中的 ffmpeg 进程数
+    cpu_percent: float = None  # ffmpeg 子进程 + 本进程
+    rss_mb: float = None
+
+    def to_dict(self):
+        return asdict(self)
+
+
+def _number(value):
+    """解析 "12.3"、"1.5x"、"2000.1kbits/s"、"N/A" 等取值"""
+    value = value.strip().rstrip("x")
+    for suffix in ("kbits/s",):
+        if value.endswith(suffix):
+            value = value[:-len(suffix)]
+    try:
+        return float(value)
+    except ValueError:
+        return 0.0
+
+
+def _proc_stats(pid):
+    """(累计 CPU 秒, RSS 字节)；无法获取时返回 None"""
+    if psutil is not None:
+        try:
+            p = psutil.Process(pid)
+            cpu = p.cpu_times()
+            return cpu.user + cpu.system, p.memory_info().rss
+        except psutil.Error:
+            return None
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            fields = f.read().rsplit(b")", 1)[1].split()
+        with open(f"/proc/{pid}/statm", "rb") as f:
+            rss_pages = int(f.read().split()[1])
+        ticks = os.sysconf("SC_CLK_TCK")
+        return (int(fields[11]) + int(fields[12])) / ticks, rss_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class RuntimeMetrics:
+    """线程安全地累积各 ffmpeg 进程的 -progress 字段，并生成快照"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._last_cpu = None  # (时刻, 累计 CPU 秒)
+
+    def update(self, job, line):
+        """传入一行 -progress 输出；不是需要的字段时返回 False"""
+        key, sep, value = line.partition("=")
+        if not sep or key not in PROGRESS_KEYS:
+            return False
+        with self._lock:
+            self._jobs.setdefault(job, {})[key] = value
+        return True
+
+    def snapshot(self, progress=0, frames=0, bytes_written=0, procs=()):
+        now = time.monotonic()
+        elapsed = now - self.started
+        snap = MetricsSnapshot(elapsed=round(elapsed, 3), progress=progress, frames=frames,
+                               bytes_written=bytes_written)
+        with self._lock:
+            jobs = [dict(fields) for fields in self._jobs.values()]
+        for fields in jobs:
+            snap.fps += _number(fields.get("fps", "0"))
+            snap.speed += _number(fields.get("speed", "0"))
+            snap.bitrate_kbps += _number(fields.get("bitrate", "0"))
+            snap.total_size += int(_number(fields.get("total_size", "0")))
+            snap.out_time += _number(fields.get("out_time_ms", "0")) / 1e6
+            snap.dup_frames += int(_number(fields.get("dup_frames", "0")))
+            snap.drop_frames += int(_number(fields.get("drop_frames", "0")))
+        snap.fps, snap.speed = round(snap.fps, 2), round(snap.speed, 3)
+        snap.bitrate_kbps, snap.out_time = round(snap.bitrate_kbps, 1), round(snap.out_time, 3)
+        if 0 < progress < 100:
+            snap.eta = round(elapsed * (100 - progress) / progress, 1)
+        elif progress >= 100:
+            snap.eta = 0.0
+        if elapsed > 0:
+            snap.bytes_per_sec = round(bytes_written / elapsed, 1)
+
+        # 进程资源：运行中的 ffmpeg + 本进程
+        running = [p for p in procs if p.poll() is None]
+        snap.processes = len(running)
+        stats = [_proc_stats(p.pid) for p in running] + [_proc_stats(os.getpid())]
+        if all(s is not None for s in stats):
+            cpu_total = sum(s[0] for s in stats)
+            snap.rss_mb = round(sum(s[1] for s in stats) / (1024 * 1024), 1)
+            if self._last_cpu is not None and now > self._last_cpu[0]:
+                # 进程结束后其 CPU 时间不再计入，增量取非负
+                snap.cpu_percent = round(max(0.0, cpu_total - self._last_cpu[1]) / (now - self._last_cpu[0]) * 100,
+                                         1)
+            self._last_cpu = (now, cpu_total)
+        return snap
+
+
+class MetricsLog:
+    """把快照逐行写成 JSON（每行一个对象，带时间戳）"""
+
+    def __init__(self, path):
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def write(self, snapshot):
+        line = json.dumps({"time": round(time.time(), 3), **snapshot.to_dict()}, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def prometheus_text(snapshot, prefix="vfc"):
+    """Prometheus 文本格式（全部为 gauge，未知值省略）"""
+    lines = []
+    for key, value in snapshot.to_dict().items():
+        if value is None:
+            continue
+        lines.append(f"# TYPE {prefix}_{key} gauge")
+        lines.append(f"{prefix}_{key} {float(value)}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """在 127.0.0.1:port 提供 GET /metrics，内容为最近一次快照"""
+
+    def __init__(self, port, host="127.0.0.1"):
+        self.latest = MetricsSnapshot()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = prometheus_text(server.latest).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self.port = self._httpd.server_address[1]
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    def update(self, snapshot):
+        self.latest = snapshot
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
@@ -0,0 +1,99 @@
+"""
+拼图（联系表）输出：抽样帧在 ffmpeg 滤镜中按 列×行 拼成一张图再编码，输出文件数减少为 1/(列×行)
+- 可在每格左下角叠加源视频时间戳（drawtext）
+- tiles.csv 记录每格所在的图片、行列位置与源视频时间；frames.csv 每行对应一张拼图（时间为其第一格）
+"""
+import argparse
+import csv
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+TILES_NAME = "tiles.csv"
+TILE_COLUMNS = ("sheet", "path", "row", "column", "number", "index", "pts")
+
+
+def default_font():
+    """drawtext 使用的字体文件；Linux 上为 None（由 fontconfig 选择）"""
+    candidates = {
+        "win32": ["C:/Windows/Fonts/arial.ttf", "C:/Windows/Fonts/msyh.ttc"],
+        "darwin": ["/System/Library/Fonts/Helvetica.ttc", "/Library/Fonts/Arial.ttf"],
+    }.get(sys.platform, [])
+    for path in candidates:
+        if Path(path).is_file():
+            return path
+    return None
+
+
+def _escape(value):
+    """滤镜参数中的单引号字符串：冒号需转义（选项分隔符）"""
+    return str(value).replace("\\", "/").replace("'", "").replace(":", "\\:")
+
+
+@dataclass
+class TileLayout:
+    """拼图布局：columns × rows 格，padding 为格间距、margin 为外边距（像素）"""
+    columns: int = 4
+    rows: int = 4
+    timestamps: bool = False
+    padding: int = 0
+    margin: int = 0
+    font_size: int = 16
+    font_file: str = None
+
+    def __post_init__(self):
+        if self.columns < 1 or self.rows < 1:
+            raise ValueError(f"拼图布局无效：{self.columns}x{self.rows}")
+
+    @property
+    def per_sheet(self):
+        return self.columns * self.rows
+
+    def filters(self, offset=0.0):
+        """
+        滤镜链（列表）：可选的时间戳叠加 + tile
+        offset 为输入第一帧在源视频中的时间，叠加的是源视频时间而不是片段内时间
+        """
+        chain = []
+        if self.timestamps:
+            font = self.font_file or default_font()
+            options = [f"text='%{{pts\\:hms\\:{offset:.6f}}}'", "x=4", "y=h-th-4", f"fontsize={self.font_size}",
+                       "fontcolor=white", "box=1", "boxcolor=black@0.6", "boxborderw=3"]
+            if font:
+                options.insert(0, f"fontfile='{_escape(font)}'")
+            chain.append("drawtext=" + ":".join(options))
+        chain.append(f"tile={self.columns}x{self.rows}:padding={self.padding}:margin={self.margin}")
+        return chain
+
+    def position(self, number):
+        """第 number 个抽样帧（从 1 开始）-> (拼图序号, 行, 列)"""
+        sheet, cell = divmod(number - 1, self.per_sheet)
+        return sheet + 1, cell // self.columns, cell % self.columns
+
+    def to_dict(self):
+        return {"columns": self.columns, "rows": self.rows, "timestamps": self.timestamps,
+                "padding": self.padding, "margin": self.margin}
+
+
+def write_tile_index(path, rows):
+    """rows: [(sheet, path, row, column, number, index, pts), ...]，追加写入（文件不存在时先写表头）"""
+    path = Path(path)
+    new = not path.exists()
+    with open(path, "a", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        if new:
+            writer.writerow(TILE_COLUMNS)
+        for sheet, sheet_path, row, column, number, index, pts in rows:
+            writer.writerow((sheet, sheet_path, row, column, number, index, f"{pts:.6f}"))
+
+
+def parse_grid(value: str):
+    """"4x4"、"5x3" -> (列, 行)"""
+    columns, sep, rows = value.lower().partition("x")
+    try:
+        grid = (int(columns), int(rows))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无法解析拼图布局：{value}（例如 4x4）")
+    if not sep or grid[0] < 1 or grid[1] < 1:
+        raise argparse.ArgumentTypeError(f"拼图布局无效：{value}")
+    return grid
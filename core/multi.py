@@ -0,0 +1,382 @@
+"""
+一次解码、多种产出：同一个 ffmpeg 进程把解码后的画面 split 给多个输出，每个输出有自己的模式、参数、格式、质量、缩放与目录
+python -m core.multi <视频文件> --out "dir=全图,mode=seconds,n=10" --out "dir=缩略图,mode=seconds,n=1,format=jpg,q=80,size=320"
+"""
+import argparse
+import json
+import math
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from core.cli import parse_mode, parse_time, validate_range
+from core.extractor import FrameExtractor, Job, OutputOptions, PerformanceOptions, Tap
+from core.keyframes import load_keyframe_index
+from core.layout import OutputLayout
+from core.manifest import ManifestWriter, MANIFEST_NAME
+from core.mosaic import TILES_NAME, TileLayout, parse_grid
+from core.probe import probe_video, VideoInfo
+from core.resize import Resize, parse_size
+from core.scene import merge_score_logs, SCENE_LOG_NAME
+from core.segments import Segment
+from core.util import FFMPEG_BIN, missing_ffmpeg_message
+
+
+@dataclass
+class OutputSpec:
+    """
+    一路输出；resize 为输出尺寸（core.resize.Resize），None 表示原尺寸；tile 为拼图布局（core.mosaic.TileLayout）
+    layout 为输出目录布局（core.layout.OutputLayout），None 表示平铺
+    """
+    output_dir: Path
+    mode: str = "每N秒取1帧"
+    param: int = 1
+    fmt: str = "png"
+    quality: int = 0
+    resize: Resize = None
+    tile: TileLayout = None
+    layout: OutputLayout = None
+
+
+def parse_output_spec(text):
+    """解析 "dir=路径,mode=seconds,n=1,format=jpg,q=80,size=320x180,fit=crop,tile=4x4,shard=1000,naming=time" 形式的输出描述"""
+    values = {}
+    for part in text.split(","):
+        key, sep, value = part.partition("=")
+        if not sep:
+            raise argparse.ArgumentTypeError(f"输出描述格式应为 key=value：{part}")
+        values[key.strip().lower()] = value.strip()
+    if "dir" not in values:
+        raise argparse.ArgumentTypeError("输出描述缺少 dir=输出目录")
+    fmt = values.get("format", values.get("f", "png")).lower()
+    return OutputSpec(
+        output_dir=Path(values["dir"]),
+        mode=parse_mode(values.get("mode", "seconds")),
+        param=int(values.get("n", values.get("param", 1))),
+        fmt=fmt,
+        quality=int(values.get("q", values.get("quality", 85))) if fmt != "png" else 0,
+        resize=Resize(*parse_size(values["size"]), fit=values.get("fit", "fit"),
+                      scaler=values.get("scaler", "bicubic")) if "size" in values else None,
+        tile=TileLayout(*parse_grid(values["tile"]), timestamps=values.get("timestamps", "0") in ("1", "yes", "true"))
+        if "tile" in values else None,
+        layout=OutputLayout(shard=int(values.get("shard", 0)), naming=values.get("naming", "number"))
+        if "shard" in values or "naming" in values else None,
+    )
+
+
+def unsupported_options(selection=None, output=None, performance=None, cache=None, resume=False, **_):
+    """
+    单次解码多路输出不支持的提取选项（参数同 FrameExtractor），返回选项名称列表
+    所有输出共用一个 ffmpeg 进程、直接写图片：没有分段并行、调优、编码线程池、打包与缓存；界面与命令行据此提示而不是静默忽略
+    """
+    names = []
+    if selection is not None:
+        if selection.dedup is not None:
+            names.append("去重")
+        if selection.scene is not None and (selection.scene.min_gap or selection.scene.max_gap):
+            names.append("场景帧间隔")
+        if selection.targets is not None:
+            names.append("时间点列表")
+    if output is not None and output.container != "files":
+        names.append("打包输出")
+    if performance is not None:
+        if performance.parallel > 1:
+            names.append("分段并行")
+        if performance.auto_tune is not None:
+            names.append("自动调优")
+        if performance.encoders:
+            names.append("编码线程")
+    if cache is not None:
+        names.append("结果缓存")
+    if resume:
+        names.append("断点续提")
+    return names
+
+
+class MultiExtractor:
+    """
+    单次解码的多路输出引擎（不依赖 Qt）
+    - 总进度按扫描位置计算；每路输出的进度与帧数由各自的 showinfo 统计，通过 on_output_progress(序号, 百分比, 帧数) 报告
+    - 每路输出目录各自写帧清单，文件完整写出后随即记入清单并移动到布局位置；场景变化的分数日志写在第一路场景输出的目录中
+    - 拼图输出的帧数为拼图张数
+    """
+
+    def __init__(self, video_path, outputs, start_sec, end_sec, video_info=None, use_gpu=False, use_index=False,
+                 on_progress=None, on_status=None, on_output_progress=None):
+        self.video_path = Path(video_path)
+        self.outputs = list(outputs)
+        self.start_sec = start_sec
+        self.end_sec = end_sec
+        self.use_index = use_index
+        self.on_progress = on_progress
+        self.on_status = on_status
+        self.on_output_progress = on_output_progress
+        if isinstance(video_info, VideoInfo):
+            video_info = video_info.to_dict()
+        # 每路输出一个 FrameExtractor，复用其抽样滤镜、帧数预估与结果格式
+        self.extractors = [
+            FrameExtractor(video_path, spec.output_dir, start_sec, end_sec, spec.mode, spec.param, spec.fmt,
+                           spec.quality, video_info=video_info,
+                           output=OutputOptions(resize=spec.resize, tile=spec.tile, layout=spec.layout),
+                           performance=PerformanceOptions(use_gpu=use_gpu))
+            for spec in self.outputs
+        ]
+        self.engine = self.extractors[0]  # 负责运行进程与终止
+        self.duration = self.engine.duration
+        self.keyframes_only = all(spec.mode == "仅关键帧" for spec in self.outputs)
+        scene = [i for i, spec in enumerate(self.outputs) if spec.mode == "场景变化"]
+        self.scene_output = scene[0] if scene else None
+
+    def emit_progress(self, progress):
+        if self.on_progress is not None:
+            self.on_progress(progress)
+
+    def emit_status(self, status):
+        if self.on_status is not None:
+            self.on_status(status)
+
+    def build_job(self, cwd=None):
+        """单个 ffmpeg 任务：源帧计数与裁剪之后 split 给各路输出，每路有自己的 showinfo@o<序号>"""
+        segment = Segment(0, self.start_sec, self.end_sec - self.start_sec, 1)
+        # 所有输出都缩小时才能低分辨率解码，因子取各路的最小值
+        lowres = min(extractor.lowres_factor() for extractor in self.extractors)
+        input_args, prefix, seek = self.engine.build_input(segment, keyframes_only=self.keyframes_only,
+                                                           lowres=lowres)
+        source, sources = self.engine.source_tap(seek, keyframes_only=self.keyframes_only,
+                                                 consumers=len(self.outputs))
+        count = len(self.outputs)
+        labels = "[scan]" + "".join(f"[o{i}]" for i in range(count))
+        graph = f"[0:v]{source}{prefix}null,split={count + 1}{labels}"
+        outputs = {}
+        for i, (spec, extractor) in enumerate(zip(self.outputs, self.extractors)):
+            outputs[f"o{i}"] = Tap(1, seek, None, "src" if sources else None, consumer=i)
+            chain = extractor.build_filter([extractor.tap(f"o{i}")], seek)
+            if spec.mode == "仅关键帧" and not self.keyframes_only:
+                chain = "select='key'," + chain  # 其他输出需要全部帧，这一路在滤镜中只保留关键帧
+            if spec.mode == "场景变化":
+                # 只有第一路场景输出记录分数日志，其余帧送到 nullsink
+                router, kept, rest = extractor.build_scene_router(log=i == self.scene_output)
+                graph += f";[o{i}]{router}[k{i}][r{i}];[r{i}]{rest},nullsink;[k{i}]{kept}{chain}[v{i}]"
+                continue
+            graph += f";[o{i}]{chain}[v{i}]"
+
+        cmd = [str(FFMPEG_BIN), *self.engine.global_args(), *input_args, "-filter_complex", graph]
+        for i, extractor in enumerate(self.extractors):
+            cmd += ["-map", f"[v{i}]", *extractor.encode_args(),
+                    "-start_number", "1", str(extractor.output_dir / extractor.layout.pattern(extractor.fmt))]
+        cmd += ["-map", "[scan]", "-f", "null", "-", "-progress", "pipe:1", "-nostats"]
+        return Job(cmd, self.duration, cwd=cwd, outputs=outputs, sources=sources)
+
+    def expected_frames(self, extractor):
+        """预估一路输出的帧数，未知时为 0（该路进度按扫描位置计算）"""
+        if extractor.mode == "每N秒取1帧":
+            return max(1, int(self.duration / extractor.param))
+        if extractor.mode == "仅关键帧":
+            return max(1, extractor.count_keyframes())
+        if extractor.mode == "每N帧取1帧":
+            fps = extractor.video_info.get("fps", 0)
+            return max(1, int(self.duration * fps) // extractor.param) if fps > 0 else 0
+        return 0
+
+    def run(self):
+        started = time.monotonic()
+        error = None
+        try:
+            for extractor in self.extractors:
+                extractor.output_dir.mkdir(parents=True, exist_ok=True)
+                extractor.manifest = ManifestWriter(extractor.output_dir / MANIFEST_NAME)
+                extractor.engine_used = "multi"
+                if not extractor.capabilities.encoder_for(extractor.fmt):
+                    raise RuntimeError(f"当前 ffmpeg 不支持 {extractor.fmt.upper()} 编码：{extractor.output_dir}")
+                if extractor.tile is not None:
+                    (extractor.output_dir / TILES_NAME).unlink(missing_ok=True)
+
+            if self.use_index:
+                self.emit_status("读取关键帧索引...")
+                try:
+                    index = load_keyframe_index(self.video_path)
+                except Exception:
+                    index = None
+                for extractor in self.extractors:
+                    extractor.keyframe_index = index
+
+            totals = [self.expected_frames(extractor) for extractor in self.extractors]
+            cwd = self.extractors[self.scene_output].output_dir if self.scene_output is not None else None
+            job = self.build_job(cwd)
+            self.emit_status(f"提取中...（单次解码，{len(self.outputs)} 路输出）")
+
+            frames = [[] for _ in self.outputs]  # 每路 (输出序号, 源视频帧号, 源视频时间)
+            flushed = [0] * len(self.outputs)  # 每路已写入帧清单的个数
+            state = {"time": 0.0, "progress": -1, "outputs": [-1] * len(self.outputs)}
+
+            def output_file(extractor, number):
+                """第 number 帧所在的文件序号（拼图输出为拼图序号）"""
+                return extractor.tile.position(number)[0] if extractor.tile is not None else number
+
+            def flush_manifest(i, final=False):
+                """
+                把第 i 路已完整写出的帧写入帧清单（并移动到布局位置）
+                image2 写完一个文件才打开下一个：下一个文件已出现时当前文件已写完；final 时全部写入
+                """
+                extractor, pending = self.extractors[i], frames[i][flushed[i]:]
+                if not final:
+                    ready = 0
+                    for number, _, _ in pending:
+                        following = output_file(extractor, number) + 1
+                        if not (extractor.output_dir / extractor.layout.staged_name(following, extractor.fmt)).exists():
+                            break
+                        ready += 1
+                    pending = pending[:ready]
+                if pending:
+                    flushed[i] += len(pending)
+                    extractor.write_manifest(pending)
+
+            def output_progress(i):
+                if totals[i]:
+                    return min(100, int(len(frames[i]) / totals[i] * 100))
+                return min(100, int(state["time"] / self.duration * 100)) if self.duration > 0 else 0
+
+            def on_line(_, line):
+                frame = job.feed(line, self.engine.frame_index_at) if line.startswith("[") else None
+                if frame is not None:
+                    i = int(frame[0][1:])
+                    frames[i].append(frame[1:])
+                    extractor = self.extractors[i]
+                    extractor.extracted_frames = len(frames[i]) if extractor.tile is None \
+                        else math.ceil(len(frames[i]) / extractor.tile.per_sheet)
+                    progress = output_progress(i)
+                    if progress != state["outputs"][i] and self.on_output_progress is not None:
+                        state["outputs"][i] = progress
+                        self.on_output_progress(i, progress, extractor.extracted_frames)
+                elif line.startswith("frame="):
+                    for i in range(len(self.outputs)):
+                        flush_manifest(i)
+                elif line.startswith("out_time_ms="):
+                    try:
+                        state["time"] = min(int(line[len("out_time_ms="):]) / 1e6, self.duration)
+                    except ValueError:
+                        return
+                    progress = min(int(state["time"] / self.duration * 100), 100) if self.duration > 0 else 0
+                    if progress != state["progress"]:  # 只在整数百分比变化时发出
+                        state["progress"] = progress
+                        self.emit_progress(progress)
+
+            def on_done(_):
+                for i in range(len(self.outputs)):
+                    flush_manifest(i, final=True)
+
+            self.engine.run_jobs([job], on_line, on_done)
+            if self.scene_output is not None:
+                merge_score_logs(cwd, job.outputs[f"o{self.scene_output}"].origin - self.start_sec)
+
+            if self.engine.stopped:
+                self.emit_status("已终止处理")
+            elif self.engine.failed_jobs:
+                error = "ffmpeg 异常退出"
+                self.emit_status(f"提取错误: {error}")
+            else:
+                self.emit_progress(100)
+                self.emit_status("提取完成")
+        except Exception as e:
+            self.engine._terminate_all()
+            error = str(e)
+            self.emit_status(f"提取错误: {e}")
+        finally:
+            for extractor in self.extractors:
+                if extractor.manifest is not None:
+                    extractor.manifest.close()
+
+        elapsed = time.monotonic() - started
+        outputs = []
+        for i, (spec, extractor) in enumerate(zip(self.outputs, self.extractors)):
+            extractor._stop = self.engine.stopped
+            result = extractor.result(error, elapsed)
+            if spec.mode == "场景变化" and i != self.scene_output:
+                result["score_log"] = str(self.extractors[self.scene_output].output_dir / SCENE_LOG_NAME)
+            outputs.append(result)
+        return {
+            "status": "stopped" if self.engine.stopped else ("error" if error else "completed"),
+            "error": error,
+            "video": str(self.video_path),
+            "start_sec": self.start_sec,
+            "end_sec": self.end_sec,
+            "elapsed": round(elapsed, 3),
+            "outputs": outputs,
+        }
+
+    def stop(self):
+        self.engine.stop()
+        self.emit_status("已终止处理")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m core.multi", description="一次解码、多路输出的帧提取")
+    parser.add_argument("video", type=Path, help="视频文件")
+    parser.add_argument("--out", dest="outputs", type=parse_output_spec, action="append", required=True,
+                        help="一路输出：dir=目录,mode=seconds|frames|keyframes|scene,n=参数,format=png|jpg|webp,"
+                             "q=质量,size=宽x高,fit=fit|crop|stretch,scaler=缩放算法,tile=列x行,timestamps=1,"
+                             "shard=每个子目录的帧数,naming=number|time（可重复）")
+    parser.add_argument("--start", type=parse_time, default=0.0, help="起始时间（秒 或 时:分:秒），默认 0")
+    parser.add_argument("--end", type=parse_time, default=None, help="结束时间（秒 或 时:分:秒），默认视频结尾")
+    parser.add_argument("--gpu", action="store_true", help="本机有可用的硬件解码时使用")
+    parser.add_argument("--no-index", action="store_true", help="不使用关键帧索引")
+    parser.add_argument("--progress", action="store_true", help="在 stderr 输出 JSON 行格式的进度")
+    parser.add_argument("--indent", type=int, default=None, help="结果 JSON 的缩进")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    missing = missing_ffmpeg_message()
+    if missing:
+        print(json.dumps({"status": "error", "error": missing}, ensure_ascii=False))
+        return 2
+    try:
+        info = probe_video(args.video)
+    except Exception as e:
+        print(json.dumps({"status": "error", "error": f"无法读取视频信息：{e}"}, ensure_ascii=False))
+        return 2
+    end = info.duration if args.end is None else min(args.end, info.duration)
+    return run_outputs(args.video, args.outputs, args.start, end, info, use_gpu=args.gpu,
+                       use_index=not args.no_index, progress=args.progress, indent=args.indent)
+
+
+def run_outputs(video, outputs, start, end, info, use_gpu=False, use_index=True, progress=False, indent=None):
+    """命令行运行多路输出（python -m core.multi 与 python -m core --out 共用），结果 JSON 输出到 stdout，返回退出码"""
+    from core.util import detect_gpu
+
+    for spec in outputs:
+        error = validate_range(info.duration, start, end, spec.mode, spec.param)
+        if error:
+            print(json.dumps({"status": "error", "error": f"{spec.output_dir}：{error}"}, ensure_ascii=False))
+            return 2
+
+    def on_progress(value):
+        if progress:
+            print(json.dumps({"progress": value}), file=sys.stderr, flush=True)
+
+    def on_output_progress(i, value, frames):
+        if progress:
+            print(json.dumps({"output": i, "progress": value, "frames": frames}), file=sys.stderr, flush=True)
+
+    extractor = MultiExtractor(video, outputs, start, end, video_info=info, use_gpu=use_gpu and detect_gpu(),
+                               use_index=use_index, on_progress=on_progress, on_output_progress=on_output_progress)
+
+    result = {}
+    runner = threading.Thread(target=lambda: result.update(extractor.run()), daemon=True)
+    runner.start()
+    try:
+        while runner.is_alive():
+            runner.join(0.2)
+    except KeyboardInterrupt:
+        extractor.stop()
+        runner.join()
+
+    print(json.dumps(result, ensure_ascii=False, indent=indent))
+    return {"completed": 0, "stopped": 130}.get(result.get("status"), 1)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
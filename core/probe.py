@@ -0,0 +1,193 @@
+import json
+import subprocess
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from fractions import Fraction
+from pathlib import Path
+
+from core.util import FFPROBE_BIN, get_cache_dir, file_cache_key
+
+PROBE_VERSION = 1
+# 内存 LRU 缓存容量（视频个数）
+MEMORY_CACHE_SIZE = 256
+
+
+class ProbeCancelled(Exception):
+    """探测被取消（例如用户在探测过程中又选择了其他文件）"""
+
+
+@dataclass
+class VideoInfo:
+    """一次 ffprobe 得到的视频元数据"""
+    path: str
+    duration: float = 0.0
+    fps: Fraction = Fraction(0)
+    width: int = 0
+    height: int = 0
+    codec: str = ""
+    nb_frames: int = 0
+    rotation: int = 0
+    pix_fmt: str = ""
+
+    @property
+    def display_size(self):
+        """考虑旋转后的显示分辨率"""
+        if self.rotation % 180:
+            return self.height, self.width
+        return self.width, self.height
+
+    def to_dict(self):
+        """FrameExtractor 使用的 video_info 字典（宽高为显示分辨率）"""
+        width, height = self.display_size
+        return {
+            "duration": self.duration,
+            "fps": float(self.fps),
+            "total_frames": self.nb_frames,
+            "width": width,
+            "height": height,
+            "codec": self.codec,
+        }
+
+    def to_json(self):
+        data = asdict(self)
+        data["fps"] = f"{self.fps.numerator}/{self.fps.denominator}"
+        return data
+
+    @classmethod
+    def from_json(cls, data):
+        data = dict(data)
+        data["fps"] = Fraction(data.get("fps", "0"))
+        return cls(**data)
+
+
+def _parse_rate(value) -> Fraction:
+    try:
+        rate = Fraction(value)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return Fraction(0)
+    return rate if rate > 0 else Fraction(0)
+
+
+def _parse_int(value) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def run_ffprobe(path: Path, cancel=None) -> VideoInfo:
+    """
+    执行一次 ffprobe，解析视频流与容器信息
+    cancel: threading.Event，被置位时结束 ffprobe 并抛出 ProbeCancelled
+    """
+    cmd = [
+        str(FFPROBE_BIN), "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries",
+        "format=duration:stream=codec_name,width,height,avg_frame_rate,r_frame_rate,nb_frames,pix_fmt,duration"
+        ":stream_tags=rotate:stream_side_data=rotation",
+        "-of", "json",
+        str(path)
+    ]
+    # Windows 下禁止弹出黑框
+    creation_flags = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding="utf-8",
+        errors="ignore",
+        creationflags=creation_flags,
+        shell=False
+    )
+    while True:
+        try:
+            stdout, stderr = proc.communicate(timeout=0.1)
+            break
+        except subprocess.TimeoutExpired:
+            if cancel is not None and cancel.is_set():
+                proc.kill()
+                proc.communicate()
+                raise ProbeCancelled(str(path))
+    if proc.returncode != 0:
+        raise RuntimeError(stderr.strip() or "ffprobe 执行失败")
+
+    info = json.loads(stdout)
+    streams = [s for s in info.get("streams", []) if "width" in s]
+    if not streams:
+        raise RuntimeError("未找到视频流")
+    stream = streams[0]
+
+    fps = _parse_rate(stream.get("avg_frame_rate")) or _parse_rate(stream.get("r_frame_rate"))
+    try:
+        duration = float(info.get("format", {}).get("duration") or stream.get("duration") or 0)
+    except ValueError:
+        duration = 0.0
+
+    rotation = _parse_int(stream.get("tags", {}).get("rotate"))
+    for side_data in stream.get("side_data_list", []):
+        if "rotation" in side_data:
+            rotation = _parse_int(side_data["rotation"])
+
+    return VideoInfo(
+        path=str(path),
+        duration=duration,
+        fps=fps,
+        width=_parse_int(stream.get("width")),
+        height=_parse_int(stream.get("height")),
+        codec=stream.get("codec_name", ""),
+        nb_frames=_parse_int(stream.get("nb_frames")),
+        rotation=rotation % 360,
+        pix_fmt=stream.get("pix_fmt", ""),
+    )
+
+
+_memory_cache = OrderedDict()
+_memory_lock = threading.Lock()
+
+
+def probe_video(path, use_cache=True, cancel=None) -> VideoInfo:
+    """
+    获取视频元数据：内存 LRU 缓存 -> 磁盘缓存 -> ffprobe
+    缓存按 路径 + 大小 + 修改时间 失效；失败时抛出异常，取消时抛出 ProbeCancelled
+    """
+    path = Path(path)
+    if not use_cache:
+        return run_ffprobe(path, cancel)
+
+    key = file_cache_key(path)
+    with _memory_lock:
+        if key in _memory_cache:
+            _memory_cache.move_to_end(key)
+            return _memory_cache[key]
+
+    cache_file = None
+    info = None
+    try:
+        cache_file = get_cache_dir("probe") / f"{key}.json"
+        if cache_file.is_file():
+            data = json.loads(cache_file.read_text(encoding="utf-8"))
+            if data.pop("version", None) == PROBE_VERSION:
+                info = VideoInfo.from_json(data)
+    except (OSError, ValueError, TypeError):
+        info = None
+
+    if info is None:
+        info = run_ffprobe(path, cancel)
+        if cache_file is not None:
+            try:
+                tmp = cache_file.with_suffix(".tmp")
+                tmp.write_text(json.dumps({"version": PROBE_VERSION, **info.to_json()}), encoding="utf-8")
+                tmp.replace(cache_file)
+            except OSError:
+                pass
+
+    with _memory_lock:
+        _memory_cache[key] = info
+        while len(_memory_cache) > MEMORY_CACHE_SIZE:
+            _memory_cache.popitem(last=False)
+    return info
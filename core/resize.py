@@ -0,0 +1,109 @@
+"""
+解码时缩放：在滤镜图中把抽样后的帧缩放到目标尺寸，只编码、写出小图
+- fit：保持比例缩放到目标框之内；crop：保持比例铺满目标框后居中裁剪；stretch：直接拉伸到目标尺寸
+- 只给宽或高时另一边按比例计算（取偶数）
+- 解码器支持低分辨率解码（-lowres，MPEG-1/2/4、MJPEG、DV 等）时，直接以 1/2、1/4、1/8 分辨率解码，
+  但不低于缩放前所需的尺寸
+"""
+import argparse
+from dataclasses import dataclass
+
+FITS = ("fit", "crop", "stretch")
+SCALERS = ("bicubic", "bilinear", "lanczos", "area", "neighbor", "fast_bilinear")
+# 支持 -lowres 的解码器及其最大因子（分辨率除以 2^因子）
+LOWRES_DECODERS = {
+    "mjpeg": 3, "mpeg1video": 3, "mpeg2video": 3, "mpeg4": 3, "h263": 3, "flv1": 3,
+    "msmpeg4v1": 3, "msmpeg4v2": 3, "msmpeg4v3": 3, "wmv1": 3, "wmv2": 3, "dvvideo": 3, "jpeg2000": 3,
+}
+
+
+def _even(value):
+    return max(2, int(round(value / 2)) * 2)
+
+
+@dataclass
+class Resize:
+    """目标尺寸（0 表示按比例）、适配方式与缩放算法"""
+    width: int = 0
+    height: int = 0
+    fit: str = "fit"
+    scaler: str = "bicubic"
+
+    def __post_init__(self):
+        if self.fit not in FITS:
+            raise ValueError(f"未知的适配方式：{self.fit}（可选 {', '.join(FITS)}）")
+        if self.scaler not in SCALERS:
+            raise ValueError(f"未知的缩放算法：{self.scaler}（可选 {', '.join(SCALERS)}）")
+        if self.width < 0 or self.height < 0 or not (self.width or self.height):
+            raise ValueError("缩放尺寸无效：宽、高至少指定一个正数")
+
+    @property
+    def both(self):
+        return bool(self.width and self.height)
+
+    def scaled_size(self, src_width, src_height):
+        """缩放（裁剪之前）的尺寸"""
+        if not self.both:
+            if self.width:
+                return _even(self.width), _even(src_height * self.width / src_width)
+            return _even(src_width * self.height / src_height), _even(self.height)
+        if self.fit == "stretch":
+            return self.width, self.height
+        pick = min if self.fit == "fit" else max
+        ratio = pick(self.width / src_width, self.height / src_height)
+        return _even(src_width * ratio), _even(src_height * ratio)
+
+    def output_size(self, src_width, src_height):
+        """最终输出帧的尺寸"""
+        if self.both and self.fit != "fit":
+            return self.width, self.height
+        return self.scaled_size(src_width, src_height)
+
+    def filters(self, src_width=0, src_height=0):
+        """
+        滤镜链（列表），放在抽样之后，只处理被选中的帧
+        给出源尺寸时按比例计算的一边也写成确定的数值（与 output_size 同一算法），不依赖 ffmpeg 的取整方式
+        与低分辨率解码后的输入尺寸，原始帧输出按 output_size 切分时不会错位
+        """
+        flags = f"flags={self.scaler}"
+        if src_width > 0 and src_height > 0 and not (self.both and self.fit != "fit"):
+            width, height = self.scaled_size(src_width, src_height)
+            return [f"scale={width}:{height}:{flags}"]
+        if not self.both:
+            if self.width:
+                return [f"scale={self.width}:-2:{flags}"]
+            return [f"scale=-2:{self.height}:{flags}"]
+        if self.fit == "stretch":
+            return [f"scale={self.width}:{self.height}:{flags}"]
+        if self.fit == "fit":
+            return [f"scale={self.width}:{self.height}:force_original_aspect_ratio=decrease:"
+                    f"force_divisible_by=2:{flags}"]
+        return [f"scale={self.width}:{self.height}:force_original_aspect_ratio=increase:{flags}",
+                f"crop={self.width}:{self.height}"]
+
+    def lowres(self, codec, src_width, src_height):
+        """可用的 -lowres 因子：解码分辨率仍不小于缩放所需尺寸；不支持时为 0"""
+        limit = LOWRES_DECODERS.get(codec, 0)
+        if not limit or src_width <= 0 or src_height <= 0:
+            return 0
+        need_width, need_height = self.scaled_size(src_width, src_height)
+        factor = 0
+        while factor < limit and (src_width >> (factor + 1)) >= need_width \
+                and (src_height >> (factor + 1)) >= need_height:
+            factor += 1
+        return factor
+
+    def to_dict(self):
+        return {"width": self.width, "height": self.height, "fit": self.fit, "scaler": self.scaler}
+
+
+def parse_size(value: str):
+    """"320"、"320x"、"x240"、"320x240" -> (宽, 高)，未给出的一边为 0"""
+    width, sep, height = value.lower().partition("x")
+    try:
+        size = (int(width) if width else 0, int(height) if sep and height else 0)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无法解析尺寸：{value}（例如 320、x240、640x360）")
+    if size[0] < 0 or size[1] < 0 or not any(size):
+        raise argparse.ArgumentTypeError(f"尺寸无效：{value}")
+    return size
@@ -0,0 +1,368 @@
+"""
+结果缓存：按 视频内容指纹 + 规范化的提取参数 保存已完成的输出，重复的任务直接从缓存复制，不再解码
+- 指纹只读取文件大小与均匀分布的若干数据块，与路径、修改时间无关（复制、改名后的同一视频也能命中）
+- 范围完全相同时复制全部输出；范围是已缓存范围的子集且采样点对齐时（每N秒 / 每N帧 / 全部关键帧）只取其中的帧并重新编号
+- 入库只用 reflink（写时复制，与输出互不影响、不额外占用空间）；文件系统不支持 reflink 时不入库，避免整份复制输出
+  清单等小文件总是复制；从缓存生成输出时 reflink 不可用则复制
+- 每个文件入库时记录大小、修改时间（纳秒）与 sha1：命中时只比较大小与修改时间（不读文件内容，命中的开销与输出大小无关），
+  不一致的条目不会被使用；sha1 只在 --verify 时逐个校验，并删除内容损坏的条目
+- 总大小超过上限时按最近使用时间淘汰（LRU）
+python -m core.resultcache [--clear] [--limit MB] [--verify]
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import shutil
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from fractions import Fraction
+from pathlib import Path
+
+from core.checkpoint import CHECKPOINT_NAME, checkpoint_params
+from core.manifest import FrameManifest, ManifestWriter, MANIFEST_NAME
+from core.segments import to_fraction
+from core.util import file_cache_key, get_cache_dir
+
+RESULT_CACHE_VERSION = 3
+ENTRY_NAME = "entry.json"
+# 默认容量上限（MB），可用环境变量 VFC_RESULT_CACHE_MB 覆盖
+DEFAULT_LIMIT_MB = 4096
+# 指纹：读取的数据块个数与大小
+FINGERPRINT_BLOCKS = 16
+FINGERPRINT_BLOCK_SIZE = 64 * 1024
+# 清单、检查点之类的小文件之后可能被原地改写，不与缓存共用 inode
+_METADATA_SUFFIXES = (".csv", ".json", ".txt", ".idx")
+# Linux 的 FICLONE ioctl（btrfs / xfs 等支持 reflink 的文件系统）
+_FICLONE = 0x40049409
+
+_fingerprints = {}
+_fingerprint_lock = threading.Lock()
+
+
+def video_fingerprint(path):
+    """文件大小 + 开头、结尾与中间均匀分布的数据块的 sha1；同一进程内按 路径 + 大小 + 修改时间 记住结果"""
+    path = Path(path)
+    memo_key = file_cache_key(path)
+    with _fingerprint_lock:
+        if memo_key in _fingerprints:
+            return _fingerprints[memo_key]
+    size = path.stat().st_size
+    digest = hashlib.sha1(str(size).encode("ascii"))
+    with open(path, "rb") as f:
+        if size <= FINGERPRINT_BLOCKS * FINGERPRINT_BLOCK_SIZE:
+            digest.update(f.read())
+        else:
+            step = (size - FINGERPRINT_BLOCK_SIZE) / (FINGERPRINT_BLOCKS - 1)
+            for i in range(FINGERPRINT_BLOCKS):
+                f.seek(int(i * step))
+                digest.update(f.read(FINGERPRINT_BLOCK_SIZE))
+    fingerprint = f"{size}-{digest.hexdigest()[:24]}"
+    with _fingerprint_lock:
+        _fingerprints[memo_key] = fingerprint
+    return fingerprint
+
+
+def normalized_params(extractor):
+    """影响输出内容的参数（不含范围与视频路径）；并行数、线程数、引擎等只影响速度的参数不在其中"""
+    params = checkpoint_params(extractor)
+    for key in ("start_sec", "end_sec", "video"):
+        params.pop(key, None)
+    if params["fmt"] == "png":
+        params["quality"] = 0
+    if extractor.encoders > 0:
+        params["encoder"] = "pillow"  # Pillow 与 ffmpeg 编码的文件字节不同
+    return params
+
+
+def cache_key(fingerprint, params):
+    raw = json.dumps({"version": RESULT_CACHE_VERSION, "video": fingerprint, "params": params},
+                     sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:24]
+
+
+def extraction_range(extractor):
+    """实际提取范围（结束时间不超过视频时长）"""
+    return extractor.start_sec, extractor.start_sec + extractor.duration
+
+
+def clone_file(src, dst, copy=True):
+    """
+    reflink -> 复制，返回使用的方式；copy 为 False 时不复制，reflink 失败返回 None（不留下 dst）
+    不用硬链接：共用 inode 时一方被原地改写会同时改掉另一方
+    """
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    dst.unlink(missing_ok=True)
+    if src.suffix.lower() not in _METADATA_SUFFIXES:
+        if sys.platform.startswith("linux"):
+            try:
+                import fcntl
+                with open(src, "rb") as s, open(dst, "wb") as d:
+                    fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+                return "reflink"
+            except OSError:
+                dst.unlink(missing_ok=True)
+        if not copy:
+            return None
+    shutil.copy2(src, dst)
+    return "copy"
+
+
+def file_digest(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class CacheHit:
+    entry: Path
+    exact: bool
+    rows: list = field(default_factory=list)  # 子集命中时选出的清单行（按输出顺序）
+
+
+class ResultCache:
+    """结果缓存目录：<根>/<缓存键>/<范围>/，每个条目包含输出文件与 entry.json"""
+
+    def __init__(self, root=None, limit_mb=None):
+        self.root = Path(root) if root is not None else get_cache_dir("results")
+        if limit_mb is None:
+            limit_mb = float(os.environ.get("VFC_RESULT_CACHE_MB", DEFAULT_LIMIT_MB))
+        self.limit_bytes = int(limit_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo):
+        """批量任务按任务复制提取参数时得到同一目录、同一上限的新实例（锁不能复制）"""
+        return ResultCache(self.root, self.limit_bytes / (1024 * 1024))
+
+    def key_for(self, extractor):
+        return cache_key(video_fingerprint(extractor.video_path), normalized_params(extractor))
+
+    @staticmethod
+    def read_entry(entry):
+        try:
+            data = json.loads((entry / ENTRY_NAME).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return data if data.get("version") == RESULT_CACHE_VERSION else None
+
+    def lookup(self, extractor):
+        """查找可用的缓存条目：范围相同的优先，其次是覆盖该范围且采样点对齐的条目；没有时返回 None"""
+        if self.limit_bytes <= 0:
+            return None
+        key = self.key_for(extractor)
+        start, end = extraction_range(extractor)
+        candidates = []
+        with self._lock:
+            key_dir = self.root / key
+            if not key_dir.is_dir():
+                return None
+            for entry in key_dir.iterdir():
+                data = self.read_entry(entry)
+                if data is not None and data["start"] <= start + 1e-6 and data["end"] >= end - 1e-6:
+                    exact = abs(data["start"] - start) < 1e-6 and abs(data["end"] - end) < 1e-6
+                    candidates.append((not exact, data["end"] - data["start"], entry, data))
+        for inexact, _, entry, data in sorted(candidates, key=lambda c: c[:2]):
+            if not inexact:
+                if self._intact(entry, data, data["files"]):
+                    return CacheHit(entry, True)
+                continue
+            rows = self._subset_rows(entry, data, extractor, start, end)
+            if rows is not None and self._intact(entry, data, [row[3] for row in rows]):
+                return CacheHit(entry, False, rows)
+        return None
+
+    def _subset_rows(self, entry, data, extractor, start, end):
+        """从范围更大的条目中选出本次范围应输出的帧；采样点不对齐或模式不支持时返回 None"""
+        if extractor.container != "files" or extractor.dedup or extractor.tile is not None:
+            return None
+        try:
+            rows = FrameManifest.load(entry / MANIFEST_NAME).rows
+        except (OSError, ValueError, KeyError):
+            return None
+        mode, param = extractor.mode, extractor.param
+        if mode == "每N秒取1帧":
+            # 采样点为 start + k*N：本次起点须落在缓存的采样点上，第 k 个采样点即缓存中的第 offset+k 帧
+            offset = (start - data["start"]) / param
+            if abs(offset - round(offset)) > 1e-6:
+                return None
+            first = int(round(offset)) + 1
+            last = first + math.ceil((end - start) / param - 1e-9) - 1
+            selected = [row for row in rows if first <= row[0] <= last]
+            if [row[0] for row in selected] != list(range(first, first + len(selected))):
+                return None
+            return selected
+        if mode == "每N帧取1帧":
+            # 采样的是范围内第 0、N、2N... 帧：两次的第一帧相差 N 的整数倍时采样点重合
+            fps = to_fraction(extractor.video_info.get("fps", 0))
+            if fps <= 0:
+                return None
+            first_index = math.ceil(Fraction(start) * fps)
+            if (first_index - math.ceil(Fraction(data["start"]) * fps)) % param:
+                return None
+            last_index = math.ceil(Fraction(end) * fps)
+            return [row for row in rows if first_index <= row[1] < last_index]
+        if mode == "仅关键帧" and param == 0:
+            return [row for row in rows if start - 1e-6 <= row[2] < end]
+        return None  # 场景变化、稀疏关键帧、时间点列表的结果依赖之前的帧，只能整段复用
+
+    @staticmethod
+    def _intact(entry, data, paths, digest=False):
+        """所用文件的大小与修改时间都与入库时一致；digest 为 True 时再逐个校验 sha1（读取全部内容）"""
+        files = data["files"]
+        try:
+            for path in paths:
+                if path not in files:
+                    return False
+                size, mtime_ns, sha1 = files[path]
+                st = (entry / path).stat()
+                if st.st_size != size or st.st_mtime_ns != mtime_ns:
+                    return False
+                if digest and file_digest(entry / path) != sha1:
+                    return False
+        except OSError:
+            return False
+        return True
+
+    def verify(self, repair=False):
+        """逐个校验全部条目的 sha1，返回损坏的条目目录列表；repair 为 True 时删除这些条目"""
+        broken = []
+        for _, _, entry in self.entries():
+            data = self.read_entry(entry)
+            if data is None or not self._intact(entry, data, data["files"], digest=True):
+                broken.append(entry)
+        if repair:
+            with self._lock:
+                for entry in broken:
+                    shutil.rmtree(entry, ignore_errors=True)
+        return broken
+
+    def serve(self, hit, extractor):
+        """把命中的缓存复制到输出目录，返回输出帧数"""
+        output_dir = extractor.output_dir
+        (hit.entry / ENTRY_NAME).touch()  # 更新最近使用时间
+        if hit.exact:
+            data = self.read_entry(hit.entry)
+            for path in data["files"]:
+                clone_file(hit.entry / path, output_dir / path)
+            return data["frames"]
+        rows = []
+        for number, (_, index, pts, path, size) in enumerate(hit.rows, start=1):
+            name = extractor.final_path(number, pts)
+            clone_file(hit.entry / path, output_dir / name)
+            rows.append((number + extractor.number_offset, index, pts, name, size))
+        manifest = ManifestWriter(output_dir / MANIFEST_NAME, rows)
+        manifest.close()
+        return len(rows)
+
+    def store(self, extractor, frames):
+        """把已完成的输出存入缓存；文件系统不支持 reflink 或失败时放弃（不影响提取结果），返回条目目录或 None"""
+        if self.limit_bytes <= 0:
+            return None
+        start, end = extraction_range(extractor)
+        try:
+            key = self.key_for(extractor)
+            entry = self.root / key / hashlib.sha1(f"{start:.6f}-{end:.6f}".encode("ascii")).hexdigest()[:16]
+            if self.read_entry(entry) is not None:
+                (entry / ENTRY_NAME).touch()
+                return entry
+            paths = [path.relative_to(extractor.output_dir).as_posix()
+                     for path in sorted(extractor.output_dir.rglob("*"))
+                     if path.is_file() and path.name != CHECKPOINT_NAME and not path.name.endswith(".tmp")]
+            total = sum((extractor.output_dir / path).stat().st_size for path in paths)
+            if total > self.limit_bytes:
+                return None
+            tmp = entry.with_name(f"{entry.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            shutil.rmtree(tmp, ignore_errors=True)
+            files = {}
+            for path in paths:
+                if clone_file(extractor.output_dir / path, tmp / path, copy=False) is None:
+                    shutil.rmtree(tmp, ignore_errors=True)
+                    return None
+                # 🔹 大小、修改时间与 sha1 按入库的副本计算；移动条目目录不改变文件的修改时间
+                st = (tmp / path).stat()
+                files[path] = [st.st_size, st.st_mtime_ns, file_digest(tmp / path)]
+            data = {"version": RESULT_CACHE_VERSION, "key": key, "video": str(extractor.video_path),
+                    "params": normalized_params(extractor), "start": start, "end": end, "frames": frames,
+                    "bytes": total, "files": files, "created": round(time.time())}
+            (tmp / ENTRY_NAME).write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+            with self._lock:
+                if entry.exists():  # 其他进程已写入同一条目
+                    shutil.rmtree(tmp, ignore_errors=True)
+                else:
+                    tmp.replace(entry)
+            self.evict()
+            return entry
+        except OSError:
+            if "tmp" in locals():
+                shutil.rmtree(tmp, ignore_errors=True)
+            return None
+
+    def entries(self):
+        """[(最近使用时间, 字节数, 条目目录), ...]"""
+        result = []
+        if not self.root.is_dir():
+            return result
+        for key_dir in self.root.iterdir():
+            if not key_dir.is_dir():
+                continue
+            for entry in key_dir.iterdir():
+                data = self.read_entry(entry) if entry.is_dir() and not entry.name.endswith(".tmp") else None
+                if data is not None:
+                    try:
+                        result.append(((entry / ENTRY_NAME).stat().st_mtime, data["bytes"], entry))
+                    except OSError:
+                        continue
+        return result
+
+    def evict(self, limit_bytes=None):
+        """按最近使用时间从旧到新删除条目，直到总大小不超过上限；返回删除的条目数"""
+        limit = self.limit_bytes if limit_bytes is None else limit_bytes
+        removed = 0
+        with self._lock:
+            entries = sorted(self.entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, entry in entries:
+                if total <= limit:
+                    break
+                shutil.rmtree(entry, ignore_errors=True)
+                try:
+                    entry.parent.rmdir()  # 该缓存键下已没有其他范围
+                except OSError:
+                    pass
+                total -= size
+                removed += 1
+        return removed
+
+    def usage(self):
+        entries = self.entries()
+        return {"root": str(self.root), "entries": len(entries), "bytes": sum(size for _, size, _ in entries),
+                "limit": self.limit_bytes}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m core.resultcache", description="查看或清理结果缓存")
+    parser.add_argument("--clear", action="store_true", help="删除全部缓存条目")
+    parser.add_argument("--limit", type=float, default=None, help="按该容量上限（MB）立即淘汰")
+    parser.add_argument("--verify", action="store_true", help="校验全部条目的 sha1，删除内容损坏的条目")
+    args = parser.parse_args(argv)
+
+    cache = ResultCache(limit_mb=args.limit)
+    if args.verify:
+        broken = cache.verify(repair=True)
+        print(f"已删除 {len(broken)} 个损坏的条目", file=sys.stderr)
+    if args.clear:
+        cache.evict(0)
+    elif args.limit is not None:
+        cache.evict()
+    print(json.dumps(cache.usage(), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+场景变化检测：每帧的场景分数写入日志，日志可离线重新设定阈值而无需再次解码
+分数只计算一次：一个 select 计算分数并按规则把帧分到 保留 / 其余 两路，两路各自记录分数，结束时按时间合并为一个日志
+python -m core.scene <scene_scores.txt> --threshold 0.3 [--min-gap 1] [--max-gap 30]
+"""
+import argparse
+import json
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+# 场景分数日志文件名（位于输出目录内）
+SCENE_LOG_NAME = "scene_scores.txt"
+# 提取过程中 保留 / 其余 两路各自写出的分数日志，结束时合并
+SCENE_LOG_PARTS = ("scene_scores.kept.part", "scene_scores.rest.part")
+
+
+@dataclass
+class SceneOptions:
+    """两帧之间的最小 / 最大间隔（秒），0 表示不限制"""
+    min_gap: float = 0.0
+    max_gap: float = 0.0
+
+
+def threshold_from_param(param) -> float:
+    """GUI / 命令行的参数 N 为百分比（1-100），换算成 select 滤镜的 0-1 阈值"""
+    return max(0.0, min(1.0, param / 100))
+
+
+def scene_router(threshold, min_gap=0.0, max_gap=0.0):
+    """
+    两路输出的 select：每帧计算一次场景分数（同时写入帧的 lavfi.scene_score 元数据），保留的帧送到第 1 路，其余送到第 2 路
+    规则：第一帧始终保留；分数超过阈值且距上一保留帧不少于 min_gap 秒时保留；距上一保留帧已达 max_gap 秒时强制保留
+    两路输出时 prev_selected_t 对两路都更新，上一保留帧的时间因此存放在表达式变量 0 中
+    """
+    terms = ["eq(n\\,0)", f"gt(scene\\,{threshold:.4f})"]
+    if min_gap > 0:
+        terms[1] += f"*gte(t-ld(0)\\,{min_gap})"
+    if max_gap > 0:
+        terms.append(f"gte(t-ld(0)\\,{max_gap})")
+    return f"select=outputs=2:expr='if({'+'.join(terms)}\\,1+0*st(0\\,t)\\,2)'"
+
+
+def score_log_filter(name):
+    """把经过的帧的场景分数追加写入日志 name（相对 ffmpeg 的工作目录）"""
+    return f"metadata=print:key=lavfi.scene_score:file={name}"
+
+
+def merge_score_logs(directory, offset=0.0, resume_from=None):
+    """
+    把 SCENE_LOG_PARTS 按时间合并为 scene_scores.txt 并删除分段日志；offset 把滤镜中的时间换算为相对提取起点
+    resume_from（相对提取起点，秒）不为 None 时为续提：保留原日志中早于该时间的记录，新记录接在其后
+    没有分段日志（提取未开始）时不改动原日志，返回 None
+    """
+    directory = Path(directory)
+    parts = [directory / name for name in SCENE_LOG_PARTS if (directory / name).is_file()]
+    if not parts:
+        return None
+    scores = sorted((t + offset, score) for part in parts for _, t, score in parse_score_log(part))
+    log = directory / SCENE_LOG_NAME
+    if resume_from is not None and log.is_file():
+        scores = [(t, score) for _, t, score in parse_score_log(log) if t < resume_from - 1e-6] + scores
+    tmp = log.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        for frame, (t, score) in enumerate(scores):
+            f.write(f"frame:{frame} pts_time:{t:.6f}\nlavfi.scene_score={score:.6f}\n")
+    tmp.replace(log)
+    for part in parts:
+        part.unlink(missing_ok=True)
+    return log
+
+
+def parse_score_log(path):
+    """解析 metadata=print 写出的日志，返回 [(帧序号, pts_time, score), ...]，时间相对于提取起点"""
+    scores = []
+    frame, pts_time = None, None
+    with open(path, encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("frame:"):
+                frame, pts_time = None, None
+                for part in line.split():
+                    key, _, value = part.partition(":")
+                    try:
+                        if key == "frame":
+                            frame = int(value)
+                        elif key == "pts_time":
+                            pts_time = float(value)
+                    except ValueError:
+                        pass
+            elif line.startswith("lavfi.scene_score=") and frame is not None:
+                try:
+                    scores.append((frame, pts_time or 0.0, float(line.split("=", 1)[1])))
+                except ValueError:
+                    pass
+    return scores
+
+
+def select_frames(scores, threshold, min_gap=0.0, max_gap=0.0):
+    """用与 scene_router 相同的规则在日志上重新选帧，返回被保留的 (帧序号, pts_time, score)"""
+    kept = []
+    last = None
+    for frame, t, score in scores:
+        if last is None:
+            keep = True
+        else:
+            gap = t - last
+            keep = (score > threshold and gap >= min_gap) or (max_gap > 0 and gap >= max_gap)
+        if keep:
+            kept.append((frame, t, score))
+            last = t
+    return kept
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m core.scene", description="根据场景分数日志重新选帧（不解码）")
+    parser.add_argument("log", type=Path, help=f"场景分数日志（{SCENE_LOG_NAME}）")
+    parser.add_argument("-t", "--threshold", type=float, default=0.3, help="场景变化阈值 0-1")
+    parser.add_argument("--min-gap", type=float, default=0.0, help="两帧之间的最小间隔（秒）")
+    parser.add_argument("--max-gap", type=float, default=0.0, help="两帧之间的最大间隔（秒），0 表示不限制")
+    parser.add_argument("--offset", type=float, default=0.0,
+                        help="日志中的时间相对于提取起点，加上提取起始秒数即为视频中的时间")
+    args = parser.parse_args(argv)
+
+    kept = select_frames(parse_score_log(args.log), args.threshold, args.min_gap, args.max_gap)
+    print(json.dumps({
+        "threshold": args.threshold,
+        "frames": len(kept),
+        "timestamps": [round(t + args.offset, 6) for _, t, _ in kept],
+    }, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
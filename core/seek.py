@@ -0,0 +1,133 @@
+import math
+from dataclasses import dataclass, field
+
+from core.manifest import TIME_EPS
+from core.segments import to_fraction
+
+# 没有关键帧索引时假设的 GOP 时长（秒），取偏大的值让估算更保守
+DEFAULT_GOP_SECONDS = 5.0
+# 一次 seek（解复用定位 + 解码器刷新）相当于解码多少帧
+SEEK_OVERHEAD_FRAMES = 30
+# 启动一个 ffmpeg 进程相当于解码多少帧
+PROCESS_OVERHEAD_FRAMES = 60
+# 每个 ffmpeg 进程最多承载的 seek 窗口数（每个窗口是一路输入）
+WINDOWS_PER_PROCESS = 8
+# seek 引擎的估算代价需低于连续解码的该比例才会被选用
+SEEK_ENGINE_MARGIN = 0.5
+
+
+@dataclass
+class SeekWindow:
+    """一次 seek 后连续解码的窗口，覆盖若干个相邻的采样点"""
+    start: float
+    end: float
+    targets: list = field(default_factory=list)  # 采样时间（秒，绝对时间）
+    start_number: int = 1
+
+
+def sample_times(start_sec, end_sec, mode, param, fps=0, origin=None):
+    """
+    计算 [start_sec, end_sec) 内采样点的时间（秒），采样网格以 origin（默认 start_sec，即提取起点）为原点
+    - 每N秒取1帧：origin + k*N
+    - 每N帧取1帧：从 origin 处的帧起第 k*N 帧的时间（按恒定帧率）
+    """
+    origin = start_sec if origin is None else origin
+    if mode == "每N秒取1帧":
+        first = max(0, math.ceil((start_sec - origin - TIME_EPS) / param))
+        count = math.ceil((end_sec - origin) / param)
+        return [origin + k * param for k in range(first, count)]
+    fps = to_fraction(fps)
+    if fps <= 0:
+        return []
+    origin_index = math.ceil(origin * fps)
+    first_index = math.ceil(start_sec * fps)
+    first_index += (origin_index - first_index) % param
+    last_index = math.ceil(end_sec * fps)
+    return [float(i / fps) for i in range(first_index, last_index, param)]
+
+
+def plan_seek_windows(targets, keyframe_index=None, fps=0):
+    """
+    把采样点合并为 seek 窗口：
+    - 有关键帧索引时，下一个采样点的关键帧不晚于当前窗口末尾，则继续解码比重新 seek 更便宜
+    - 没有索引时，按间隔与 (半个 GOP + seek 开销) 比较
+    """
+    fps = float(fps) if fps else 0.0
+    gop_seconds = keyframe_index.gop_seconds if keyframe_index else DEFAULT_GOP_SECONDS
+    merge_gap = gop_seconds / 2 + (SEEK_OVERHEAD_FRAMES / fps if fps > 0 else 0)
+
+    windows = []
+    for number, t in enumerate(targets, start=1):
+        if windows:
+            last = windows[-1]
+            if keyframe_index is not None and keyframe_index.keyframes:
+                mergeable = keyframe_index.keyframe_before(t) <= last.end
+            else:
+                mergeable = t - last.end <= merge_gap
+            if mergeable:
+                last.targets.append(t)
+                last.end = t
+                continue
+        windows.append(SeekWindow(start=t, end=t, targets=[t], start_number=number))
+    return windows
+
+
+def estimate_costs(start_sec, end_sec, windows, fps, keyframe_index=None, parallel=1):
+    """
+    估算两种引擎的解码代价（单位：帧）
+    返回 (continuous_cost, seek_cost)
+    """
+    fps = float(fps) if fps else 0.0
+    if fps <= 0:
+        fps = 25.0
+    continuous = (end_sec - start_sec) * fps / max(1, parallel) + PROCESS_OVERHEAD_FRAMES
+
+    seek = 0.0
+    for w in windows:
+        if keyframe_index is not None and keyframe_index.keyframes:
+            decode_from = keyframe_index.keyframe_before(w.start)
+        else:
+            decode_from = w.start - DEFAULT_GOP_SECONDS / 2
+        seek += (w.end - decode_from) * fps + 1 + SEEK_OVERHEAD_FRAMES
+    processes = math.ceil(len(windows) / WINDOWS_PER_PROCESS)
+    seek = seek / max(1, min(parallel, processes)) + PROCESS_OVERHEAD_FRAMES * processes / max(1, parallel)
+    return continuous, seek
+
+
+def choose_engine(start_sec, end_sec, mode, param, fps, keyframe_index=None, parallel=1, origin=None):
+    """
+    按代价估算在 连续解码 与 逐点 seek 之间选择，返回 ("seek", windows) 或 ("continuous", None)
+    只有 每N秒取1帧 会自动选择：两种引擎按同一规则（网格点之后的第一帧）取帧，结果相同；
+    每N帧取1帧 在 seek 时按时间定位，可变帧率的视频上与按帧计数不同，只在明确指定 seek 引擎时使用
+    """
+    if mode != "每N秒取1帧":
+        return "continuous", None
+    if fps <= 0 and keyframe_index is not None and keyframe_index.duration > 0:
+        fps = keyframe_index.frame_count / keyframe_index.duration
+    targets = sample_times(start_sec, end_sec, mode, param, fps, origin)
+    if not targets or fps <= 0:
+        return "continuous", None
+    windows = plan_seek_windows(targets, keyframe_index, fps)
+    continuous, seek = estimate_costs(start_sec, end_sec, windows, fps, keyframe_index, parallel)
+    if seek < continuous * SEEK_ENGINE_MARGIN:
+        return "seek", windows
+    return "continuous", None
+
+
+def window_select(window, seek, fps, mode):
+    """
+    生成窗口内的 select 表达式（时间相对于 seek 起点）
+    每N秒取1帧 取采样点之后的第一帧（pts >= 采样点且上一个选中的帧在采样点之前），与连续解码的抽样规则相同；
+    每N帧取1帧 与 时间点列表 取离采样点最近的帧
+    """
+    terms = []
+    if mode == "每N秒取1帧":
+        for t in window.targets:
+            a = t - seek - TIME_EPS
+            terms.append(f"gte(t\\,{a:.6f})*(isnan(prev_selected_t)+lt(prev_selected_t\\,{a:.6f}))")
+        return "select='" + "+".join(terms) + "'"
+    frame = 1 / float(fps)
+    for t in window.targets:
+        a = t - seek - frame / 2
+        terms.append(f"between(t\\,{a:.6f}\\,{a + frame - 1e-6:.6f})")
+    return "select='" + "+".join(terms) + "'"
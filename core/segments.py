@@ -0,0 +1,100 @@
+import math
+import os
+from dataclasses import dataclass
+from fractions import Fraction
+from typing import Optional
+
+# 每段至少覆盖的时长（秒），避免进程启动与 seek 开销吃掉并行收益
+MIN_SEGMENT_SECONDS = 10
+
+
+@dataclass
+class Segment:
+    """一个并行分段：从 start 开始解码 duration 秒，输出编号从 start_number 开始"""
+    index: int
+    start: float
+    duration: float
+    start_number: int
+    max_frames: Optional[int] = None  # 非末段限制输出帧数，保证与串行结果逐帧一致
+
+
+def to_fraction(fps) -> Fraction:
+    """把 fps（float / "30000/1001" / Fraction）转换为有理数"""
+    if isinstance(fps, Fraction):
+        return fps
+    if isinstance(fps, str):
+        try:
+            return Fraction(fps)
+        except (ValueError, ZeroDivisionError):
+            return Fraction(0)
+    try:
+        return Fraction(fps).limit_denominator(1001000)
+    except (TypeError, ValueError):
+        return Fraction(0)
+
+
+def default_segment_count():
+    return max(1, os.cpu_count() or 1)
+
+
+def plan_segments(start_sec, end_sec, mode, param, fps=0, count=1):
+    """
+    把 [start_sec, end_sec] 切成若干段，段边界总是落在采样点上：
+    - 每N秒取1帧：段长为 N 秒的整数倍，段边界落在以提取起点为原点的采样网格上，各段取到的帧与串行完全相同
+    - 每N帧取1帧：段长为 N 帧的整数倍，按恒定帧率换算起点（提前半帧 seek，避免时间戳舍入丢帧）
+    返回 Segment 列表；无法切分时返回单段（即串行）
+    仅关键帧 模式的稀疏规则依赖上一个选中的帧，无法对齐切分，始终串行
+    """
+    duration = end_sec - start_sec
+    serial = [Segment(0, start_sec, duration, 1)]
+    if count <= 1 or duration <= 0 or param <= 0 or mode not in ("每N秒取1帧", "每N帧取1帧"):
+        return serial
+
+    if mode == "每N秒取1帧":
+        total_samples = math.ceil(duration / param)
+        step = param  # 每个采样点对应的秒数
+    else:
+        fps = to_fraction(fps)
+        if fps <= 0:
+            return serial
+        # 与串行相同：取 [start_sec, end_sec) 内第 0、N、2N... 帧
+        total_samples = math.ceil((math.ceil(Fraction(end_sec) * fps) - math.ceil(Fraction(start_sec) * fps)) / param)
+        step = param / fps
+
+    min_samples = max(1, math.ceil(MIN_SEGMENT_SECONDS / step))
+    count = min(count, total_samples // min_samples)
+    if count <= 1:
+        return serial
+
+    per_segment = math.ceil(total_samples / count)
+    if mode == "每N秒取1帧":
+        return _build(start_sec, end_sec, total_samples, per_segment,
+                      lambda k: start_sec + k * per_segment * param, per_segment * param)
+
+    # 串行时的第一帧是 pts >= start_sec 的第一帧，其绝对帧号为 first_index
+    first_index = math.ceil(Fraction(start_sec) * fps)
+    frames_per_segment = per_segment * param
+
+    def seg_start(k):
+        if k == 0:
+            return start_sec
+        return float((first_index + k * frames_per_segment - Fraction(1, 2)) / fps)
+
+    return _build(start_sec, end_sec, total_samples, per_segment, seg_start, float(frames_per_segment / fps))
+
+
+def _build(start_sec, end_sec, total_samples, per_segment, seg_start, seg_length):
+    """段数按采样点数计算：按时间比较时，提前半帧的段起点可能在最后一个采样点之后仍早于 end_sec，多出一个空段"""
+    count = math.ceil(total_samples / per_segment)
+    segments = []
+    for k in range(count):
+        start = seg_start(k)
+        last = k == count - 1
+        segments.append(Segment(
+            index=k,
+            start=start,
+            duration=(end_sec - start) if last else max(seg_length, seg_start(k + 1) - start),
+            start_number=1 + k * per_segment,
+            max_frames=None if last else per_segment,
+        ))
+    return segments
@@ -0,0 +1,173 @@
+"""
+原始帧流式接口：ffmpeg 以 rawvideo 输出到 stdout，按与 FrameExtractor 相同的抽样规则逐帧产出 NumPy 数组
+
+    from core.stream import FrameStream
+    with FrameStream("a.mp4", mode="每N秒取1帧", param=1) as stream:
+        for frame in stream:
+            model(frame.image)   # frame.image 指向复用的缓冲区，需保留时请 .copy()
+
+需要 numpy（可选依赖，仅本模块使用，迭代时才导入；build_command 可在没有 numpy 时查看命令）
+"""
+import queue
+import subprocess
+import sys
+import threading
+from dataclasses import dataclass, replace
+from pathlib import Path
+
+from core.extractor import FrameExtractor, Job, PerformanceOptions, Tap
+from core.segments import Segment
+from core.util import FFMPEG_BIN
+
+# 支持的像素格式 -> 每像素通道数
+PIXEL_FORMATS = {"rgb24": 3, "bgr24": 3, "rgba": 4, "bgra": 4, "gray": 1}
+
+
+@dataclass
+class StreamFrame:
+    number: int  # 输出序号（从 1 开始，与输出文件名中的编号一致）
+    index: int  # 源视频帧号（与帧清单相同：逐帧计数，没有关键帧索引且不从头解码时按平均帧率换算起点）
+    pts: float  # 源视频中的时间（秒）
+    image: object  # numpy.ndarray，形状 (高, 宽, 通道) 或灰度 (高, 宽)，指向复用的缓冲区
+
+
+class FrameStream:
+    """
+    以迭代器方式产出抽样帧
+    - 内存占用固定：buffers 个预分配的帧缓冲区轮流复用，stdout 直接 readinto，不做逐帧拷贝
+    - 每帧的时间戳与帧号来自 ffmpeg showinfo，与 FrameExtractor 写出的帧清单相同
+    - size=(宽, 高) 时在滤镜中直接缩放；output=OutputOptions(resize=core.resize.Resize(...)) 时按其适配方式缩放（可低分辨率解码）；
+      否则使用视频的显示分辨率
+    - 其余选项（selection / output / performance）与 FrameExtractor 相同
+    """
+
+    def __init__(self, video_path, start_sec=0.0, end_sec=None, mode="每N秒取1帧", param=1, pix_fmt="rgb24",
+                 size=None, buffers=2, video_info=None, use_index=True, **options):
+        if pix_fmt not in PIXEL_FORMATS:
+            raise ValueError(f"不支持的像素格式：{pix_fmt}（可选 {', '.join(PIXEL_FORMATS)}）")
+
+        self.extractor = FrameExtractor(
+            video_path=video_path,
+            output_dir=Path(video_path).parent,  # 不写文件，仅用于复用抽样规则
+            start_sec=start_sec,
+            end_sec=end_sec if end_sec is not None else 0,
+            mode=mode,
+            param=param,
+            fmt="png",
+            quality=0,
+            video_info=video_info,
+            performance=replace(options.pop("performance", None) or PerformanceOptions(), use_index=use_index),
+            **options
+        )
+        self.extractor.dedup = None  # 去重依赖另一路 showinfo 计数，流式接口不支持
+        if end_sec is None:
+            self.extractor.end_sec = start_sec + self.extractor.duration
+
+        self.start_sec = start_sec
+        self.pix_fmt = pix_fmt
+        self.size = size
+        self.fps = self.extractor.video_info.get("fps", 0)
+        self.proc = None
+        self.job = None
+        self._pts = queue.Queue()
+        self._buffers = max(1, buffers)
+
+    def frame_size(self):
+        if self.size:
+            return self.size
+        return self.extractor.frame_size()
+
+    def build_job(self, width, height):
+        extractor = self.extractor
+        segment = Segment(0, extractor.start_sec, extractor.end_sec - extractor.start_sec, 1)
+        input_args, prefix, seek = extractor.build_input(segment)
+        source, sources = extractor.source_tap(seek)
+        # 🔹 帧尺寸在滤镜中固定为读取时切分用的 (宽, 高)，不依赖 ffmpeg 自行推算的尺寸
+        extra = [extractor.tap(), f"scale={width}:{height}"]
+        cmd = [str(FFMPEG_BIN), *extractor.global_args(), "-nostats", *input_args]
+        if extractor.mode == "场景变化":
+            # 🔹 与写文件时相同的两路 select：保留的帧送到管道，其余帧丢弃；流式接口不写分数日志
+            router, _, _ = extractor.build_scene_router(log=False)
+            graph = (f"[0:v]{source}{prefix}{router}[keep][rest];[rest]nullsink;"
+                     f"[keep]{extractor.build_filter(extra, seek)}[out]")
+            cmd += ["-filter_complex", graph, "-map", "[out]"]
+        else:
+            cmd += ["-vf", source + prefix + extractor.build_filter(extra, seek)]
+        cmd += ["-f", "rawvideo", "-pix_fmt", self.pix_fmt, "pipe:1"]
+        return Job(cmd, segment.duration, outputs={"kept": Tap(1, seek, None, "src" if sources else None)},
+                   sources=sources)
+
+    def build_command(self, width, height):
+        return self.build_job(width, height).cmd
+
+    def _read_stderr(self):
+        for line in iter(self.proc.stderr.readline, b""):
+            line = line.decode("utf-8", errors="ignore").strip()
+            frame = self.job.feed(line, self.extractor.frame_index_at) if line.startswith("[") else None
+            if frame is not None:
+                self._pts.put(frame[2:])
+        self._pts.put(None)
+
+    def __iter__(self):
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError("FrameStream 需要 numpy：pip install numpy")
+        extractor = self.extractor
+        if extractor.use_index:
+            try:
+                from core.keyframes import load_keyframe_index
+                extractor.keyframe_index = load_keyframe_index(extractor.video_path)
+            except Exception:
+                extractor.keyframe_index = None
+
+        width, height = self.frame_size()
+        channels = PIXEL_FORMATS[self.pix_fmt]
+        shape = (height, width) if channels == 1 else (height, width, channels)
+        frame_bytes = width * height * channels
+        buffers = [numpy.empty(shape, dtype=numpy.uint8) for _ in range(self._buffers)]
+        views = [memoryview(b.reshape(-1)) for b in buffers]
+
+        creation_flags = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+        self.job = self.build_job(width, height)
+        self.proc = subprocess.Popen(
+            self.job.cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            stdin=subprocess.DEVNULL,
+            bufsize=0,
+            creationflags=creation_flags,
+            shell=False
+        )
+        threading.Thread(target=self._read_stderr, daemon=True).start()
+
+        number = 0
+        try:
+            while True:
+                view = views[number % len(views)]
+                filled = 0
+                while filled < frame_bytes:
+                    n = self.proc.stdout.readinto(view[filled:])
+                    if not n:
+                        break
+                    filled += n
+                if filled < frame_bytes:
+                    break
+
+                frame = self._pts.get()
+                number += 1
+                index, pts = frame if frame is not None else (number - 1, self.start_sec)
+                yield StreamFrame(number, index, pts, buffers[(number - 1) % len(buffers)])
+        finally:
+            self.close()
+
+    def close(self):
+        if self.proc is not None and self.proc.poll() is None:
+            self.proc.terminate()
+            self.proc.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,91 @@
+"""
+时间点列表模式：按上游给出的任意时间点（或帧号）取帧
+- 目标排序、对齐到最近的帧并去重，再由 core.seek 合并为 seek 窗口（同一 GOP 内的目标共用一次解码）
+- targets.csv 按请求顺序记录每个时间点对应的输出帧，多个请求落在同一帧时指向同一个文件
+列表文件：每行一个时间（秒 或 [时:]分:秒）或帧号，可带逗号分隔的其他列（取第一列），# 开头为注释
+"""
+import csv
+from dataclasses import dataclass
+from pathlib import Path
+
+TARGETS_NAME = "targets.csv"
+TARGET_COLUMNS = ("request", "requested", "number", "path", "pts")
+
+
+@dataclass
+class TargetList:
+    """要取的时间点（秒）或帧号，保持请求顺序；两者都给出时以时间点为准"""
+    times: list = None
+    frames: list = None
+
+    def __post_init__(self):
+        if self.times is None and self.frames is None:
+            raise ValueError("时间点列表为空：需要时间点或帧号")
+        self.times = list(self.times) if self.times is not None else None
+        self.frames = list(self.frames) if self.frames is not None else None
+
+    @property
+    def requests(self):
+        return self.times if self.times is not None else self.frames
+
+
+def read_target_file(path, frames=False):
+    """读取列表文件，返回时间（秒）或帧号的列表（保持文件中的顺序）"""
+    from core.cli import parse_time
+
+    values = []
+    with open(path, encoding="utf-8-sig") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            value = line.split(",", 1)[0].strip()
+            try:
+                values.append(int(value) if frames else parse_time(value))
+            except Exception:
+                if line_number == 1:
+                    continue  # CSV 表头
+                raise ValueError(f"{path} 第 {line_number} 行无法解析：{value}")
+    return values
+
+
+def frames_to_times(numbers, fps):
+    """帧号 -> 时间（按恒定帧率，取帧的起始时间）"""
+    if fps <= 0:
+        raise ValueError("视频帧率未知，无法按帧号取帧")
+    return [n / fps for n in numbers]
+
+
+def snap_targets(requests, fps, start_sec, end_sec):
+    """
+    把请求的时间对齐到最近的帧并去重，返回 (排序后的目标时间, 每个请求对应的目标序号或 None)
+    范围之外的请求对应 None
+    """
+    if fps <= 0:
+        raise ValueError("视频帧率未知，无法按时间点取帧")
+    frame_of = {}
+    for t in requests:
+        if start_sec - 0.5 / fps <= t < end_sec:
+            frame_of.setdefault(t, max(0, int(round(t * fps))))
+    indexes = sorted(set(frame_of.values()))
+    number_of = {index: number for number, index in enumerate(indexes, start=1)}
+    mapping = [number_of[frame_of[t]] if t in frame_of else None for t in requests]
+    return [index / fps for index in indexes], mapping
+
+
+def write_target_index(path, requests, mapping, rows):
+    """
+    requests：请求的时间或帧号（请求顺序），mapping：snap_targets 得到的目标序号
+    rows：帧清单中的行 (number, index, pts, path, bytes)；范围之外或未能取到的请求写空行
+    """
+    by_number = {row[0]: row for row in rows}
+    with open(Path(path), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(TARGET_COLUMNS)
+        for request, (value, number) in enumerate(zip(requests, mapping)):
+            requested = f"{value:.6f}" if isinstance(value, float) else value  # 时间或帧号
+            row = by_number.get(number)
+            if row is None:
+                writer.writerow((request, requested, "", "", ""))
+            else:
+                writer.writerow((request, requested, number, row[3], f"{row[2]:.6f}"))
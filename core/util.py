@@ -1,57 +1,82 @@
-import json
-import subprocess
+import datetime
+import hashlib
+import os
 import sys
 from pathlib import Path
 
-from PyQt6.QtWidgets import QMessageBox
-
 # 项目根目录
 PROJECT_ROOT = Path(__file__).parent.parent  # 假设文件在 core/ 下
 FFMPEG_BIN = PROJECT_ROOT / "ffmpeg" / ("ffmpeg.exe" if sys.platform == "win32" else "ffmpeg")
 FFPROBE_BIN = PROJECT_ROOT / "ffmpeg" / ("ffprobe.exe" if sys.platform == "win32" else "ffprobe")
+APP_NAME = "VideoFrameCollector-Single"
 
 
-def check_ffmpeg_exists(gui_mode=True):
-    missing = []
-    if not FFMPEG_BIN.is_file():
-        missing.append(FFMPEG_BIN)
-    if not FFPROBE_BIN.is_file():
-        missing.append(FFPROBE_BIN)
-    if missing:
-        msg = "缺少必要的组件：\n" + "\n".join(map(str, missing)) + \
-              "\n\n请将 ffmpeg 和 ffprobe 放入项目的 ffmpeg/ 文件夹。"
-        if gui_mode:
-            QMessageBox.critical(None, "缺少 ffmpeg", msg)
+def get_cache_dir(*parts) -> Path:
+    """返回（并创建）缓存目录，可用环境变量 VFC_CACHE_DIR 覆盖"""
+    base = os.environ.get("VFC_CACHE_DIR")
+    if not base:
+        if sys.platform == "win32":
+            base = os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local"
         else:
-            print(msg)
+            base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+        base = Path(base) / APP_NAME
+    path = Path(base).joinpath(*parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def file_cache_key(path: Path) -> str:
+    """按 路径 + 大小 + 修改时间 生成缓存键，文件变化后自动失效"""
+    path = Path(path).resolve()
+    st = path.stat()
+    raw = f"{path}|{st.st_size}|{st.st_mtime_ns}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def missing_ffmpeg_message():
+    """缺少 ffmpeg / ffprobe 时返回提示文字，齐全时返回 None"""
+    missing = [path for path in (FFMPEG_BIN, FFPROBE_BIN) if not path.is_file()]
+    if not missing:
+        return None
+    return "缺少必要的组件：\n" + "\n".join(map(str, missing)) + "\n\n请将 ffmpeg 和 ffprobe 放入项目的 ffmpeg/ 文件夹。"
+
+
+def check_ffmpeg_exists():
+    """界面启动时检查：缺少 ffmpeg 时弹窗并退出（命令行入口以 JSON 报错，见 missing_ffmpeg_message）"""
+    msg = missing_ffmpeg_message()
+    if msg:
+        from PyQt6.QtWidgets import QMessageBox
+        QMessageBox.critical(None, "缺少 ffmpeg", msg)
         sys.exit(1)
 
 
+def detect_gpu():
+    """本机是否有可用的硬件解码（按内置 ffmpeg 的缓存能力表，不再每次启动子进程）"""
+    from core.capabilities import get_capabilities  # capabilities 依赖本模块，延迟导入避免循环引用
+    return get_capabilities().best_hwaccel() is not None
+
+
+def make_output_dir(base_output: Path, video_path: Path) -> Path:
+    """在 base_output 下创建新的 <视频文件名>_帧提取_<日期时间> 输出目录"""
+    timestamp = datetime.datetime.now().strftime("%Y年%m月%d日%H时%M分%S秒")
+    name = f"{Path(video_path).stem}_帧提取_{timestamp}"
+    Path(base_output).mkdir(parents=True, exist_ok=True)
+    # 同一秒内同名视频（批量处理时常见）加序号区分
+    for n in range(1, 1000):
+        output_dir = Path(base_output) / (name if n == 1 else f"{name}_{n}")
+        try:
+            output_dir.mkdir()
+            return output_dir
+        except FileExistsError:
+            continue
+    raise FileExistsError(f"无法创建输出目录：{name}")
+
+
 def get_duration(video_path: Path):
-    """用内置 ffprobe 获取视频时长（秒），不显示 cmd 窗口"""
-    cmd = [
-        str(FFPROBE_BIN), "-v", "error",
-        "-show_entries", "format=duration",
-        "-of", "json",
-        str(video_path)
-    ]
+    """用内置 ffprobe 获取视频时长（秒），结果与其他元数据一起缓存"""
+    from core.probe import probe_video  # probe 依赖本模块，延迟导入避免循环引用
     try:
-        # Windows 下禁止弹出黑框
-        creation_flags = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
-
-        proc = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            encoding="utf-8",
-            errors="ignore",
-            creationflags=creation_flags,
-            shell=False
-        )
-        stdout, _ = proc.communicate()
-        info = json.loads(stdout)
-        return float(info["format"]["duration"])
+        return probe_video(video_path).duration
     except Exception:
         return 0
 
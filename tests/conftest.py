@@ -0,0 +1,80 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.util import FFMPEG_BIN, FFPROBE_BIN  # noqa: E402
+
+
+_GROUPS = {
+    "selection": ("scene", "dedup", "targets"),
+    "output": ("container", "resize", "tile", "layout"),
+    "performance": ("use_gpu", "parallel", "threads", "engine", "encoders", "use_index", "auto_tune"),
+}
+
+
+def grouped(kwargs):
+    """把测试中平铺的选项归入 FrameExtractor 的 selection / output / performance 选项对象"""
+    from core.extractor import OutputOptions, PerformanceOptions, SelectionOptions
+
+    classes = {"selection": SelectionOptions, "output": OutputOptions, "performance": PerformanceOptions}
+    for group, names in _GROUPS.items():
+        values = {name: kwargs.pop(name) for name in names if name in kwargs}
+        if values:
+            kwargs[group] = classes[group](**values)
+    return kwargs
+
+
+@pytest.fixture
+def make_extractor(tmp_path):
+    """构造不探测视频、不运行 ffmpeg 的 FrameExtractor，用于检查点与缓存等纯逻辑"""
+    from core.extractor import FrameExtractor
+
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"\0" * 4096)
+
+    def make(output_dir, mode="每N秒取1帧", param=1, start_sec=0, end_sec=40.0, duration=40.0, fps=25, width=64,
+             height=48, **kwargs):
+        info = {"duration": duration, "fps": fps, "total_frames": int(duration * fps), "width": width, "height": height}
+        return FrameExtractor(video, output_dir, start_sec, end_sec, mode, param, kwargs.pop("fmt", "png"), 0,
+                              video_info=info, **grouped(kwargs))
+
+    return make
+
+
+@pytest.fixture(scope="session")
+def lavfi_video(tmp_path_factory):
+    """用 lavfi testsrc2 生成的 40 秒合成视频（GOP 2 秒）；没有 ffmpeg 时跳过"""
+    if not (FFMPEG_BIN.is_file() and FFPROBE_BIN.is_file()):
+        pytest.skip("需要 ffmpeg / ffprobe（放在项目的 ffmpeg 目录中）")
+    from core.bench import VideoSpec, generate_video
+
+    cache = tmp_path_factory.mktemp("cache")
+    patch = pytest.MonkeyPatch()
+    patch.setenv("VFC_CACHE_DIR", str(cache))
+    yield generate_video(VideoSpec(160, 120, gop=50, duration=40), cache=False)
+    patch.undo()
+
+
+@pytest.fixture
+def run_extraction(tmp_path):
+    """运行一次提取，返回帧清单中的 (输出序号, 源视频帧号, 时间)"""
+    from core.extractor import FrameExtractor
+    from core.manifest import FrameManifest
+    from core.probe import probe_video
+
+    def run(video, mode, param, **kwargs):
+        info = probe_video(video)
+        output_dir = tmp_path / f"out_{len(list(tmp_path.iterdir()))}"
+        output_dir.mkdir()
+        extractor = FrameExtractor(video, output_dir, 0, info.duration, mode, param, "png", 0, video_info=info,
+                                   **grouped(kwargs))
+        result = extractor.run()
+        assert result["status"] == "completed", result["error"]
+        return [(number, index, round(pts, 6)) for number, index, pts, _, _ in FrameManifest.load(output_dir).rows]
+
+    return run
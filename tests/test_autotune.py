@@ -0,0 +1,127 @@
+import pytest
+
+from core.autotune import (autotune, calibration_extractor, candidates, load_profiles, max_parallel, profile_key,
+                           PROFILE_VERSION, PROFILES_NAME, resolution_class, save_profile, TuneOptions, TuneResult)
+from core.dedup import DedupOptions
+from core.mosaic import TileLayout
+from core.resize import Resize
+from core.targets import TargetList
+
+
+def test_resolution_class():
+    assert resolution_class(640, 360) == "sd"
+    assert resolution_class(1920, 1080) == "fhd"
+    assert resolution_class(3840, 2160) == "uhd"
+    assert resolution_class(0, 0) == "unknown"
+
+
+def test_candidates():
+    assert candidates(8, 8) == [(1, 8), (2, 4), (4, 2), (8, 1)]
+    assert candidates(8, 1) == [(1, 8)]
+
+
+def test_key_separates_limited_workloads(tmp_path, make_extractor):
+    base = profile_key(make_extractor(tmp_path), 8)
+    keys = {
+        profile_key(make_extractor(tmp_path, mode="每N帧取1帧", param=25), 8),
+        profile_key(make_extractor(tmp_path, dedup=DedupOptions()), 8),
+        profile_key(make_extractor(tmp_path, encoders=2), 8),
+        profile_key(make_extractor(tmp_path, tile=TileLayout(2, 2)), 8),
+        profile_key(make_extractor(tmp_path), 4),
+    }
+    assert base not in keys and len(keys) == 5
+    # 编码线程池与打包输出都是 ffmpeg 输出原始帧
+    assert profile_key(make_extractor(tmp_path, container="zip"), 8) == \
+        profile_key(make_extractor(tmp_path, encoders=2), 8)
+    assert profile_key(make_extractor(tmp_path, param=5), 8) == base
+
+
+def test_max_parallel(tmp_path, make_extractor):
+    assert max_parallel(make_extractor(tmp_path, param=1), 4, 0, 40) == 4
+    assert max_parallel(make_extractor(tmp_path, param=1, dedup=DedupOptions()), 4, 0, 40) == 1
+    assert max_parallel(make_extractor(tmp_path, param=1, container="tar"), 4, 0, 40) == 1
+    assert max_parallel(make_extractor(tmp_path, mode="仅关键帧", param=0), 4, 0, 40) == 1
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"dedup": DedupOptions(hi=500)},
+    {"tile": TileLayout(3, 2)},
+    {"encoders": 2},
+    {"container": "npy"},
+    {"resize": Resize(320)},
+])
+def test_calibration_matches_key(tmp_path, make_extractor, kwargs):
+    extractor = make_extractor(tmp_path, **kwargs)
+    probe = calibration_extractor(extractor, 10.0, 3.0, 1, 2, tmp_path / "tune")
+    # 校准的负载与配置键描述的一致
+    assert profile_key(probe, 8) == profile_key(extractor, 8)
+    assert (probe.start_sec, probe.end_sec, probe.threads) == (10.0, 13.0, 2)
+
+
+def test_pipeline_calibration_outputs_raw_frames(tmp_path, make_extractor):
+    from core.segments import Segment
+
+    probe = calibration_extractor(make_extractor(tmp_path, encoders=2), 10.0, 3.0, 1, 2, tmp_path)
+    cmd = probe.build_command(Segment(0, 10.0, 3.0, 1), raw=probe.use_pipeline)
+    assert "rawvideo" in cmd
+
+
+def test_target_list_is_not_tuned(tmp_path, make_extractor):
+    extractor = make_extractor(tmp_path, targets=TargetList(times=[1.0, 5.0]), auto_tune=TuneOptions())
+    result = autotune(extractor, 0, 40, cores=4)
+    assert result.source == "default"
+    assert extractor.parallel == 1
+
+
+@pytest.fixture
+def profiles_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("VFC_CACHE_DIR", str(tmp_path / "cache"))
+    return tmp_path / "cache" / "autotune"
+
+
+def test_profiles_round_trip(profiles_dir):
+    assert load_profiles() == {}
+    save_profile("a", TuneResult(4, 2, 123.4, "calibrated"))
+    save_profile("b", TuneResult(1, 8))
+    profiles = load_profiles()
+    assert (profiles["a"]["parallel"], profiles["a"]["threads"], profiles["a"]["fps"]) == (4, 2, 123.4)
+    assert set(profiles) == {"a", "b"}
+    # 版本不同的配置文件整体作废
+    path = profiles_dir / PROFILES_NAME
+    path.write_text(path.read_text(encoding="utf-8").replace(f'"version": {PROFILE_VERSION}', '"version": 1'),
+                    encoding="utf-8")
+    assert load_profiles() == {}
+
+
+def test_saved_profile_is_used(tmp_path, make_extractor, profiles_dir, monkeypatch):
+    extractor = make_extractor(tmp_path, param=1)
+    save_profile(profile_key(extractor, 8), TuneResult(4, 2, 50.0, "calibrated"))
+    monkeypatch.setattr("core.autotune.calibrate", lambda *args, **kwargs: pytest.fail("不应重新校准"))
+    result = autotune(extractor, 0, 40, cores=8)
+    assert (result.source, extractor.parallel, extractor.threads) == ("profile", 4, 2)
+
+
+def test_short_range_keeps_defaults(tmp_path, make_extractor, profiles_dir, monkeypatch):
+    monkeypatch.setattr("core.autotune.calibrate", lambda *args, **kwargs: pytest.fail("范围太短，不应校准"))
+    extractor = make_extractor(tmp_path, end_sec=20.0)
+    assert autotune(extractor, 0, 20, cores=8).source == "default"
+    assert extractor.parallel == 1
+
+
+def test_calibration_plan(tmp_path, make_extractor, profiles_dir, monkeypatch):
+    speeds = {(1, 4): 100.0, (2, 2): 180.0, (4, 1): 150.0, (2, 1): 170.0, (2, 4): 190.0}
+    calls = []
+
+    def measure(extractor, start, seconds, parallel, threads, workdir):
+        calls.append((start, seconds, parallel, threads))
+        return speeds[(parallel, threads)]
+
+    monkeypatch.setattr("core.autotune.measure", measure)
+    extractor = make_extractor(tmp_path, param=1)
+    result = autotune(extractor, 0, 40, cores=4)
+    # 校准片段取范围中间；先预热一次，再粗选并行数，最后对最优并行数细调线程数
+    assert {(start, seconds) for start, seconds, _, _ in calls} == {(18.5, 3.0)}
+    assert [call[2:] for call in calls] == [(1, 4), (1, 4), (2, 2), (4, 1), (2, 1), (2, 4)]
+    assert (result.source, result.parallel, result.threads, result.fps) == ("calibrated", 2, 4, 190.0)
+    assert load_profiles()[result.key]["threads"] == 4
+    assert (extractor.parallel, extractor.threads) == (2, 4)
@@ -0,0 +1,127 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from core import batch
+from core.autotune import TuneOptions
+from core.batch import BatchRunner, collect_videos
+from core.extractor import PerformanceOptions
+
+
+def touch(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"\0")
+    return path
+
+
+def test_collect_videos_from_folder(tmp_path):
+    mp4 = touch(tmp_path / "b.mp4")
+    mkv = touch(tmp_path / "a.MKV")
+    touch(tmp_path / "notes.txt")
+    nested = touch(tmp_path / "sub" / "c.avi")
+    assert collect_videos([tmp_path]) == [mkv, mp4]
+    assert collect_videos([tmp_path], recursive=True) == [mkv, mp4, nested]
+
+
+def test_collect_videos_from_list_and_glob(tmp_path):
+    a = touch(tmp_path / "a.mp4")
+    b = touch(tmp_path / "b.mov")
+    listing = tmp_path / "videos.lst"
+    listing.write_text(f"# 注释\n{b}\n\n{tmp_path / 'missing.mp4'}\n", encoding="utf-8")
+    # 重复的视频只保留第一次出现；不存在的文件照样列出，运行时记为 skipped
+    assert collect_videos([listing, str(tmp_path / "*.m*"), a]) == [b, tmp_path / "missing.mp4", a]
+
+
+def options(**performance):
+    return {"mode": "每N秒取1帧", "param": 1, "fmt": "png", "quality": 0,
+            "performance": PerformanceOptions(**performance)}
+
+
+def test_workers_share_process_budget():
+    runner = BatchRunner([], None, options(parallel=2), max_processes=8)
+    assert runner.workers == 4
+    performance = runner.options["performance"]
+    assert performance.parallel == 2
+    assert performance.threads == max(1, (os.cpu_count() or 1) // 8)
+    # 单个视频的并行数不超过总上限
+    assert BatchRunner([], None, options(parallel=16), max_processes=4).options["performance"].parallel == 4
+
+
+def test_auto_tune_gets_per_worker_cores():
+    runner = BatchRunner([], None, options(auto_tune=TuneOptions()), max_processes=4)
+    performance = runner.options["performance"]
+    assert performance.auto_tune.cores == max(1, (os.cpu_count() or 1) // 4)
+    assert performance.threads is None
+
+
+class FakeExtractor:
+    """按 outcomes 依次返回结果的提取器替身"""
+    created = []
+    outcomes = {}
+
+    def __init__(self, video_path, output_dir, **kwargs):
+        self.video_path, self.output_dir, self.kwargs = video_path, output_dir, kwargs
+        FakeExtractor.created.append(self)
+
+    def run(self):
+        self.clean = not any(self.output_dir.iterdir())
+        (self.output_dir / "partial.png").write_bytes(b"")
+        status = FakeExtractor.outcomes[self.video_path.name].pop(0)
+        return {"status": status, "frames": 3 if status == "completed" else 0, "error": None}
+
+    def stop(self):
+        pass
+
+
+@pytest.fixture
+def fake_engine(monkeypatch):
+    FakeExtractor.created = []
+    monkeypatch.setattr(batch, "FrameExtractor", FakeExtractor)
+    monkeypatch.setattr(batch, "probe_video", lambda video: SimpleNamespace(duration=10.0))
+    return FakeExtractor
+
+
+def test_retry_starts_from_empty_output_dir(tmp_path, fake_engine):
+    videos = [touch(tmp_path / "a.mp4"), touch(tmp_path / "b.mp4")]
+    fake_engine.outcomes = {"a.mp4": ["error", "completed"], "b.mp4": ["completed"]}
+    done = []
+    runner = BatchRunner(videos, tmp_path / "out", options(), max_processes=1, retries=1, on_job_done=done.append)
+    summary = runner.run()
+
+    assert [job.status for job in runner.jobs] == ["completed", "completed"]
+    assert [job.attempts for job in runner.jobs] == [2, 1]
+    assert (summary["status"], summary["retried"], summary["frames"]) == ("completed", 1, 6)
+    first, second = fake_engine.created[:2]
+    # 重试前清掉上次的残留输出
+    assert first.clean and second.clean
+    assert len(list((tmp_path / "out").iterdir())) == 2
+    assert len(done) == 2
+    # 每次提取使用参数的深拷贝
+    assert first.kwargs["performance"] is not second.kwargs["performance"]
+
+
+def test_retries_exhausted(tmp_path, fake_engine):
+    fake_engine.outcomes = {"a.mp4": ["error", "error"]}
+    runner = BatchRunner([touch(tmp_path / "a.mp4")], tmp_path / "out", options(), max_processes=1, retries=1)
+    summary = runner.run()
+    assert summary["status"] == "error" and summary["counts"] == {"error": 1}
+    assert runner.jobs[0].result["attempts"] == 2
+
+
+def test_invalid_jobs_are_skipped(tmp_path, fake_engine):
+    fake_engine.outcomes = {}
+    runner = BatchRunner([tmp_path / "missing.mp4", touch(tmp_path / "a.mp4")], tmp_path / "out", options(),
+                         start_sec=20.0, max_processes=1)
+    summary = runner.run()
+    assert [job.status for job in runner.jobs] == ["skipped", "skipped"]
+    assert summary["status"] == "completed" and not fake_engine.created
+    assert runner.overall_progress() == 100
+
+
+def test_stopped_runner_cancels_pending_jobs(tmp_path, fake_engine):
+    runner = BatchRunner([touch(tmp_path / "a.mp4")], tmp_path / "out", options(), max_processes=1)
+    runner.stop()
+    summary = runner.run()
+    assert runner.jobs[0].status == "cancelled"
+    assert summary["status"] == "stopped" and not fake_engine.created
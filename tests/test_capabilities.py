@@ -0,0 +1,95 @@
+import sys
+
+import pytest
+
+from core import capabilities
+from core.capabilities import FFmpegCapabilities, get_capabilities, probe_capabilities
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="用 shell 脚本模拟 ffmpeg")
+
+OUTPUTS = {
+    "-version": "ffmpeg version 6.1.1 Copyright (c) 2000-2023 the FFmpeg developers\nbuilt with gcc 12",
+    "-hwaccels": "Hardware acceleration methods:\nvdpau\ncuda\nvaapi\n",
+    "-decoders": ("Decoders:\n V..... = Video\n ------\n"
+                  " V....D h264                 H.264 / AVC / MPEG-4 AVC / MPEG-4 part 10\n"
+                  " V....D libdav1d             dav1d AV1 decoder by VideoLAN (codec av1)\n"
+                  " A....D aac                  AAC (Advanced Audio Coding)\n"),
+    "-encoders": ("Encoders:\n ------\n"
+                  " V....D png                  PNG (Portable Network Graphics) image\n"
+                  " VFS..D mjpeg                MJPEG (Motion JPEG)\n"),
+    "-filters": ("Filters:\n  T.. = Timeline support\n  ------\n"
+                 " TSC showinfo          V->V       Show textual information for each video frame.\n"
+                 " ... split             V->N       Pass on the input to N video outputs.\n"
+                 " ... nullsink          V->|       Do absolutely nothing with the input video.\n"),
+    "-h": "Advanced global options:\n-filter_threads     number of non-complex filter threads\n-stats  print\n",
+    "filter=showinfo": ("Filter showinfo\nshowinfo AVOptions:\n"
+                        "   checksum          <boolean>    ..FV....... calculate checksums (default true)\n"
+                        "   udu_sei_as_ascii  <boolean>    ..FV....... try to print user data unregistered SEI\n"),
+}
+
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path):
+    """按参数输出预设文本的 ffmpeg 替身；-init_hw_device 只有 cuda 成功；每次调用记入 calls.log"""
+    script = ["#!/bin/sh", f'echo "$*" >> "{tmp_path / "calls.log"}"']
+    for key, text in OUTPUTS.items():
+        (tmp_path / f"{key.strip('-').replace('=', '_')}.txt").write_text(text, encoding="utf-8")
+    script += [
+        'case "$*" in',
+        '  *-init_hw_device\\ cuda*) exit 0 ;;',
+        '  *-init_hw_device*) exit 1 ;;',
+        *(f'  *{key}*) cat "{tmp_path / (key.strip("-").replace("=", "_") + ".txt")}" ;;'
+          for key in ("filter=showinfo", "-version", "-hwaccels", "-decoders", "-encoders", "-filters", "-h")),
+        "esac",
+    ]
+    path = tmp_path / "ffmpeg"
+    path.write_text("\n".join(script) + "\n", encoding="utf-8")
+    path.chmod(0o755)
+    return path
+
+
+def test_probe_parses_listings(fake_ffmpeg):
+    caps = probe_capabilities(fake_ffmpeg)
+    assert caps.version == "6.1.1"
+    assert caps.hwaccels == ["vdpau", "cuda", "vaapi"]
+    assert caps.usable_hwaccels == ["cuda"]
+    assert caps.decoders == ["h264", "libdav1d", "aac"]
+    assert caps.encoders == ["png", "mjpeg"]
+    assert caps.filters == ["showinfo", "split", "nullsink"]
+    assert caps.options == ["filter_threads", "stats"]
+    assert caps.filter_options == {"showinfo": ["checksum", "udu_sei_as_ascii"]}
+
+
+def test_selection(fake_ffmpeg):
+    caps = probe_capabilities(fake_ffmpeg)
+    assert caps.best_hwaccel() == "cuda"
+    assert caps.decoder_for("av1") == "libdav1d" and caps.decoder_for("h264") is None
+    assert (caps.encoder_for("png"), caps.encoder_for("jpg"), caps.encoder_for("webp")) == ("png", "mjpeg", None)
+    assert caps.has_filter_option("showinfo", "checksum")
+    assert caps.thread_args(processes=4, threads=2) == (["-threads", "2"], ["-filter_threads", "2"])
+    assert caps.thread_args() == ([], [])
+
+
+def test_empty_table_uses_defaults(tmp_path):
+    caps = probe_capabilities(tmp_path / "missing")
+    assert caps == FFmpegCapabilities(binary=str(tmp_path / "missing"))
+    assert caps.encoder_for("png") == "png" and caps.best_hwaccel() is None
+    assert not caps.has_filter_option("showinfo", "checksum")
+
+
+def test_disk_cache(fake_ffmpeg, tmp_path, monkeypatch):
+    monkeypatch.setenv("VFC_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(capabilities, "_memory_cache", {})
+    first = get_capabilities(fake_ffmpeg)
+    calls = (tmp_path / "calls.log").read_text().count("\n")
+
+    monkeypatch.setattr(capabilities, "_memory_cache", {})
+    assert get_capabilities(fake_ffmpeg) == first
+    # 第二次从磁盘缓存读取，不再运行 ffmpeg
+    assert (tmp_path / "calls.log").read_text().count("\n") == calls
+    get_capabilities(fake_ffmpeg, refresh=True)
+    assert (tmp_path / "calls.log").read_text().count("\n") == 2 * calls
+
+
+def test_missing_binary_is_not_cached(tmp_path):
+    assert get_capabilities(tmp_path / "missing").version == ""
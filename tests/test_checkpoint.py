@@ -0,0 +1,93 @@
+import os
+
+import pytest
+
+from core.checkpoint import (checkpoint_params, find_resumable_dir, plan_resume, valid_prefix, write_checkpoint,
+                             VALIDATE_TAIL_FRAMES)
+from core.manifest import ManifestWriter, MANIFEST_NAME
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\0" * 20 + b"\0\0\0\0IEND\xaeB`\x82"
+
+
+def write_frames(output_dir, count, step=2.0, broken=()):
+    """写出 count 帧的 PNG 与帧清单（pts = (n-1)*step + 0.04），broken 中的帧只写一半"""
+    rows = []
+    for n in range(1, count + 1):
+        name = f"frame_{n:05d}.png"
+        (output_dir / name).write_bytes(PNG[:10] if n in broken else PNG)
+        rows.append((n, (n - 1) * 50 + 1, (n - 1) * step + 0.04, name, len(PNG)))
+    ManifestWriter(output_dir / MANIFEST_NAME, rows).close()
+    return rows
+
+
+def test_valid_prefix_stops_at_gap(tmp_path):
+    rows = write_frames(tmp_path, 6)
+    assert valid_prefix(tmp_path, rows[:3] + rows[4:], "png") == rows[:3]
+
+
+def test_valid_prefix_drops_incomplete_tail(tmp_path):
+    rows = write_frames(tmp_path, 12, broken={10})
+    assert valid_prefix(tmp_path, rows, "png") == rows[:9]
+
+
+def test_valid_prefix_checks_only_tail(tmp_path):
+    rows = write_frames(tmp_path, VALIDATE_TAIL_FRAMES + 4)
+    (tmp_path / rows[0][3]).write_bytes(b"broken")
+    assert valid_prefix(tmp_path, rows, "png") == rows
+
+
+def test_plan_resume_from_grid_point(tmp_path, make_extractor):
+    extractor = make_extractor(tmp_path, param=2)
+    write_frames(tmp_path, 10, broken={8})
+    write_checkpoint(tmp_path, checkpoint_params(extractor), "running", 10)
+
+    rows, start, number = plan_resume(extractor)
+    # 第 7 帧是最后一个有效帧，它会被重新提取；之后残留的文件被删除
+    assert [row[0] for row in rows] == list(range(1, 7))
+    assert number == 7
+    assert start == 12
+    assert not any((tmp_path / f"frame_{n:05d}.png").exists() for n in (8, 9, 10))
+
+
+def test_plan_resume_every_n_frames(tmp_path, make_extractor):
+    extractor = make_extractor(tmp_path, mode="每N帧取1帧", param=50)
+    write_frames(tmp_path, 5)
+    write_checkpoint(tmp_path, checkpoint_params(extractor), "running", 5)
+
+    rows, start, number = plan_resume(extractor)
+    assert number == 5
+    assert start == pytest.approx(8.04 - 0.25 / 25)
+
+
+def test_plan_resume_rejects_other_params(tmp_path, make_extractor):
+    write_frames(tmp_path, 4)
+    write_checkpoint(tmp_path, checkpoint_params(make_extractor(tmp_path, param=2)), "running", 4)
+    with pytest.raises(ValueError):
+        plan_resume(make_extractor(tmp_path, param=3))
+
+
+def test_plan_resume_without_checkpoint(tmp_path, make_extractor):
+    write_frames(tmp_path, 4)
+    assert plan_resume(make_extractor(tmp_path, param=2)) is None
+
+
+def test_plan_resume_archive_restarts(tmp_path, make_extractor):
+    extractor = make_extractor(tmp_path, param=2, container="zip")
+    write_checkpoint(tmp_path, checkpoint_params(extractor), "running", 0)
+    assert plan_resume(extractor) is None
+
+
+def test_find_resumable_dir(tmp_path, make_extractor):
+    extractor = make_extractor(tmp_path, param=2)
+    stem = extractor.video_path.stem
+    matching, other, done = (tmp_path / f"{stem}_帧提取_{i}" for i in range(3))
+    for directory in (matching, other, done):
+        directory.mkdir()
+    write_checkpoint(matching, checkpoint_params(extractor), "running")
+    write_checkpoint(other, checkpoint_params(make_extractor(tmp_path, param=5)), "running")
+    write_checkpoint(done, checkpoint_params(extractor), "completed")
+    # 参数不同的目录更新，也不会被选中
+    os.utime(other, (os.path.getmtime(matching) + 10,) * 2)
+
+    assert find_resumable_dir(tmp_path, extractor) == matching
+    assert find_resumable_dir(tmp_path / "missing", extractor) is None
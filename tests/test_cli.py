@@ -0,0 +1,28 @@
+import json
+
+import pytest
+
+from core import batch, cli, multi
+
+
+@pytest.mark.parametrize("main, argv", [
+    (cli.main, ["video.mp4", "-o", "out"]),
+    (batch.main, ["videos", "-o", "out"]),
+    (multi.main, ["video.mp4", "--out", "dir=a,mode=seconds,n=1"]),
+])
+def test_missing_ffmpeg_reports_json(main, argv, tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr("core.util.FFMPEG_BIN", tmp_path / "ffmpeg")
+    assert main([str(tmp_path / arg) if i == 0 else arg for i, arg in enumerate(argv)]) == 2
+    result = json.loads(capsys.readouterr().out)
+    assert result["status"] == "error"
+    assert str(tmp_path / "ffmpeg") in result["error"]
+
+
+def test_multi_output_rejects_unsupported_options(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr("core.cli.missing_ffmpeg_message", lambda: None)
+    monkeypatch.setenv("VFC_CACHE_DIR", str(tmp_path / "cache"))
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"\0")
+    assert cli.main([str(video), "--out", "dir=a", "-j", "4", "--cache"]) == 2
+    result = json.loads(capsys.readouterr().out)
+    assert "分段并行" in result["error"] and "结果缓存" in result["error"]
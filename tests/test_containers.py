@@ -0,0 +1,87 @@
+import json
+import tarfile
+import zipfile
+
+import pytest
+
+from core.containers import NPY_HEADER_SIZE, index_path, open_frames, open_sink
+from core.layout import OutputLayout
+
+
+def frame_bytes(number):
+    # 长度不是 512 的整数倍，检查 tar 的补齐
+    return bytes([number % 256]) * (700 + number * 13)
+
+
+@pytest.mark.parametrize("container", ["zip", "tar"])
+def test_archive_offsets(tmp_path, container):
+    sink = open_sink(container, tmp_path, "png", 64, 48)
+    for number in range(3, 9):
+        sink.add(number, frame_bytes(number))
+    sink.close()
+
+    with open_frames(sink.path) as frames:
+        assert len(frames) == 6
+        for number in range(3, 9):
+            assert frames[number] == frame_bytes(number)
+        with pytest.raises(IndexError):
+            frames[9]
+        with pytest.raises(IndexError):
+            frames[2]
+    # 标准工具读出的内容与按偏移读取的相同
+    if container == "zip":
+        with zipfile.ZipFile(sink.path) as archive:
+            assert archive.read("frame_00005.png") == frame_bytes(5)
+    else:
+        with tarfile.open(sink.path) as archive:
+            assert archive.extractfile("frame_00005.png").read() == frame_bytes(5)
+
+
+def test_archive_names_follow_layout(tmp_path):
+    layout = OutputLayout().fitted(250000)
+    sink = open_sink("zip", tmp_path, "jpg", 64, 48, layout=layout)
+    sink.add(1, b"x" * 10)
+    sink.close()
+    assert sink.entry_name(1) == "frames.zip#frame_000001.jpg"
+    index = json.loads(index_path(sink.path).read_text(encoding="utf-8"))
+    assert index["names"] == ["frame_000001.jpg"]
+    assert index["start_number"] == 1
+
+
+def test_tensor_layout(tmp_path):
+    width, height = 4, 2
+    sink = open_sink("npy", tmp_path, "png", width, height)
+    frames = [bytes([n]) * (width * height * 3) for n in range(5)]
+    for number, data in enumerate(frames, start=11):
+        sink.add(number, data)
+    sink.close()
+    assert sink.entry_name(13) == "frames.npy#2"
+
+    raw = sink.path.read_bytes()
+    assert raw[:6] == b"\x93NUMPY"
+    assert b"'shape': (5, 2, 4, 3)" in raw[:NPY_HEADER_SIZE]
+    size = width * height * 3
+    # 第 i 帧位于 头部 + i*帧大小
+    for i, data in enumerate(frames):
+        assert raw[NPY_HEADER_SIZE + i * size:NPY_HEADER_SIZE + (i + 1) * size] == data
+    meta = json.loads(index_path(sink.path).read_text(encoding="utf-8"))
+    assert (meta["frames"], meta["start_number"], meta["header_size"]) == (5, 11, NPY_HEADER_SIZE)
+
+
+def test_tensor_reader(tmp_path):
+    numpy = pytest.importorskip("numpy")
+    sink = open_sink("npy", tmp_path, "png", 4, 2)
+    for number in range(1, 4):
+        sink.add(number, bytes([number]) * 24)
+    sink.close()
+    with open_frames(sink.path) as frames:
+        assert len(frames) == 3
+        assert frames[2].shape == (2, 4, 3)
+        assert numpy.all(frames[2] == 2)
+        with pytest.raises(IndexError):
+            frames[4]
+
+
+def test_unknown_container(tmp_path):
+    with pytest.raises(ValueError):
+        open_sink("rar", tmp_path, "png", 4, 2)
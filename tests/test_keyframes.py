@@ -0,0 +1,98 @@
+import json
+import os
+import sys
+
+import pytest
+
+from core import keyframes
+from core.keyframes import INDEX_VERSION, KeyframeIndex, load_keyframe_index
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="用 shell 脚本模拟 ffprobe")
+
+# 解码顺序的数据包（pts,dts,flags），容器 start_time 为 1.0：两个 GOP，每个 4 帧，含 B 帧重排
+PACKETS = """1.000000,0.920000,K__
+1.120000,0.960000,___
+1.040000,1.000000,___
+1.080000,1.040000,___
+1.160000,1.080000,K__
+1.280000,1.120000,___
+1.200000,1.160000,___
+N/A,1.240000,___
+1.000000
+"""
+
+
+@pytest.fixture
+def fake_ffprobe(tmp_path, monkeypatch):
+    """输出预设数据包的 ffprobe 替身；每次调用记入 calls.log，fail 文件存在时以错误退出"""
+    (tmp_path / "packets.csv").write_text(PACKETS, encoding="utf-8")
+    script = tmp_path / "ffprobe"
+    script.write_text(f'#!/bin/sh\necho "$*" >> "{tmp_path / "calls.log"}"\n'
+                      f'[ -e "{tmp_path / "fail"}" ] && exit 1\ncat "{tmp_path / "packets.csv"}"\n', encoding="utf-8")
+    script.chmod(0o755)
+    monkeypatch.setattr(keyframes, "FFPROBE_BIN", script)
+    monkeypatch.setenv("VFC_CACHE_DIR", str(tmp_path / "cache"))
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"\0" * 64)
+    return video
+
+
+def calls(video):
+    log = video.parent / "calls.log"
+    return log.read_text().count("\n") if log.is_file() else 0
+
+
+def test_build_index(fake_ffprobe):
+    index = load_keyframe_index(fake_ffprobe)
+    assert index.keyframes == pytest.approx([0.0, 0.16])
+    assert index.gop_frames == [4, 4]
+    assert index.frame_count == 8
+    # 没有 pts 的数据包按 dts 计时；最后一帧按平均帧间隔补齐
+    assert index.duration == pytest.approx(0.32)
+    assert index.keyframe_number(0.16) == 4
+    assert index.keyframe_number(0.08) is None
+    assert index.keyframe_before(0.2) == pytest.approx(0.16)
+
+
+def test_index_is_cached(fake_ffprobe):
+    first = load_keyframe_index(fake_ffprobe)
+    assert calls(fake_ffprobe) == 1
+    assert load_keyframe_index(fake_ffprobe) == first
+    assert calls(fake_ffprobe) == 1
+
+
+def test_cache_invalidated_when_video_changes(fake_ffprobe):
+    load_keyframe_index(fake_ffprobe)
+    st = fake_ffprobe.stat()
+    os.utime(fake_ffprobe, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert load_keyframe_index(fake_ffprobe, build=False) is None
+    load_keyframe_index(fake_ffprobe)
+    assert calls(fake_ffprobe) == 2
+
+
+def test_stale_or_damaged_cache_is_rebuilt(fake_ffprobe):
+    load_keyframe_index(fake_ffprobe)
+    cache_file = keyframes._index_path(fake_ffprobe)
+    data = json.loads(cache_file.read_text(encoding="utf-8"))
+    cache_file.write_text(json.dumps({**data, "version": INDEX_VERSION - 1}), encoding="utf-8")
+    assert load_keyframe_index(fake_ffprobe, build=False) is None
+    cache_file.write_text("{", encoding="utf-8")
+    assert load_keyframe_index(fake_ffprobe).frame_count == 8
+    assert calls(fake_ffprobe) == 2
+
+
+def test_failed_probe_is_not_cached(fake_ffprobe):
+    (fake_ffprobe.parent / "fail").touch()
+    with pytest.raises(RuntimeError):
+        load_keyframe_index(fake_ffprobe)
+    assert load_keyframe_index(fake_ffprobe, build=False) is None
+
+
+def test_leading_frames_before_first_keyframe():
+    index = KeyframeIndex(keyframes=[1.0, 3.0], gop_frames=[50, 25], frame_count=100, duration=4.0)
+    assert index.keyframe_number(1.0) == 25
+    assert index.keyframe_number(3.0) == 75
+    assert index.gops_between(1.5, 3.5) == 2
+    assert index.gops_between(1.0, 2.0) == 1
+    assert index.frames_between(1.0, 2.0) == 25
+    assert index.max_gop_seconds == 2.0
@@ -0,0 +1,116 @@
+import argparse
+
+import pytest
+
+from core.layout import OutputLayout, shard_size
+
+
+def test_default_matches_flat_layout():
+    layout = OutputLayout().fitted(1000, 120.0)
+    assert layout.default and layout.direct
+    assert layout.pattern("png") == "frame_%05d.png"
+    assert layout.path(12, 3.0, "png") == "frame_00012.png"
+
+
+def test_width_grows_with_planned_count():
+    layout = OutputLayout().fitted(123456)
+    assert layout.digits == 6 and not layout.default
+    assert layout.staged_name(7, "jpg") == "frame_000007.jpg"
+    assert layout.pattern("jpg") == "frame_%06d.jpg"
+    # 名字按字典序排列即按编号排列
+    names = [layout.staged_name(n, "png") for n in (9, 99999, 100000, 123456)]
+    assert names == sorted(names)
+
+
+def test_sharded_paths():
+    layout = OutputLayout(shard=1000).fitted(2500000)
+    assert (layout.digits, layout.dir_digits) == (7, 5)
+    assert layout.path(12345, 0.0, "png") == "00012/frame_0012345.png"
+    assert layout.path(999, 0.0, "png") == "00000/frame_0000999.png"
+    assert not layout.direct
+    assert OutputLayout(shard=10).fitted(10 ** 7 - 1).dir_digits == 6
+
+
+def test_time_naming():
+    layout = OutputLayout(naming="time").fitted(100, 123456.0)
+    assert layout.time_digits == 6
+    assert layout.path(1, 83.25, "png") == "t000083.250.png"
+    assert OutputLayout(naming="time").fitted(10, 90.0).path(1, 1.0005, "jpg") == "t00001.000.jpg"
+    assert OutputLayout(naming="time", shard=5).fitted(10, 90.0).path(7, 12.5, "png") == "00001/t00012.500.png"
+
+
+def test_fitted_keeps_options():
+    layout = OutputLayout(shard=100, naming="time").fitted(0)
+    assert (layout.shard, layout.naming, layout.digits) == (100, "time", 5)
+    assert layout.to_dict() == {"shard": 100, "naming": "time", "digits": 5}
+
+
+def test_invalid_options():
+    with pytest.raises(ValueError):
+        OutputLayout(shard=-1)
+    with pytest.raises(ValueError):
+        OutputLayout(naming="hash")
+    assert shard_size("1000") == 1000
+    with pytest.raises(argparse.ArgumentTypeError):
+        shard_size("-5")
+    with pytest.raises(argparse.ArgumentTypeError):
+        shard_size("many")
+
+
+def test_extractor_fits_layout_to_planned_outputs(tmp_path, make_extractor):
+    # 每N帧取1帧，N=1：40 秒 × 5000 fps = 200000 帧，需要 6 位编号
+    extractor = make_extractor(tmp_path, mode="每N帧取1帧", param=1, fps=5000)
+    assert extractor.layout.digits == 6
+    assert make_extractor(tmp_path, param=1).layout.default
+
+
+def test_sink_path():
+    sharded = OutputLayout(shard=1000).fitted(2500000)
+    assert sharded.sink_path(12345, "png") == sharded.path(12345, 0.0, "png")
+    timed = OutputLayout(naming="time", shard=1000).fitted(2500000, 90.0)
+    # 按时间命名：先写到最终子目录中的编号文件名
+    assert timed.sink_path(12345, "png") == "00012/frame_0012345.png"
+    assert OutputLayout(naming="time").fitted(10, 90.0).sink_path(3, "png") == "frame_00003.png"
+
+
+def test_disambiguated():
+    layout = OutputLayout(naming="time").fitted(10, 90.0)
+    assert layout.disambiguated("00001/t00012.500.png", 7) == "00001/t00012.500_00007.png"
+
+
+def write_staged(extractor, numbers):
+    from core.manifest import ManifestWriter, MANIFEST_NAME
+
+    extractor.output_dir.mkdir(parents=True, exist_ok=True)
+    extractor.manifest = ManifestWriter(extractor.output_dir / MANIFEST_NAME)
+    for number in numbers:
+        (extractor.output_dir / extractor.layout.staged_name(number, "png")).write_bytes(b"%d" % number)
+
+
+def test_time_naming_collision_keeps_both_frames(tmp_path, make_extractor):
+    extractor = make_extractor(tmp_path / "out", layout=OutputLayout(naming="time"))
+    write_staged(extractor, (1, 2, 3))
+    extractor.write_manifest([(1, 0, 1.0001), (2, 1, 1.0004), (3, 2, 2.0)])
+    extractor.manifest.close()
+
+    from core.manifest import FrameManifest
+    paths = [row[3] for row in FrameManifest.load(extractor.output_dir).rows]
+    assert paths == ["t00001.000.png", "t00001.000_00002.png", "t00002.000.png"]
+    assert [(extractor.output_dir / p).read_bytes() for p in paths] == [b"1", b"2", b"3"]
+    assert extractor.layout_failures == 0
+
+
+def test_pipeline_frames_are_not_moved(tmp_path, make_extractor):
+    from core.containers import FileSink
+
+    extractor = make_extractor(tmp_path / "out", layout=OutputLayout(shard=2))
+    write_staged(extractor, ())
+    sink = FileSink(extractor.output_dir, "png", extractor.layout)
+    for number in (1, 2, 3):
+        sink.add(number, b"x")
+    # 编码线程池直接写到分目录中，根目录下没有平铺的文件
+    assert sorted(p.name for p in extractor.output_dir.glob("*.png")) == []
+    extractor.write_manifest([(n, n, float(n)) for n in (1, 2, 3)], {1: 1, 2: 1, 3: 1}, sink.entry_name)
+    extractor.manifest.close()
+    assert (extractor.output_dir / "00001" / "frame_00003.png").is_file()
+    assert extractor.layout_failures == 0
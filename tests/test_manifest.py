@@ -0,0 +1,73 @@
+from fractions import Fraction
+
+from core.manifest import (FrameManifest, ManifestWriter, MANIFEST_NAME, parse_showinfo, parse_showinfo_config,
+                           showinfo_filter, SourceFrames)
+
+
+def test_parse_showinfo_line():
+    line = ("[Parsed_showinfo_3 @ 0x55d0c8] n:   3 pts:  38400 pts_time:1.2     duration:512 "
+            "fmt:yuv420p sar:1/1 s:160x120 i:P iskey:0 type:P checksum:1A2B3C4D")
+    frame = parse_showinfo(line)
+    assert frame == ("Parsed_showinfo_3", 3, 1.2, 38400)
+
+
+def test_parse_showinfo_named_instance():
+    # 不同 ffmpeg 版本显示为 "kept" 或 "showinfo@kept"
+    assert parse_showinfo("[showinfo@kept @ 0x1] n:0 pts:0 pts_time:0").name == "kept"
+    assert parse_showinfo("[kept @ 0x1] n:12 pts:-512 pts_time:-0.04").pts == -512
+    assert parse_showinfo("[src @ 0x1] n:7 pts_time:1.5e-05").time == 1.5e-05
+
+
+def test_parse_showinfo_ignores_other_lines():
+    assert parse_showinfo("frame=  10 fps=0.0 q=-0.0 size=N/A time=00:00:00.40") is None
+    assert parse_showinfo("[kept @ 0x1] config in time_base: 1/12800, frame_rate: 25/1") is None
+
+
+def test_parse_showinfo_config():
+    assert parse_showinfo_config("[showinfo@src @ 0x1] config in time_base: 1/12800, frame_rate: 25/1") == \
+        ("src", Fraction(1, 12800))
+    assert parse_showinfo_config("[src @ 0x1] config in time_base: 1/0") is None
+
+
+def test_showinfo_filter():
+    assert showinfo_filter() == "showinfo@kept"
+    assert showinfo_filter("src", checksum=False) == "showinfo@src=checksum=0"
+
+
+def test_source_frames_index():
+    frames = SourceFrames(100)
+    frames.add(-512, -0.04)  # seek 位置之前的帧不计数
+    for key in range(0, 5120, 512):
+        frames.add(key, key / 12800)
+    assert frames.index(1024) == 102
+    assert frames.index(1500) is None
+    assert frames.index(4608) == 109
+
+
+def test_source_frames_consumers_and_trim():
+    frames = SourceFrames(0, consumers=2)
+    for key in range(3000):
+        frames.add(key, float(key))
+    assert frames.index(2500, consumer=0) == 2500
+    # 另一路还没查过，不能丢弃
+    assert frames.index(10, consumer=1) == 10
+    assert frames.index(2600, consumer=1) == 2600
+    # 两路都查过的帧已丢弃，后面的帧号不受影响
+    assert frames._dropped > 0
+    assert frames.index(2999, consumer=0) == 2999
+
+
+def test_manifest_round_trip(tmp_path):
+    rows = [(n, n * 25, n * 1.0, f"frame_{n:05d}.png", 10) for n in (1, 2, 3, 5)]
+    writer = ManifestWriter(tmp_path / MANIFEST_NAME, rows[:2])
+    writer.write_rows(rows[2:])
+    writer.close()
+    assert (writer.rows, writer.bytes) == (4, 40)
+
+    manifest = FrameManifest.load(tmp_path)
+    assert manifest.rows == rows
+    assert manifest.by_number(5) == rows[3]
+    assert manifest.by_number(4) is None
+    assert manifest.frame_at(2.4) == rows[1]
+    assert manifest.frame_at(2.5) == rows[1]  # 与两侧等距时取前一帧
+    assert manifest.frame_at(100) == rows[3]
@@ -0,0 +1,68 @@
+import argparse
+import csv
+
+import pytest
+
+from core.layout import OutputLayout
+from core.mosaic import parse_grid, TILE_COLUMNS, TILES_NAME, TileLayout, write_tile_index
+from core.segments import Segment
+
+
+def test_position():
+    layout = TileLayout(3, 2)
+    assert layout.per_sheet == 6
+    assert layout.position(1) == (1, 0, 0)
+    assert layout.position(3) == (1, 0, 2)
+    assert layout.position(4) == (1, 1, 0)
+    assert layout.position(6) == (1, 1, 2)
+    assert layout.position(7) == (2, 0, 0)
+
+
+def test_filters():
+    assert TileLayout(4, 3, padding=2, margin=5).filters() == ["tile=4x3:padding=2:margin=5"]
+    chain = TileLayout(2, 2, timestamps=True, font_file="C:\\Fonts\\a:b.ttf").filters(offset=12.5)
+    assert chain[0].startswith("drawtext=fontfile='C\\:/Fonts/a\\:b.ttf':")
+    # 叠加的是源视频时间：片段内时间加上 offset
+    assert "%{pts\\:hms\\:12.500000}" in chain[0]
+    assert chain[1] == "tile=2x2:padding=0:margin=0"
+
+
+def test_invalid_layout():
+    with pytest.raises(ValueError):
+        TileLayout(0, 3)
+    assert parse_grid("5X3") == (5, 3)
+    for value in ("4", "4x0", "axb"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_grid(value)
+
+
+def test_write_tile_index_appends(tmp_path):
+    path = tmp_path / TILES_NAME
+    write_tile_index(path, [(1, "frame_00001.png", 0, 0, 1, 0, 0.0)])
+    write_tile_index(path, [(1, "frame_00001.png", 0, 1, 2, 25, 1.0)])
+    with open(path, encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == list(TILE_COLUMNS)
+    assert rows[1:] == [["1", "frame_00001.png", "0", "0", "1", "0", "0.000000"],
+                        ["1", "frame_00001.png", "0", "1", "2", "25", "1.000000"]]
+
+
+def test_extractor_tiles_after_sampling(tmp_path, make_extractor):
+    extractor = make_extractor(tmp_path, param=2, tile=TileLayout(2, 2))
+    vf = extractor.build_command(Segment(0, 0.0, 40.0, 1))
+    chain = vf[vf.index("-vf") + 1]
+    assert chain.index("select=") < chain.index("tile=2x2") < chain.index("setpts=N/FRAME_RATE/TB")
+    # 20 个抽样帧 -> 5 张拼图
+    assert extractor.planned_outputs() == 5
+
+
+def test_extractor_writes_tile_index(tmp_path, make_extractor):
+    extractor = make_extractor(tmp_path / "out", tile=TileLayout(2, 2), layout=OutputLayout(naming="time"))
+    extractor.output_dir.mkdir()
+    sheets = extractor.write_tiles([(n, (n - 1) * 25, n - 1.0) for n in range(1, 6)])
+    assert sheets == [(1, 0, 0.0), (2, 100, 4.0)]
+    with open(extractor.output_dir / TILES_NAME, encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    # 按时间命名时拼图以其第一格的时间命名
+    assert [row["path"] for row in rows] == ["t00000.000.png"] * 4 + ["t00004.000.png"]
+    assert [(row["row"], row["column"]) for row in rows[:4]] == [("0", "0"), ("0", "1"), ("1", "0"), ("1", "1")]
@@ -0,0 +1,28 @@
+from core.autotune import TuneOptions
+from core.dedup import DedupOptions
+from core.extractor import OutputOptions, PerformanceOptions, SelectionOptions
+from core.multi import parse_output_spec, unsupported_options
+from core.resultcache import ResultCache
+from core.scene import SceneOptions
+
+
+def test_default_options_are_supported():
+    assert unsupported_options(selection=SelectionOptions(), output=OutputOptions(),
+                               performance=PerformanceOptions(use_gpu=True, use_index=True)) == []
+
+
+def test_unsupported_options_are_named(tmp_path):
+    names = unsupported_options(
+        selection=SelectionOptions(scene=SceneOptions(min_gap=1.0), dedup=DedupOptions()),
+        output=OutputOptions(container="zip"),
+        performance=PerformanceOptions(parallel=4, auto_tune=TuneOptions(), encoders=2),
+        cache=ResultCache(tmp_path / "cache"),
+        resume=True,
+    )
+    assert names == ["去重", "场景帧间隔", "打包输出", "分段并行", "自动调优", "编码线程", "结果缓存", "断点续提"]
+
+
+def test_parse_output_spec():
+    spec = parse_output_spec("dir=缩略图,mode=seconds,n=2,format=JPG,q=80,size=320,shard=100")
+    assert (spec.mode, spec.param, spec.fmt, spec.quality) == ("每N秒取1帧", 2, "jpg", 80)
+    assert spec.resize.width == 320 and spec.layout.shard == 100 and spec.tile is None
@@ -0,0 +1,115 @@
+import argparse
+import subprocess
+
+import pytest
+
+from core.resize import parse_size, Resize
+from core.segments import Segment
+from core.util import FFMPEG_BIN, FFPROBE_BIN
+
+
+@pytest.mark.parametrize("resize, size", [
+    (Resize(width=80), (80, 60)),
+    (Resize(height=61), (82, 60)),
+    (Resize(100, 100), (100, 76)),
+])
+def test_filters_pin_computed_size(resize, size):
+    # 奇数源尺寸：按比例的一边不交给 ffmpeg 推算，写成与 output_size 相同的数值
+    assert resize.output_size(161, 121) == size
+    assert resize.filters(161, 121) == [f"scale={size[0]}:{size[1]}:flags=bicubic"]
+
+
+def test_filters_without_source_size():
+    assert Resize(width=80).filters() == ["scale=80:-2:flags=bicubic"]
+    crop = Resize(90, 90, fit="crop")
+    assert crop.filters(161, 121) == crop.filters()
+    assert crop.output_size(161, 121) == (90, 90)
+
+
+def test_scaled_size_keeps_aspect_ratio():
+    assert Resize(width=640).output_size(1920, 1080) == (640, 360)
+    assert Resize(height=360).output_size(1920, 1080) == (640, 360)
+    # 竖屏视频只给宽度
+    assert Resize(width=360).output_size(1080, 1920) == (360, 640)
+
+
+def test_fit_modes():
+    assert Resize(640, 640).output_size(1920, 1080) == (640, 360)
+    crop = Resize(640, 640, fit="crop")
+    assert crop.scaled_size(1920, 1080) == (1138, 640)
+    assert crop.output_size(1920, 1080) == (640, 640)
+    assert Resize(100, 300, fit="stretch").output_size(1920, 1080) == (100, 300)
+    assert Resize(101, 301, fit="stretch").filters(1920, 1080) == ["scale=101:301:flags=bicubic"]
+    assert Resize(90, 90, fit="crop", scaler="lanczos").filters() == [
+        "scale=90:90:force_original_aspect_ratio=increase:flags=lanczos", "crop=90:90"]
+
+
+def test_tiny_targets_stay_at_least_two_pixels():
+    assert Resize(width=2).output_size(1920, 100) == (2, 2)
+
+
+def test_lowres_factor():
+    resize = Resize(width=480)
+    assert resize.lowres("mpeg2video", 1920, 1080) == 2
+    assert resize.lowres("mpeg2video", 1920, 1080) == Resize(width=400).lowres("mpeg2video", 1920, 1080)
+    assert Resize(width=1000).lowres("mpeg4", 1920, 1080) == 0
+    assert Resize(width=100).lowres("mjpeg", 1920, 1080) == 3  # 不超过解码器支持的最大因子
+    assert resize.lowres("h264", 1920, 1080) == 0
+    assert resize.lowres("mpeg4", 0, 0) == 0
+
+
+def test_invalid_options():
+    with pytest.raises(ValueError):
+        Resize()
+    with pytest.raises(ValueError):
+        Resize(320, fit="cover")
+    with pytest.raises(ValueError):
+        Resize(320, scaler="sinc")
+
+
+def test_parse_size():
+    assert parse_size("320") == (320, 0)
+    assert parse_size("320x") == (320, 0)
+    assert parse_size("x240") == (0, 240)
+    assert parse_size("640X360") == (640, 360)
+    for value in ("abc", "0", "-5x10", "x"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_size(value)
+
+
+@pytest.mark.parametrize("resize", [None, Resize(width=80)])
+def test_raw_output_is_pinned_to_frame_size(tmp_path, make_extractor, resize):
+    extractor = make_extractor(tmp_path, width=161, height=121, encoders=2, resize=resize)
+    width, height = extractor.frame_size()
+    cmd = extractor.build_command(Segment(0, 0.0, 10.0, 1), raw=True)
+    assert f"scale={width}:{height}," in cmd[cmd.index("-vf") + 1]
+    # 写图片时不需要固定尺寸
+    cmd = make_extractor(tmp_path, width=161, height=121, resize=resize).build_command(Segment(0, 0.0, 10.0, 1))
+    assert cmd[cmd.index("-vf") + 1].count(f"scale={width}:{height}") == (0 if resize is None else 1)
+
+
+@pytest.fixture(scope="module")
+def odd_video(tmp_path_factory):
+    """161×121 的 MPEG-4 视频（支持 -lowres）；没有 ffmpeg 时跳过"""
+    if not (FFMPEG_BIN.is_file() and FFPROBE_BIN.is_file()):
+        pytest.skip("需要 ffmpeg / ffprobe（放在项目的 ffmpeg 目录中）")
+    from core.bench import VideoSpec, generate_video
+
+    patch = pytest.MonkeyPatch()
+    patch.setenv("VFC_CACHE_DIR", str(tmp_path_factory.mktemp("cache")))
+    yield generate_video(VideoSpec(161, 121, codec="mpeg4", gop=25, duration=4), cache=False)
+    patch.undo()
+
+
+@pytest.mark.parametrize("resize", [None, Resize(width=80), Resize(width=40)])
+def test_raw_frames_match_frame_size(odd_video, tmp_path, resize):
+    from core.extractor import FrameExtractor, OutputOptions, PerformanceOptions
+
+    extractor = FrameExtractor(odd_video, tmp_path, 0, 4.0, "每N秒取1帧", 1, "png", 0,
+                               output=OutputOptions(resize=resize), performance=PerformanceOptions(encoders=2))
+    width, height = extractor.frame_size()
+    cmd = extractor.build_command(Segment(0, 0.0, 4.0, 1), raw=True)
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, cwd=tmp_path)
+    assert result.returncode == 0
+    # 每秒 1 帧，数据长度恰好是整数帧
+    assert len(result.stdout) == 4 * width * height * 3
@@ -0,0 +1,116 @@
+import json
+import os
+
+import pytest
+
+from core.dedup import DedupOptions
+from core.manifest import ManifestWriter, MANIFEST_NAME
+from core.resultcache import ENTRY_NAME, RESULT_CACHE_VERSION, ResultCache, file_digest
+
+
+@pytest.fixture
+def entry(tmp_path):
+    """缓存条目：0~40 秒每 2 秒 1 帧（源帧号 0、50、100...，25 fps）"""
+    entry = tmp_path / "entry"
+    entry.mkdir()
+    rows = [(n, (n - 1) * 50, (n - 1) * 2.0, f"frame_{n:05d}.png", 3) for n in range(1, 21)]
+    ManifestWriter(entry / MANIFEST_NAME, rows).close()
+    for row in rows:
+        (entry / row[3]).write_bytes(b"png")
+    return entry, {"start": 0.0, "end": 40.0}, rows
+
+
+def subset(entry, make_extractor, tmp_path, start, end, **kwargs):
+    path, data, _ = entry
+    extractor = make_extractor(tmp_path / "out", start_sec=start, end_sec=end, **kwargs)
+    return ResultCache(tmp_path / "cache")._subset_rows(path, data, extractor, start, end)
+
+
+def test_every_n_seconds_aligned(entry, make_extractor, tmp_path):
+    rows = entry[2]
+    assert subset(entry, make_extractor, tmp_path, 10, 20, param=2) == rows[5:10]
+    # 结束时间不在网格上时包含最后一个网格点
+    assert subset(entry, make_extractor, tmp_path, 10, 21, param=2) == rows[5:11]
+
+
+def test_every_n_seconds_misaligned(entry, make_extractor, tmp_path):
+    assert subset(entry, make_extractor, tmp_path, 11, 20, param=2) is None
+
+
+def test_every_n_seconds_missing_rows(entry, make_extractor, tmp_path):
+    path, data, rows = entry
+    ManifestWriter(path / MANIFEST_NAME, rows[:7] + rows[8:]).close()
+    assert subset(entry, make_extractor, tmp_path, 10, 20, param=2) is None
+
+
+def test_every_n_frames(entry, make_extractor, tmp_path):
+    rows = entry[2]
+    assert subset(entry, make_extractor, tmp_path, 4, 10, mode="每N帧取1帧", param=50) == rows[2:5]
+    assert subset(entry, make_extractor, tmp_path, 1, 10, mode="每N帧取1帧", param=50) is None
+
+
+def test_all_keyframes(entry, make_extractor, tmp_path):
+    rows = entry[2]
+    assert subset(entry, make_extractor, tmp_path, 5, 9, mode="仅关键帧", param=0) == rows[3:5]
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"mode": "场景变化", "param": 0.3},
+    {"mode": "仅关键帧", "param": 5},
+    {"param": 2, "dedup": DedupOptions()},
+    {"param": 2, "container": "zip"},
+])
+def test_unsupported_subsets(entry, make_extractor, tmp_path, kwargs):
+    assert subset(entry, make_extractor, tmp_path, 10, 20, **kwargs) is None
+
+
+def record(path, names):
+    files = {}
+    for name in names:
+        st = (path / name).stat()
+        files[name] = [st.st_size, st.st_mtime_ns, file_digest(path / name)]
+    return files
+
+
+def test_intact_compares_size_and_mtime(entry):
+    path, data, rows = entry
+    names = [row[3] for row in rows]
+    data["files"] = record(path, names)
+    assert ResultCache._intact(path, data, names)
+    (path / names[0]).write_bytes(b"gif")  # 大小相同，修改时间变化
+    os.utime(path / names[0], ns=(1, 1))
+    assert not ResultCache._intact(path, data, names)
+    assert ResultCache._intact(path, data, names[1:])
+    assert not ResultCache._intact(path, data, ["missing.png"])
+
+
+def test_digest_only_on_verify(entry):
+    path, data, rows = entry
+    names = [row[3] for row in rows]
+    data["files"] = record(path, names)
+    # 改写内容但保留大小与修改时间：快速检查无法发现，sha1 校验可以
+    mtime_ns = (path / names[0]).stat().st_mtime_ns
+    (path / names[0]).write_bytes(b"gif")
+    os.utime(path / names[0], ns=(mtime_ns, mtime_ns))
+    assert ResultCache._intact(path, data, names)
+    assert not ResultCache._intact(path, data, names, digest=True)
+
+
+def test_verify_removes_damaged_entries(tmp_path):
+    cache = ResultCache(tmp_path / "cache")
+    entries = []
+    for name in ("a", "b"):
+        entry = cache.root / "key" / name
+        entry.mkdir(parents=True)
+        (entry / "frame_00001.png").write_bytes(b"png")
+        data = {"version": RESULT_CACHE_VERSION, "bytes": 3, "files": record(entry, ["frame_00001.png"])}
+        (entry / ENTRY_NAME).write_text(json.dumps(data), encoding="utf-8")
+        entries.append(entry)
+    st = (entries[1] / "frame_00001.png").stat()
+    (entries[1] / "frame_00001.png").write_bytes(b"bad")
+    os.utime(entries[1] / "frame_00001.png", ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    assert cache.verify() == [entries[1]]
+    assert entries[1].exists()
+    assert cache.verify(repair=True) == [entries[1]]
+    assert not entries[1].exists() and entries[0].exists()
@@ -0,0 +1,76 @@
+from core.scene import (merge_score_logs, parse_score_log, SCENE_LOG_NAME, SCENE_LOG_PARTS, scene_router,
+                        score_log_filter, select_frames, threshold_from_param)
+from core.segments import Segment
+
+
+def write_log(path, entries):
+    path.write_text("".join(f"frame:{n} pts:{int(t * 12800)} pts_time:{t}\nlavfi.scene_score={score}\n"
+                            for n, (t, score) in enumerate(entries)), encoding="utf-8")
+
+
+def test_threshold_from_param():
+    assert threshold_from_param(30) == 0.3
+    assert threshold_from_param(150) == 1.0
+    assert threshold_from_param(-5) == 0.0
+
+
+def test_scene_router():
+    assert scene_router(0.3) == "select=outputs=2:expr='if(eq(n\\,0)+gt(scene\\,0.3000)\\,1+0*st(0\\,t)\\,2)'"
+    router = scene_router(0.3, min_gap=1.5, max_gap=10)
+    assert "gt(scene\\,0.3000)*gte(t-ld(0)\\,1.5)" in router
+    assert "+gte(t-ld(0)\\,10)" in router
+
+
+def test_select_frames_matches_router_rules():
+    scores = [(0, 0.0, 0.0), (1, 0.5, 0.9), (2, 1.0, 0.1), (3, 2.0, 0.8), (4, 12.5, 0.0), (5, 13.0, 0.5)]
+    assert [f for f, _, _ in select_frames(scores, 0.3)] == [0, 1, 3, 5]
+    # min_gap：0.5 秒处的变化离上一保留帧太近
+    assert [f for f, _, _ in select_frames(scores, 0.3, min_gap=1.0)] == [0, 3, 5]
+    # max_gap：超过 10 秒没有保留帧时强制保留
+    assert [f for f, _, _ in select_frames(scores, 0.95, max_gap=10)] == [0, 4]
+
+
+def test_parse_score_log(tmp_path):
+    log = tmp_path / SCENE_LOG_NAME
+    log.write_text("frame:0 pts:0 pts_time:0\nlavfi.scene_score=0.000000\n"
+                   "frame:1 pts:512 pts_time:0.04\nlavfi.scene_score=bad\n"
+                   "frame:2 pts:1024 pts_time:0.08\nlavfi.scene_score=0.412000\n", encoding="utf-8")
+    assert parse_score_log(log) == [(0, 0.0, 0.0), (2, 0.08, 0.412)]
+
+
+def test_merge_score_logs(tmp_path):
+    kept, rest = (tmp_path / name for name in SCENE_LOG_PARTS)
+    write_log(kept, [(10.0, 1.0), (12.0, 0.5)])
+    write_log(rest, [(10.04, 0.01), (11.0, 0.02)])
+    log = merge_score_logs(tmp_path, offset=-10.0)
+    assert log == tmp_path / SCENE_LOG_NAME
+    assert [(f, round(t, 6), s) for f, t, s in parse_score_log(log)] == \
+        [(0, 0.0, 1.0), (1, 0.04, 0.01), (2, 1.0, 0.02), (3, 2.0, 0.5)]
+    assert not kept.exists() and not rest.exists()
+    # 没有分段日志时不改动已有日志
+    assert merge_score_logs(tmp_path) is None and log.is_file()
+
+
+def test_merge_score_logs_on_resume(tmp_path):
+    write_log(tmp_path / SCENE_LOG_NAME, [(0.0, 1.0), (1.0, 0.1), (2.0, 0.2)])
+    write_log(tmp_path / SCENE_LOG_PARTS[0], [(1.5, 0.9)])
+    log = merge_score_logs(tmp_path, resume_from=1.5)
+    assert [(t, s) for _, t, s in parse_score_log(log)] == [(0.0, 1.0), (1.0, 0.1), (1.5, 0.9)]
+
+
+def test_extractor_routes_through_single_select(tmp_path, make_extractor):
+    extractor = make_extractor(tmp_path, mode="场景变化", param=30)
+    cmd = extractor.build_command(Segment(0, 0.0, 40.0, 1))
+    graph = cmd[cmd.index("-filter_complex") + 1]
+    # 每帧只计算一次场景分数
+    assert graph.count(scene_router(0.3)) == 1 and graph.count("scene\\,") == 1
+    assert f"[keep]{score_log_filter(SCENE_LOG_PARTS[0])}," in graph
+    assert f"[rest]{score_log_filter(SCENE_LOG_PARTS[1])}[scan]" in graph
+    assert cmd[cmd.index("[scan]") + 2] == "null"
+
+
+def test_offline_selection_matches_extraction(lavfi_video, run_extraction, tmp_path):
+    rows = run_extraction(lavfi_video, "场景变化", 30)
+    log = next(tmp_path.glob(f"out_*/{SCENE_LOG_NAME}"))
+    kept = select_frames(parse_score_log(log), 0.3)
+    assert [round(t, 3) for _, t, _ in kept] == [round(pts, 3) for _, _, pts in rows]
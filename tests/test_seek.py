@@ -0,0 +1,55 @@
+import pytest
+
+from core.keyframes import KeyframeIndex
+from core.seek import choose_engine, plan_seek_windows, sample_times, window_select
+
+
+def test_sample_times_every_n_seconds():
+    assert sample_times(3, 20, "每N秒取1帧", 5) == [3, 8, 13, 18]
+    # 续提 / 分段时网格仍以提取起点为原点
+    assert sample_times(3, 20, "每N秒取1帧", 5, origin=0) == [5, 10, 15]
+    assert sample_times(10, 20, "每N秒取1帧", 5, origin=0) == [10, 15]
+
+
+def test_sample_times_every_n_frames():
+    assert sample_times(0, 2, "每N帧取1帧", 10, fps=25) == pytest.approx([0.0, 0.4, 0.8, 1.2, 1.6])
+    assert sample_times(0.5, 2, "每N帧取1帧", 10, fps=25, origin=0) == pytest.approx([0.8, 1.2, 1.6])
+    assert sample_times(0, 2, "每N帧取1帧", 10, fps=0) == []
+
+
+def test_windows_merge_by_gap_without_index():
+    windows = plan_seek_windows([0, 1, 2, 60, 61, 200], fps=25)
+    assert [(w.start, w.end, w.targets, w.start_number) for w in windows] == [
+        (0, 2, [0, 1, 2], 1), (60, 61, [60, 61], 4), (200, 200, [200], 6)]
+
+
+def test_windows_merge_by_keyframe():
+    index = KeyframeIndex(keyframes=[0, 10, 20, 30, 40, 50, 60], frame_count=1750, duration=70)
+    windows = plan_seek_windows([1, 5, 12, 15, 33], index, fps=25)
+    # 12 秒的关键帧（10）晚于窗口末尾（5）时重新 seek；15 秒与 12 秒同属一个 GOP
+    assert [w.targets for w in windows] == [[1, 5], [12, 15], [33]]
+    assert [w.start_number for w in windows] == [1, 3, 5]
+
+
+def test_choose_engine():
+    engine, windows = choose_engine(0, 1200, "每N秒取1帧", 60, 25)
+    assert engine == "seek"
+    assert [w.start for w in windows] == list(range(0, 1200, 60))
+    assert choose_engine(0, 60, "每N秒取1帧", 1, 25) == ("continuous", None)
+    # 每N帧取1帧 只在明确指定时使用 seek
+    assert choose_engine(0, 1200, "每N帧取1帧", 1500, 25) == ("continuous", None)
+
+
+def test_window_select_relative_to_seek():
+    window = plan_seek_windows([10.0, 12.0], fps=25)[0]
+    expr = window_select(window, 9.0, 25, "每N秒取1帧")
+    assert expr.startswith("select='") and expr.count("gte(t") == 2
+    assert "0.999900" in expr and "2.999900" in expr
+
+
+@pytest.mark.parametrize("param", [7, 13])
+def test_continuous_and_seek_identical(lavfi_video, run_extraction, param):
+    continuous = run_extraction(lavfi_video, "每N秒取1帧", param, engine="continuous")
+    seek = run_extraction(lavfi_video, "每N秒取1帧", param, engine="seek", use_index=True)
+    assert continuous
+    assert seek == continuous
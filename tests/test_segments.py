@@ -0,0 +1,75 @@
+from fractions import Fraction
+
+import pytest
+
+from core.segments import MIN_SEGMENT_SECONDS, plan_segments, to_fraction
+
+
+def assert_contiguous(segments, start_sec, end_sec, total_samples):
+    """各段首尾相接、编号连续，非末段的帧数之和加上末段剩余的采样点等于串行的采样点数"""
+    assert segments[0].start == start_sec
+    assert segments[-1].start + segments[-1].duration == pytest.approx(end_sec)
+    assert segments[-1].max_frames is None
+    for k, (seg, nxt) in enumerate(zip(segments, segments[1:])):
+        assert seg.index == k
+        assert nxt.start_number == seg.start_number + seg.max_frames
+        assert seg.start + seg.duration >= nxt.start - 1e-9
+    assert segments[-1].start_number <= total_samples
+
+
+def test_serial_when_not_splittable():
+    assert len(plan_segments(0, 100, "每N秒取1帧", 1, count=1)) == 1
+    assert len(plan_segments(0, 100, "仅关键帧", 0, count=8)) == 1
+    assert len(plan_segments(0, 100, "场景变化", 0.3, count=8)) == 1
+    assert len(plan_segments(0, 100, "每N帧取1帧", 5, fps=0, count=8)) == 1
+    # 每段至少 MIN_SEGMENT_SECONDS 秒
+    assert len(plan_segments(0, MIN_SEGMENT_SECONDS * 1.5, "每N秒取1帧", 1, count=8)) == 1
+
+
+def test_every_n_seconds_boundaries_on_grid():
+    segments = plan_segments(3, 100, "每N秒取1帧", 2, count=8)
+    assert_contiguous(segments, 3, 100, 49)
+    for seg in segments:
+        assert (seg.start - 3) % 2 == 0
+    assert [seg.start_number for seg in segments] == [1 + k * segments[0].max_frames for k in range(len(segments))]
+
+
+def test_every_n_seconds_even_split():
+    segments = plan_segments(0, 100, "每N秒取1帧", 1, count=4)
+    assert [(seg.start, seg.duration, seg.start_number, seg.max_frames) for seg in segments] == [
+        (0, 25, 1, 25), (25, 25, 26, 25), (50, 25, 51, 25), (75, 25, 76, None)]
+
+
+@pytest.mark.parametrize("start_sec", [0, 0.01, 7.3])
+def test_every_n_frames_no_empty_tail(start_sec):
+    fps = Fraction(25)
+    segments = plan_segments(start_sec, 100, "每N帧取1帧", 5, fps=25, count=4)
+    first_index = -(-Fraction(start_sec) * fps // 1)
+    total_samples = -(-(100 * fps - first_index) // 5)
+    assert len(segments) == 4
+    assert_contiguous(segments, start_sec, 100, total_samples)
+    for seg in segments[1:]:
+        # 段起点提前半帧，落在第 first_index + k*N 帧之前
+        index = first_index + (seg.start_number - 1) * 5
+        assert seg.start == pytest.approx(float((index - Fraction(1, 2)) / fps))
+
+
+def test_ntsc_frame_rate():
+    segments = plan_segments(0, 100, "每N帧取1帧", 5, fps="30000/1001", count=3)
+    assert len(segments) == 3
+    assert_contiguous(segments, 0, 100, 600)
+
+
+def test_to_fraction():
+    assert to_fraction("30000/1001") == Fraction(30000, 1001)
+    assert to_fraction(29.97002997002997) == Fraction(30000, 1001)
+    assert to_fraction("abc") == 0
+    assert to_fraction(None) == 0
+
+
+@pytest.mark.parametrize("mode,param", [("每N秒取1帧", 3), ("每N帧取1帧", 40)])
+def test_serial_and_parallel_identical(lavfi_video, run_extraction, mode, param):
+    serial = run_extraction(lavfi_video, mode, param, parallel=1, engine="continuous")
+    parallel = run_extraction(lavfi_video, mode, param, parallel=3, engine="continuous")
+    assert serial
+    assert parallel == serial
@@ -0,0 +1,35 @@
+import pytest
+
+from core.extractor import SelectionOptions
+from core.scene import SceneOptions, scene_router
+from core.stream import FrameStream
+
+INFO = {"duration": 40.0, "fps": 25, "total_frames": 1000, "width": 64, "height": 48}
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(b"\0" * 4096)
+    return path
+
+
+def test_scene_stream_uses_router(video):
+    stream = FrameStream(video, mode="场景变化", param=30, size=(64, 48), video_info=INFO,
+                         selection=SelectionOptions(scene=SceneOptions(min_gap=1.0)))
+    cmd = stream.build_command(64, 48)
+    graph = cmd[cmd.index("-filter_complex") + 1]
+    assert scene_router(0.3, 1.0) in graph
+    assert "[rest]nullsink" in graph
+    assert cmd[cmd.index("-map") + 1] == "[out]"
+    assert "-vf" not in cmd
+    # 流式接口不写分数日志
+    assert "metadata=print" not in graph
+    assert cmd[-1] == "pipe:1"
+
+
+def test_sampling_stream_uses_single_chain(video):
+    stream = FrameStream(video, mode="每N秒取1帧", param=2, size=(64, 48), video_info=INFO)
+    cmd = stream.build_command(64, 48)
+    assert "-filter_complex" not in cmd
+    assert "select=" in cmd[cmd.index("-vf") + 1]
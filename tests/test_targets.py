@@ -0,0 +1,57 @@
+import csv
+
+import pytest
+
+from core.seek import plan_seek_windows
+from core.targets import TargetList, frames_to_times, snap_targets, write_target_index
+
+
+def test_snap_to_nearest_frame_and_dedupe():
+    times, mapping = snap_targets([5.0, 1.01, 1.0, 3.3], 25, 0, 10)
+    assert times == pytest.approx([1.0, 3.28, 5.0])
+    # 1.01 与 1.0 对齐到同一帧，共用一个目标序号；序号按时间排序
+    assert mapping == [3, 1, 1, 2]
+
+
+def test_out_of_range_requests_map_to_none():
+    times, mapping = snap_targets([-1, 0.0, 9.8, 10.0, 12], 25, 0, 10)
+    assert times == pytest.approx([0.0, 9.8])
+    assert mapping == [None, 1, 2, None, None]
+
+
+def test_half_frame_before_start_is_kept():
+    times, mapping = snap_targets([0.99, 0.97], 25, 1.0, 10)
+    assert times == pytest.approx([1.0])
+    assert mapping == [1, None]
+
+
+def test_unknown_fps():
+    with pytest.raises(ValueError):
+        snap_targets([1.0], 0, 0, 10)
+    with pytest.raises(ValueError):
+        frames_to_times([1], 0)
+
+
+def test_snapped_targets_merge_into_windows():
+    times, _ = snap_targets([0.5, 1.0, 1.5, 30.0, 30.2, 100.0], 25, 0, 200)
+    windows = plan_seek_windows(times, fps=25)
+    assert [len(w.targets) for w in windows] == [3, 2, 1]
+    assert [w.start_number for w in windows] == [1, 4, 6]
+
+
+def test_target_list_requires_values():
+    with pytest.raises(ValueError):
+        TargetList()
+    assert TargetList(frames=(3, 1)).requests == [3, 1]
+    assert TargetList(times=[2.0], frames=[1]).requests == [2.0]
+
+
+def test_write_target_index(tmp_path):
+    rows = [(1, 25, 1.0, "frame_00001.png", 10), (2, 82, 3.28, "frame_00002.png", 10)]
+    path = tmp_path / "targets.csv"
+    write_target_index(path, [3.3, 1.0, 12.0], [2, 1, None], rows)
+    with open(path, encoding="utf-8", newline="") as f:
+        lines = list(csv.reader(f))
+    assert lines[1] == ["0", "3.300000", "2", "frame_00002.png", "3.280000"]
+    assert lines[2] == ["1", "1.000000", "1", "frame_00001.png", "1.000000"]
+    assert lines[3] == ["2", "12.000000", "", "", ""]